@@ -0,0 +1,14 @@
+# addresses.py - Socket address strings shared by the command socket, OSC server and MIDI backend
+
+
+def parse_address(address):
+    """'host:port' -> (host, port) for TCP/UDP; anything else is a Unix socket path"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+def format_address(bound):
+    """The reverse of parse_address, for a bound server_address"""
+    return f'{bound[0]}:{bound[1]}' if isinstance(bound, tuple) else bound
@@ -1,17 +1,33 @@
 # app.py - Enhanced FaderPort 16 Emulator
-import gradio as gr
+# gradio, pyaudio and transformers (which pulls in torch) are imported lazily
+# where they are first needed, so DAW-only startup never pays for them.
+import argparse
 import mido
-import pyaudio
-import speech_recognition as sr
-from transformers import pipeline
-import pandas as pd
-import json
 import os
-import wave
+import signal
+import sys
 import threading
 import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
 import logging
+from audio_capture import StreamingCapture
+from audio_ingest import RECOGNIZER_SAMPLE_RATE, audio_data_from_array, audio_data_from_frames
+from chat_log import ChatLog
+from command_server import DEFAULT_ADDRESS as COMMAND_ADDRESS, CommandServer
+from commands import USAGE, Action, CommandError, action_from_dict, parse_commands
+from inference import InferenceService, QueueFullError, generated_text
+from listener import ContinuousListener, KeywordSpotter
+from midi_engine import MidiOutputEngine
+from metrics import MetricsRegistry
+from midi_input import MidiInputListener
+from mixer import BANK_SIZE, DEFAULT_FADER, MidiAddressMap, MixerState
+from osc_server import OscServer
+from persistence import StateStore
+from ramps import RampScheduler
+from recognition import CircuitBreaker, RecognitionEngine, default_backends
+from sphinx_decoder import SphinxDecoderPool
+from theory_index import TheoryAssistant
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,18 +37,108 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 class FaderPortEmulator:
-    def __init__(self):
+    def __init__(self, daw_only=False):
+        self.daw_only = daw_only
         self.audio_initialized = False
         self.midi_initialized = False
         self.transformer_initialized = False
+        self.transformer_loading = False
+        self.chatbot = None
+        self.inference = None
+        self.last_capture_timings = {}
+        self.theory = TheoryAssistant(cache_size=int(os.getenv('ANSWER_CACHE_SIZE', 256)),
+                                      threshold=float(os.getenv('THEORY_MIN_SCORE', 0.35)),
+                                      min_terms=int(os.getenv('THEORY_MIN_TERMS', 2)),
+                                      min_margin=float(os.getenv('THEORY_MIN_MARGIN', 0.15)))
+        self.midi_in = None
+        self.listener = None
+        self.command_server = None
+        self.osc = None
+        self.control_lock = threading.Lock()
+        self.setup_metrics()
         self.initialize_components()
         self.load_session_state()
-        self.chat_history = pd.DataFrame(columns=['user_input', 'bot_response', 'timestamp'])
+        self.start_midi_input()
+        self.chat_log = ChatLog(
+            'chat_history.json',
+            max_bytes=int(os.getenv('CHAT_LOG_MAX_BYTES', 5 * 1024 * 1024)),
+            window=int(os.getenv('CHAT_HISTORY_WINDOW', 50))
+        )
+
+    def setup_metrics(self):
+        """Stage timers and counters; component stats are read at scrape time"""
+        self.metrics = MetricsRegistry()
+        self.stage_seconds = self.metrics.histogram(
+            'faderport_stage_seconds', 'Time spent in each pipeline stage', ('stage',))
+        self.commands_total = self.metrics.counter(
+            'faderport_commands_total', 'Voice commands handled, by action kind', ('kind',))
+        self.recognitions_total = self.metrics.counter(
+            'faderport_recognitions_total', 'Recognition results, by backend that answered', ('backend',))
+        self.fallbacks_total = self.metrics.counter(
+            'faderport_recognition_fallbacks_total', 'Recognitions answered by a non-preferred backend')
+        self.chat_answers_total = self.metrics.counter(
+            'faderport_chat_answers_total', 'Music theory answers, by source (index, cache, model)', ('source',))
+        component_stats = [
+            ('faderport_midi_messages_sent_total', 'MIDI messages written to the port', 'counter',
+             lambda: self.midi_out and self.midi_out.stats['sent']),
+            ('faderport_midi_messages_coalesced_total', 'MIDI messages superseded before sending', 'counter',
+             lambda: self.midi_out and self.midi_out.stats['coalesced']),
+            ('faderport_midi_send_errors_total', 'MIDI port send failures', 'counter',
+             lambda: self.midi_out and self.midi_out.stats['errors']),
+            ('faderport_midi_input_applied_total', 'DAW feedback messages applied to state', 'counter',
+             lambda: self.midi_in and self.midi_in.stats['applied']),
+            ('faderport_state_save_requests_total', 'save_state calls', 'counter',
+             lambda: self.state_store.stats['save_requests']),
+            ('faderport_state_writes_total', 'Session state snapshot and journal writes', 'counter',
+             lambda: self.state_store.stats['snapshot_writes'] + self.state_store.stats['journal_writes']),
+            ('faderport_wake_words_total', 'Wake phrases spotted in hands-free mode', 'counter',
+             lambda: self.listener and self.listener.stats['wakes']),
+            ('faderport_hands_free_commands_total', 'Commands dispatched in hands-free mode', 'counter',
+             lambda: self.listener and self.listener.stats['commands']),
+            ('faderport_osc_messages_total', 'OSC messages received', 'counter',
+             lambda: self.osc and self.osc.stats['messages']),
+            ('faderport_osc_errors_total', 'OSC packets rejected or batches that failed', 'counter',
+             lambda: self.osc and self.osc.stats['errors']),
+            ('faderport_chat_queue_depth', 'Chat requests waiting for the model', 'gauge',
+             lambda: self.inference and self.inference.requests.qsize()),
+        ]
+        for name, help_text, kind, fn in component_stats:
+            self.metrics.callback(name, help_text, fn, kind)
+
+    def observe_stage(self, stage):
+        """Callable that records a duration for stage (for components that time themselves)"""
+        return lambda seconds: self.stage_seconds.observe(seconds, stage)
+
+    def start_metrics_server(self):
+        port = int(os.getenv('METRICS_PORT', 9464))
+        if not port:
+            return
+        try:
+            self.metrics.serve(port, host=os.getenv('METRICS_HOST', '127.0.0.1'))
+        except OSError as e:
+            logger.error(f"Metrics endpoint unavailable on port {port}: {e}")
+
+    def serve_osc(self, address):
+        """Take OSC from control surfaces on a UDP 'host:port'"""
+        self.osc = OscServer(self)
+        try:
+            self.osc.serve(address)
+        except OSError as e:
+            logger.error(f"OSC unavailable on {address}: {e}")
+            self.osc = None
+
+    def serve_commands(self, address=None, udp_address=None):
+        """Accept DAW commands on a local socket (and UDP if udp_address is set), for headless use"""
+        self.command_server = CommandServer(self)
+        self.command_server.serve(address or COMMAND_ADDRESS)
+        if udp_address:
+            self.command_server.serve_udp(udp_address)
 
     def initialize_components(self):
         """Initialize all components with error handling"""
         # Initialize PyAudio
         try:
+            import pyaudio
             self.p = pyaudio.PyAudio()
             self.audio_initialized = True
             logger.info("PyAudio initialized successfully")
@@ -40,13 +146,63 @@ class FaderPortEmulator:
             logger.error(f"PyAudio initialization failed: {e}")
             self.p = None
 
+        # Clean audio before recognition: trim silence, normalize, optional rumble filter
+        self.audio_cleaning = {
+            'trim': os.getenv('AUDIO_TRIM', 'true').lower() in ('1', 'true', 'yes'),
+            'normalize': os.getenv('AUDIO_NORMALIZE', 'true').lower() in ('1', 'true', 'yes'),
+            'highpass_hz': float(os.getenv('AUDIO_HIGHPASS_HZ', 0)),
+        }
+
+        # Initialize speech recognition: Google and Sphinx race within a latency budget
+        budget = float(os.getenv('RECOGNITION_BUDGET', 2.5))
+        # Imported here, like pyaudio and transformers, so importing app stays cheap
+        import speech_recognition as sr
+        self.recognizer = sr.Recognizer()
+        self.recognizer.operation_timeout = budget * 2
+
+        # Warm PocketSphinx decoders with the command grammar, loaded once
+        try:
+            self.sphinx = SphinxDecoderPool(size=int(os.getenv('SPHINX_DECODERS', 2)))
+        except Exception as e:
+            logger.error(f"Warm Sphinx decoder unavailable, using recognize_sphinx: {e}")
+            self.sphinx = None
+
+        google_breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('GOOGLE_FAILURE_THRESHOLD', 3)),
+            reset_timeout=float(os.getenv('GOOGLE_RETRY_SECONDS', 30))
+        )
+        self.recognition = RecognitionEngine(
+            default_backends(self.recognizer, sphinx=self.sphinx, breaker=google_breaker),
+            budget=budget
+        )
+        # Chat questions are free-form, so their Sphinx fallback must not be held to the command grammar
+        self.chat_recognition = RecognitionEngine(
+            default_backends(self.recognizer, breaker=google_breaker),
+            budget=budget
+        )
+
+        # Mixer size, and how tracks past the first bank of 16 are addressed on the wire
+        self.address_map = MidiAddressMap(
+            int(os.getenv('MIXER_TRACKS', 16)),
+            mode=os.getenv('MIDI_ADDRESSING', 'channel').lower(),
+            high_res=os.getenv('FADER_RESOLUTION', '7bit').lower() == '14bit'
+        )
+
+        # Timed fades for UI fader moves (seconds); read even without a MIDI port, the UI uses it
+        self.fader_glide = float(os.getenv('FADER_GLIDE_MS', 0)) / 1000
+
         # Initialize MIDI output
         try:
             # Try multiple common LoopMIDI port names
             port_names = ['LoopMIDI Port 1', 'LoopMIDI Port', 'loopMIDI Port 1']
             for port_name in port_names:
                 try:
-                    self.midi_out = mido.open_output(port_name)
+                    # All sends go through one coalescing, rate-limited sender thread
+                    self.midi_out = MidiOutputEngine(
+                        mido.open_output(port_name),
+                        max_rate=float(os.getenv('MIDI_MAX_RATE', 1000)),
+                        observe=self.observe_stage('midi_send')
+                    )
                     self.midi_initialized = True
                     logger.info(f"MIDI port '{port_name}' connected successfully")
                     break
@@ -54,12 +210,58 @@ class FaderPortEmulator:
                     continue
             if not self.midi_initialized:
                 raise Exception("No LoopMIDI ports found")
+            # Timed fades; 14-bit mode sends pitch-bend per channel like a real FaderPort
+            self.ramps = RampScheduler(
+                self.midi_out.send,
+                rate_hz=float(os.getenv('FADER_RAMP_RATE', 200)),
+                address_map=self.address_map,
+                on_step=self.on_ramp_step,
+                on_done=self.on_ramp_done
+            )
         except Exception as e:
             logger.error(f"MIDI initialization failed: {e}")
             self.midi_out = None
+            self.ramps = None
 
-        # Initialize Transformers
+    def start_midi_input(self):
+        """Listen for DAW feedback so session_state follows changes made in the DAW"""
+        if not self.midi_initialized:
+            return
+        port_names = [os.getenv('MIDI_INPUT_PORT', ''), self.midi_out.name,
+                      'LoopMIDI Port 1', 'LoopMIDI Port', 'loopMIDI Port 1']
+        for port_name in port_names:
+            if not port_name:
+                continue
+            try:
+                self.midi_in = MidiInputListener(
+                    mido.open_input(port_name),
+                    self.session_state,
+                    echo_filter=self.midi_out.is_echo,
+                    on_change=self.save_state,
+                    address_map=self.address_map,
+                    echo_window=float(os.getenv('MIDI_ECHO_WINDOW', 0.5)),
+                    state_lock=self.control_lock
+                )
+                logger.info(f"MIDI input '{port_name}' connected successfully")
+                return
+            except Exception:
+                continue
+        logger.warning("No MIDI input port found - DAW changes will not be reflected")
+
+    def start_model_warmup(self):
+        """Load the chat model on a background thread; the UI keeps serving meanwhile"""
+        if self.daw_only or self.transformer_initialized or self.transformer_loading:
+            return None
+        self.transformer_loading = True
+        thread = threading.Thread(target=self.load_chatbot, name='model-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def load_chatbot(self):
+        """Initialize Transformers (imports torch on first use)"""
         try:
+            from transformers import pipeline
+
             # Try multiple models for robustness
             models = [
                 "facebook/blenderbot-400M-distill",
@@ -76,48 +278,97 @@ class FaderPortEmulator:
                     continue
             if not self.transformer_initialized:
                 raise Exception("No suitable transformer models available")
+
+            # Serve generations from one worker that batches concurrent prompts
+            self.inference = InferenceService(
+                lambda prompts: [generated_text(r) for r in self.chatbot(prompts)],
+                max_queue=int(os.getenv('CHAT_QUEUE_SIZE', 64)),
+                max_batch=int(os.getenv('CHAT_MAX_BATCH', 8))
+            )
         except Exception as e:
             logger.error(f"Transformer initialization failed: {e}")
             self.chatbot = None
+        finally:
+            self.transformer_loading = False
+
+    def status_text(self):
+        """One-line component status for the UI"""
+        if self.transformer_initialized:
+            ai = '✅'
+        elif self.daw_only:
+            ai = 'off (DAW-only)'
+        elif self.transformer_loading:
+            ai = '⏳ loading'
+        else:
+            ai = '❌'
+        listening = ''
+        if self.listener:
+            listening = f" | Hands-free: {'👂 awake' if self.listener.awake else '👂'}"
+        return (f"Audio: {'✅' if self.audio_initialized else '❌'} | "
+                f"MIDI: {'✅' if self.midi_initialized else '❌'} | "
+                f"AI: {ai}{listening}")
 
     def load_session_state(self):
         """Load or create session state"""
-        if not os.path.exists('faderport_data.json'):
-            self.session_state = {
-                'tracks': [{'name': f'Track {i+1}', 'fader': 0.5, 'muted': False, 'solo': False}
-                          for i in range(16)],
-                'plugins': ['Blue Cat PatchWork'],
-                'transport': {'playing': False, 'recording': False},
-                'settings': {'audio_sample_rate': 44100, 'buffer_size': 512}
-            }
-            self.save_state()
-        else:
-            with open('faderport_data.json', 'r') as f:
-                self.session_state = json.load(f)
+        journal = os.getenv('STATE_JOURNAL', '').lower() in ('1', 'true', 'yes')
+        self.state_store = StateStore(
+            'faderport_data.json',
+            snapshot=lambda: dict(self.session_state, tracks=self.mixer.to_records()),
+            delay=float(os.getenv('STATE_SAVE_DELAY', 0.25)),
+            journal_path='faderport_data.journal' if journal else None,
+            observe=self.observe_stage('save_state')
+        )
+        self.session_state = self.state_store.load(lambda: {
+            'tracks': MixerState(self.address_map.track_count).to_records(),
+            'plugins': ['Blue Cat PatchWork'],
+            'transport': {'playing': False, 'recording': False},
+            'settings': {'audio_sample_rate': 44100, 'buffer_size': 512}
+        })
+        # Tracks live in arrays; session_state['tracks'][i]['fader'] still reads and writes them
+        track_count = self.address_map.track_count
+        self.mixer = MixerState.from_records(self.session_state['tracks'][:track_count], track_count)
+        self.session_state['tracks'] = self.mixer.tracks
+        # Only now can snapshot() run, so only now may the writer save what load() left pending
+        self.state_store.resume()
+
+    def save_state(self, path=None, value=None):
+        """Schedule a write-behind save; path/value name the changed field for the journal"""
+        self.state_store.save(path, value)
+
+    def on_ramp_step(self, track, value):
+        # Under control_lock, so a batch being applied or rolled back never interleaves with a step
+        with self.control_lock:
+            self.session_state['tracks'][track]['fader'] = value
+
+    def on_ramp_done(self, track, value):
+        self.save_state(('tracks', track, 'fader'), value)
+
+    def bank_slots(self, bank):
+        """Track index for each of the 16 on-screen strips in a bank (None past the last track)"""
+        tracks = self.mixer.bank_tracks(bank)
+        return list(tracks) + [None] * (BANK_SIZE - len(tracks))
+
+    def bank_label(self, bank):
+        tracks = self.mixer.bank_tracks(bank)
+        return f"**Bank {bank + 1}/{self.mixer.bank_count}** · Tracks {tracks.start + 1}-{tracks.stop}"
 
-    def save_state(self):
-        """Save session state to file"""
+    def save_chat(self, user_input, bot_response):
+        """Append one exchange to the chat log"""
         try:
-            with open('faderport_data.json', 'w') as f:
-                json.dump(self.session_state, f, indent=2)
+            self.chat_log.append(user_input, bot_response)
         except Exception as e:
-            logger.error(f"Failed to save state: {e}")
+            logger.error(f"Failed to save chat: {e}")
 
-    def save_chat(self, user_input, bot_response):
-        """Save chat history"""
+    def chat_history_page(self, page=0, page_size=20):
+        """Load one page of past chat history, newest first"""
         try:
-            new_row = pd.DataFrame({
-                'user_input': [user_input],
-                'bot_response': [bot_response],
-                'timestamp': [pd.Timestamp.now()]
-            })
-            self.chat_history = pd.concat([self.chat_history, new_row], ignore_index=True)
-            self.chat_history.to_json('chat_history.json', orient='records', lines=True)
+            return self.chat_log.page(page, page_size)
         except Exception as e:
-            logger.error(f"Failed to save chat: {e}")
+            logger.error(f"Failed to load chat history: {e}")
+            return []
 
-    def record_voice_gradio(self, audio_data):
-        """Process audio from Gradio component"""
+    def record_voice_gradio(self, audio_data, chat=False):
+        """Process audio from Gradio component (chat=True for free-form Music Theory Chat questions)"""
         if audio_data is None:
             return "No audio received"
 
@@ -126,44 +377,10 @@ class FaderPortEmulator:
             if isinstance(audio_data, tuple):
                 sample_rate, audio_array = audio_data
 
-                # Convert to appropriate format for speech recognition
-                import numpy as np
-
-                # Normalize audio
-                if audio_array.dtype != np.int16:
-                    audio_array = (audio_array * 32767).astype(np.int16)
-
-                # Save temporary WAV file
-                temp_filename = "temp_gradio_audio.wav"
-                with wave.open(temp_filename, 'wb') as wf:
-                    wf.setnchannels(1)  # Mono
-                    wf.setsampwidth(2)  # 16-bit
-                    wf.setframerate(sample_rate)
-                    wf.writeframes(audio_array.tobytes())
-
-                # Use speech recognition
-                r = sr.Recognizer()
-                with sr.AudioFile(temp_filename) as source:
-                    audio = r.record(source)
-
-                # Try Google first, fallback to Sphinx
-                try:
-                    text = r.recognize_google(audio).lower()
-                    logger.info(f"Google recognition: {text}")
-                except (sr.UnknownValueError, sr.RequestError):
-                    try:
-                        text = r.recognize_sphinx(audio).lower()
-                        logger.info(f"Sphinx recognition: {text}")
-                    except:
-                        text = "Could not understand audio"
-
-                # Clean up temp file
-                try:
-                    os.remove(temp_filename)
-                except:
-                    pass
-
-                return text
+                # Build AudioData in memory: dtype conversion, downmix, trim, resample, normalize
+                with self.stage_seconds.time('ingest'):
+                    audio = audio_data_from_array(sample_rate, audio_array, **self.audio_cleaning)
+                return self.recognize_audio(audio, chat)
             else:
                 return "Invalid audio format"
 
@@ -171,68 +388,156 @@ class FaderPortEmulator:
             logger.error(f"Audio processing error: {e}")
             return f"Audio processing error: {e}"
 
-    def record_voice_pyaudio(self):
-        """Fallback PyAudio recording method"""
+    def recognize_audio(self, audio, chat=False):
+        """Recognize sr.AudioData with the racing engine and return lowercase text"""
+        text = self.recognized_text(audio, chat)
+        return "Could not understand audio" if text is None else text
+
+    def recognized_text(self, audio, chat=False):
+        """Lowercase text for sr.AudioData, or None if no backend understood it
+
+        DAW commands fall back to the grammar-bound Sphinx pool, chat to free-form Sphinx.
+        """
+        engine = self.chat_recognition if chat else self.recognition
+        with self.stage_seconds.time('recognize'):
+            text, backend = engine.recognize(audio)
+        self.recognitions_total.inc(backend or 'none')
+        if backend and backend != engine.backends[0][0]:
+            self.fallbacks_total.inc()
+        if text is None:
+            return None
+        text = text.lower()
+        logger.info(f"{backend.capitalize()} recognition: {text}")
+        return text
+
+    def recognize_pcm(self, pcm, rate):
+        """Recognize 16-bit mono PCM (as captured by the hands-free listener); None if not understood"""
+        audio = audio_data_from_frames(pcm, rate, 2, target_rate=RECOGNIZER_SAMPLE_RATE, **self.audio_cleaning)
+        return self.recognized_text(audio)
+
+    def start_listening(self):
+        """Hands-free mode: keep the microphone open and act on commands after the wake phrase"""
+        if self.listener or not self.audio_initialized:
+            return self.listener is not None
+        wake_phrase = os.getenv('WAKE_PHRASE', 'hey fader')
+        rate = int(os.getenv('VAD_SAMPLE_RATE', 16000))
+        try:
+            spotter = KeywordSpotter(wake_phrase, threshold=float(os.getenv('WAKE_THRESHOLD', 1e-20)),
+                                     sample_rate=rate)
+
+            def spot(pcm):
+                with self.stage_seconds.time('keyword_spot'):
+                    return spotter(pcm)
+
+            self.listener = ContinuousListener(
+                self.p,
+                spotter=spot,
+                recognize=self.recognize_pcm,
+                on_command=self.daw_control,
+                wake_phrase=wake_phrase,
+                rate=rate,
+                silence_ms=int(os.getenv('VAD_SILENCE_MS', 400)),
+                window=float(os.getenv('WAKE_WINDOW', 5)),
+                observe=self.observe_stage('wake_to_midi')
+            )
+            self.listener.start()
+            return True
+        except Exception as e:
+            logger.error(f"Hands-free listening unavailable: {e}")
+            self.listener = None
+            return False
+
+    def stop_listening(self):
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+    def record_voice_pyaudio(self, streaming=True, chat=False):
+        """Fallback PyAudio recording method
+
+        With streaming=True the utterance ends on trailing silence detected by
+        the VAD instead of always recording RECORD_SECONDS. chat=True recognizes
+        a free-form chat question rather than a DAW command.
+        """
         if not self.audio_initialized:
             return "Audio system not initialized"
 
         CHUNK = 1024
-        FORMAT = pyaudio.paInt16
+        FORMAT = self.p.get_format_from_width(2)
         CHANNELS = 1
         RATE = 44100
-        RECORD_SECONDS = 5
-        WAVE_OUTPUT_FILENAME = "input.wav"
+        RECORD_SECONDS = int(os.getenv('RECORD_DURATION', 5))
 
         try:
-            stream = self.p.open(format=FORMAT, channels=CHANNELS, rate=RATE,
-                               input=True, frames_per_buffer=CHUNK)
-            frames = []
-
-            logger.info("Recording...")
-            for _ in range(0, int(RATE / CHUNK * RECORD_SECONDS)):
-                data = stream.read(CHUNK)
-                frames.append(data)
-
-            stream.stop_stream()
-            stream.close()
-
-            # Save audio file
-            wf = wave.open(WAVE_OUTPUT_FILENAME, 'wb')
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(self.p.get_sample_size(FORMAT))
-            wf.setframerate(RATE)
-            wf.writeframes(b''.join(frames))
-            wf.close()
-
-            # Speech recognition
-            r = sr.Recognizer()
-            with sr.AudioFile(WAVE_OUTPUT_FILENAME) as source:
-                audio = r.record(source)
-
-            try:
-                return r.recognize_google(audio).lower()
-            except (sr.UnknownValueError, sr.RequestError):
-                try:
-                    return r.recognize_sphinx(audio).lower()
-                except:
+            if streaming:
+                capture = StreamingCapture(
+                    self.p,
+                    rate=int(os.getenv('VAD_SAMPLE_RATE', 16000)),
+                    silence_ms=int(os.getenv('VAD_SILENCE_MS', 400)),
+                    max_speech_ms=RECORD_SECONDS * 1000 + 3000,
+                    no_speech_ms=RECORD_SECONDS * 1000
+                )
+                logger.info("Listening...")
+                pcm, RATE = capture.record_utterance()
+                if pcm is None:
                     return "Could not understand audio"
+                frames = [pcm]
+                self.last_capture_timings = capture.timings
+            else:
+                stream = self.p.open(format=FORMAT, channels=CHANNELS, rate=RATE,
+                                   input=True, frames_per_buffer=CHUNK)
+                frames = []
+
+                logger.info("Recording...")
+                for _ in range(0, int(RATE / CHUNK * RECORD_SECONDS)):
+                    data = stream.read(CHUNK)
+                    frames.append(data)
+
+                stream.stop_stream()
+                stream.close()
+
+            # Speech recognition straight from the captured frames
+            audio = audio_data_from_frames(frames, RATE, self.p.get_sample_size(FORMAT),
+                                           target_rate=RECOGNIZER_SAMPLE_RATE, **self.audio_cleaning)
+            return self.recognize_audio(audio, chat)
 
         except Exception as e:
             logger.error(f"PyAudio recording error: {e}")
             return f"Recording error: {e}"
 
     def music_theory_chat(self, voice_input):
-        """Handle music theory chat mode"""
-        if not self.transformer_initialized:
-            return "Chatbot not available - check transformer installation"
-
+        """Handle music theory chat mode: curated index and answer cache first, then the model"""
+        if self.daw_only:
+            return "Chatbot disabled - running in DAW-only mode"
         if voice_input.startswith("Error") or "could not understand" in voice_input.lower():
             return voice_input
 
+        # Common questions are answered without the model, even while it is still loading
+        with self.stage_seconds.time('retrieval'):
+            response, source = self.theory.lookup(voice_input)
+        if response is not None:
+            self.chat_answers_total.inc(source)
+            self.save_chat(voice_input, response)
+            return response
+
+        if self.transformer_loading:
+            return "Chatbot is still loading - try again in a moment"
+        if not self.transformer_initialized:
+            return "Chatbot not available - check transformer installation"
+
         try:
-            response = self.chatbot(voice_input)[0]['generated_text']
+            start = time.perf_counter()
+            response = self.inference.generate(voice_input, timeout=float(os.getenv('CHAT_TIMEOUT', 30)))
+            elapsed = time.perf_counter() - start
+            self.stage_seconds.observe(elapsed, 'inference')
+            self.theory.remember(voice_input, response, elapsed)
+            self.chat_answers_total.inc('model')
             self.save_chat(voice_input, response)
             return response
+        except QueueFullError:
+            return "Chatbot is busy - try again in a moment"
+        except FutureTimeoutError:
+            return "Chatbot timed out - try a shorter question"
         except Exception as e:
             logger.error(f"Chat error: {e}")
             return f"Chat processing error: {e}"
@@ -246,105 +551,225 @@ class FaderPortEmulator:
             return "MIDI not available - check LoopMIDI configuration"
 
         try:
-            # Transport controls
-            if "play" in voice_input:
-                self.midi_out.send(mido.Message('start'))
-                self.session_state['transport']['playing'] = True
-                self.save_state()
-                return "Transport: Playing"
-
-            elif "stop" in voice_input:
-                self.midi_out.send(mido.Message('stop'))
-                self.session_state['transport']['playing'] = False
-                self.save_state()
-                return "Transport: Stopped"
-
-            elif "record" in voice_input:
-                self.midi_out.send(mido.Message('control_change', control=95, value=127))
-                self.session_state['transport']['recording'] = True
-                self.save_state()
-                return "Transport: Recording"
-
-            # Track controls
-            elif "solo track" in voice_input:
-                try:
-                    track_num = int(voice_input.split("track")[-1].strip()) - 1
-                    if 0 <= track_num < 16:
-                        # Clear all solos first
-                        for i in range(16):
-                            self.session_state['tracks'][i]['solo'] = False
-                            self.midi_out.send(mido.Message('control_change', control=i + 32, value=0))
-
-                        # Solo selected track
-                        self.session_state['tracks'][track_num]['solo'] = True
-                        self.midi_out.send(mido.Message('control_change', control=track_num + 32, value=127))
-                        self.save_state()
-                        return f"Soloed Track {track_num + 1}"
-                    else:
-                        return "Invalid track number (1-16)"
-                except (ValueError, IndexError):
-                    return "Invalid solo command format"
-
-            elif "mute track" in voice_input:
-                try:
-                    track_num = int(voice_input.split("track")[-1].strip()) - 1
-                    if 0 <= track_num < 16:
-                        self.session_state['tracks'][track_num]['muted'] = True
-                        self.midi_out.send(mido.Message('control_change', control=track_num + 16, value=127))
-                        self.save_state()
-                        return f"Muted Track {track_num + 1}"
-                    else:
-                        return "Invalid track number (1-16)"
-                except (ValueError, IndexError):
-                    return "Invalid mute command format"
-
-            elif "unmute track" in voice_input:
-                try:
-                    track_num = int(voice_input.split("track")[-1].strip()) - 1
-                    if 0 <= track_num < 16:
-                        self.session_state['tracks'][track_num]['muted'] = False
-                        self.midi_out.send(mido.Message('control_change', control=track_num + 16, value=0))
-                        self.save_state()
-                        return f"Unmuted Track {track_num + 1}"
-                    else:
-                        return "Invalid track number (1-16)"
-                except (ValueError, IndexError):
-                    return "Invalid unmute command format"
-
-            elif "set fader" in voice_input or "fader" in voice_input:
-                try:
-                    parts = voice_input.split()
-                    track_idx = None
-                    value = None
-
-                    # Parse track number
-                    for i, part in enumerate(parts):
-                        if part.isdigit():
-                            if track_idx is None:
-                                track_idx = int(part) - 1
-                            else:
-                                value = int(part) / 100
-
-                    if track_idx is not None and value is not None and 0 <= track_idx < 16 and 0 <= value <= 1:
-                        self.session_state['tracks'][track_idx]['fader'] = value
-                        midi_value = int(value * 127)
-                        self.midi_out.send(mido.Message('control_change', control=track_idx, value=midi_value))
-                        self.save_state()
-                        return f"Set Track {track_idx + 1} fader to {int(value * 100)}%"
-                    else:
-                        return "Invalid fader command format. Try 'set fader 1 to 75'"
-                except (ValueError, IndexError):
-                    return "Invalid fader command format"
+            with self.stage_seconds.time('parse'):
+                actions = parse_commands(voice_input, self.mixer.track_count)
+        except CommandError as e:
+            self.commands_total.inc('invalid')
+            return str(e)
+        if not actions:
+            self.commands_total.inc('unrecognized')
+            return f"Command not recognized: '{voice_input}'. Try: {USAGE}"
+        return self.run_actions(actions)
+
+    def structured_control(self, command):
+        """Handle a structured command, or a list of them applied as one batch (see action_from_dict)"""
+        if not self.midi_initialized:
+            return "MIDI not available - check LoopMIDI configuration"
 
-            else:
-                return f"Command not recognized: '{voice_input}'. Try: play, stop, record, solo track [1-16], mute track [1-16], set fader [1-16] to [0-100]"
+        try:
+            with self.stage_seconds.time('parse'):
+                commands = command if isinstance(command, list) else [command]
+                actions = [action_from_dict(c, self.mixer.track_count) for c in commands]
+        except CommandError as e:
+            self.commands_total.inc('invalid')
+            return str(e)
+        if not actions:
+            self.commands_total.inc('unrecognized')
+            return "No commands given"
+        return self.run_actions(actions)
+
+    def run_actions(self, actions):
+        for action in actions:
+            self.commands_total.inc(action.kind)
+        # The UI, the hands-free listener and the command socket can all dispatch at once
+        with self.control_lock, self.stage_seconds.time('dispatch'):
+            return self.dispatch_actions(actions)
+
+    def apply_mixer_changes(self, changes, glide=0):
+        """Apply any number of track changes as one batch: one MIDI flush, one state write
+
+        Units are those of the command socket and action_from_dict: tracks are
+        1-based and fader values 0-100. changes is a list of
+        {'track': 1-N, 'fader': 0-100, 'muted': bool, 'solo': bool} with any
+        subset of the fields, or a dict of field dicts keyed by track number.
+        Values already in place are skipped. With glide, fader moves ramp over
+        that many seconds. Returns the whole mixer afterwards in the same units
+        (each record carries its track number), plus the batch's result line.
+        """
+        try:
+            result = self.mixer_changes_result(self.mixer_changes_from_api(changes), glide)
+        except CommandError as e:
+            result = str(e)
+        return {
+            'result': result,
+            'transport': dict(self.session_state['transport']),
+            'tracks': [dict(record, track=i + 1, fader=round(record['fader'] * 100, 2))
+                       for i, record in enumerate(self.mixer.to_records())],
+        }
+
+    def mixer_changes_from_api(self, changes):
+        """apply_mixer_changes input (1-based tracks, faders 0-100) -> 0-based tracks, faders 0.0-1.0"""
+        track_count = self.mixer.track_count
+        try:
+            if isinstance(changes, dict):
+                changes = [dict(fields, track=int(track)) for track, fields in changes.items()]
+        except (TypeError, ValueError):
+            raise CommandError(f"Invalid track number (1-{track_count})") from None
+        converted = []
+        for change in changes:
+            track = change.get('track') if isinstance(change, dict) else None
+            if isinstance(track, bool) or not isinstance(track, int) or not 1 <= track <= track_count:
+                raise CommandError(f"Invalid track number in {change!r} (1-{track_count})")
+            change = dict(change, track=track - 1)
+            if 'fader' in change:
+                value = change['fader']
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+                    raise CommandError(f"Invalid fader value for track {track} (0-100)")
+                change['fader'] = value / 100
+            converted.append(change)
+        return converted
+
+    def mixer_changes_result(self, changes, glide):
+        """Dispatch changes in mixer units (0-based tracks, faders 0.0-1.0), as the UI strips hold them"""
+        if not self.midi_initialized:
+            return "MIDI not available - check LoopMIDI configuration"
 
+        actions = []
+        for change in changes:
+            track = change.get('track') if isinstance(change, dict) else None
+            if isinstance(track, bool) or not isinstance(track, int) or not 0 <= track < self.mixer.track_count:
+                return f"Invalid track index in {change!r} (0-{self.mixer.track_count - 1})"
+            for field, value in change.items():
+                if field == 'track':
+                    continue
+                if field == 'fader':
+                    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1:
+                        return f"Invalid fader value for track {track + 1} (0.0-1.0)"
+                    if abs(self.mixer.get('fader', track) - value) > 1e-9:
+                        actions.append(Action('fade', track, float(value), glide) if glide > 0
+                                       else Action('fader', track, float(value)))
+                elif field in ('muted', 'solo'):
+                    if bool(value) != self.mixer.get(field, track):
+                        actions.append(Action('mute' if value else 'unmute', track, None) if field == 'muted'
+                                       else Action('solo', track, bool(value)))
+                else:
+                    return f"Unknown mixer field '{field}' (fader, muted, solo)"
+        if not actions:
+            return "No changes"
+        with self.control_lock, self.stage_seconds.time('dispatch'):
+            return self.dispatch_actions(actions)
+
+    def dispatch_actions(self, actions):
+        """Apply a batch of Actions to session state, then send its MIDI in one flush and save once
+
+        State changes are made first and rolled back together if any action
+        fails, so a batch is never half-applied. MIDI, fade cancels, new fades
+        and the save only happen once the whole batch has gone through.
+        """
+        # ramps maps track -> fade, so a later move on the track in the same batch can drop it
+        batch = {'midi': [], 'ramps': {}, 'cancels': set(), 'cancel_all': False, 'changes': []}
+        mixer_before = self.mixer.snapshot()
+        transport_before = dict(self.session_state['transport'])
+        try:
+            results = [self.apply_action(action, batch) for action in actions]
         except Exception as e:
+            self.mixer.restore(mixer_before)
+            self.session_state['transport'].update(transport_before)
             logger.error(f"DAW control error: {e}")
             return f"DAW control error: {e}"
 
+        if batch['cancel_all']:
+            self.ramps.cancel_all()
+        for track in batch['cancels']:
+            self.ramps.cancel(track)
+        for ramp in batch['ramps'].values():
+            self.ramps.start_ramp(*ramp)
+        self.midi_out.send_many(batch['midi'])
+        self.state_store.save_many(batch['changes'])
+        return results[0] if len(results) == 1 else f"{len(results)} commands: " + "; ".join(results)
+
+    def apply_action(self, action, batch):
+        """Update session state for one Action and queue its MIDI, ramps and journal entries on batch"""
+        midi, changes = batch['midi'], batch['changes']
+        transport = self.session_state['transport']
+
+        # Transport controls
+        if action.kind == 'play':
+            midi.append(mido.Message('start'))
+            transport['playing'] = True
+            changes.append((('transport', 'playing'), True))
+            return "Transport: Playing"
+
+        elif action.kind == 'stop':
+            midi.append(mido.Message('stop'))
+            transport['playing'] = False
+            changes.append((('transport', 'playing'), False))
+            return "Transport: Stopped"
+
+        elif action.kind == 'record':
+            midi.append(mido.Message('control_change', control=95, value=127))
+            transport['recording'] = True
+            changes.append((('transport', 'recording'), True))
+            return "Transport: Recording"
+
+        # Track controls
+        elif action.kind == 'solo' and action.value is not None:
+            # An explicit on/off (OSC, a solo button) sets this track alone, like the UI toggle
+            soloed = bool(action.value)
+            self.mixer.set('solo', action.track, soloed)
+            midi.append(self.address_map.encode('solo', action.track, soloed))
+            changes.append((('tracks', action.track, 'solo'), soloed))
+            return f"{'Soloed' if soloed else 'Unsoloed'} Track {action.track + 1}"
+
+        elif action.kind == 'solo':
+            # Clear the other solos; only tracks whose solo changed are sent
+            for i in self.mixer.solo_exclusive(action.track).tolist():
+                midi.append(self.address_map.encode('solo', i, i == action.track))
+            changes.append((None, None))
+            return f"Soloed Track {action.track + 1}"
+
+        elif action.kind in ('mute', 'unmute'):
+            muted = action.kind == 'mute'
+            if action.last is None:
+                self.mixer.set('muted', action.track, muted)
+                midi.append(self.address_map.encode('muted', action.track, muted))
+                changes.append((('tracks', action.track, 'muted'), muted))
+                return f"{'Muted' if muted else 'Unmuted'} Track {action.track + 1}"
+            changed = self.mixer.set_range('muted', action.track, action.last, muted).tolist()
+            midi.extend(self.address_map.encode('muted', i, muted) for i in changed)
+            changes.append((None, None))
+            return (f"{'Muted' if muted else 'Unmuted'} Tracks {action.track + 1}-{action.last + 1} "
+                    f"({len(changed)} changed)")
+
+        elif action.kind == 'fader':
+            # A direct move stops any fade running on the track, or queued earlier in this batch
+            batch['ramps'].pop(action.track, None)
+            batch['cancels'].add(action.track)
+            self.mixer.set('fader', action.track, action.value)
+            midi.append(self.address_map.encode('fader', action.track, action.value))
+            changes.append((('tracks', action.track, 'fader'), action.value))
+            return f"Set Track {action.track + 1} fader to {int(round(action.value * 100))}%"
+
+        elif action.kind == 'fade':
+            start = self.mixer.get('fader', action.track)
+            batch['ramps'][action.track] = (action.track, start, action.value, action.duration)
+            return (f"Fading Track {action.track + 1} to {int(round(action.value * 100))}% "
+                    f"over {action.duration:g}s")
+
+        elif action.kind == 'reset':
+            batch['ramps'].clear()
+            batch['cancel_all'] = True
+            changed = self.mixer.reset_faders(DEFAULT_FADER).tolist()
+            midi.extend(self.address_map.encode('fader', i, DEFAULT_FADER) for i in changed)
+            changes.append((None, None))
+            return f"Reset {len(changed)} faders to {int(round(DEFAULT_FADER * 100))}%"
+
+        raise ValueError(f"Unknown action '{action.kind}'")
+
     def create_interface(self):
         """Create the Gradio interface"""
+        import gradio as gr
+
         with gr.Blocks(title="FaderPort 16 Emulator", theme=gr.themes.Soft()) as demo:
             gr.Markdown("# FaderPort 16 Emulator with AI Voice Control")
             gr.Markdown("### Two-mode voice controller: Music Theory Chat + DAW Control")
@@ -352,11 +777,18 @@ class FaderPortEmulator:
             with gr.Row():
                 with gr.Column(scale=1):
                     mode = gr.Radio(
-                        ["Music Theory Chat", "DAW Control"],
+                        ["DAW Control"] if self.daw_only else ["Music Theory Chat", "DAW Control"],
                         label="Control Mode",
                         value="DAW Control"
                     )
 
+                    # Server-side microphone, always on; commands follow the wake phrase
+                    hands_free = gr.Checkbox(
+                        value=self.listener is not None,
+                        label=f"Hands-free listening (say \"{os.getenv('WAKE_PHRASE', 'hey fader')}\")",
+                        visible=self.audio_initialized
+                    )
+
                     # Audio input with iOS compatibility
                     audio_input = gr.Audio(
                         label="Voice Input",
@@ -389,13 +821,21 @@ class FaderPortEmulator:
                             interactive=False
                         )
 
-                    # Track controls in 4x4 grid
+                    # One bank of 16 tracks in a 4x4 grid, like the hardware's fader page
+                    bank = gr.State(0)
+                    with gr.Row(visible=self.mixer.bank_count > 1):
+                        prev_bank_btn = gr.Button("◀ Bank")
+                        bank_label = gr.Markdown(self.bank_label(0))
+                        next_bank_btn = gr.Button("Bank ▶")
+
                     track_components = []
                     for row in range(4):
                         with gr.Row():
                             for col in range(4):
-                                track_idx = row * 4 + col
-                                with gr.Column():
+                                slot = row * 4 + col
+                                visible = slot < self.mixer.track_count
+                                track_idx = slot if visible else 0
+                                with gr.Column(visible=visible) as track_column:
                                     track_name = gr.Textbox(
                                         label=f"Track {track_idx + 1}",
                                         value=self.session_state['tracks'][track_idx]['name'],
@@ -420,30 +860,111 @@ class FaderPortEmulator:
                                         )
 
                                     track_components.append({
+                                        'column': track_column,
                                         'name': track_name,
                                         'fader': fader,
                                         'mute': mute_btn,
                                         'solo': solo_btn,
-                                        'index': track_idx
+                                        'slot': slot
                                     })
 
             # System status
             with gr.Row():
                 system_status = gr.Textbox(
                     label="System Status",
-                    value=f"Audio: {'✅' if self.audio_initialized else '❌'} | "
-                          f"MIDI: {'✅' if self.midi_initialized else '❌'} | "
-                          f"AI: {'✅' if self.transformer_initialized else '❌'}",
+                    value=self.status_text(),
                     interactive=False
                 )
 
+            # Flip the AI status once the background model load finishes
+            status_timer = gr.Timer(2.0)
+            status_timer.tick(self.status_text, outputs=[system_status], show_progress="hidden")
+
+            def toggle_hands_free(enabled):
+                if enabled:
+                    enabled = self.start_listening()
+                else:
+                    self.stop_listening()
+                return enabled, self.status_text()
+
+            hands_free.input(toggle_hands_free, inputs=[hands_free], outputs=[hands_free, system_status])
+
+            # Fader, mute and solo of every strip, in strip order; shown holds the values this
+            # browser session last displayed, so an event can tell what the user changed
+            control_fields = (('fader', 'fader'), ('muted', 'mute'), ('solo', 'solo'))
+            control_outputs = [
+                track_comp[component] for track_comp in track_components for _, component in control_fields
+            ]
+            shown = gr.State([component.value for component in control_outputs])
+
+            def strip_controls(bank_idx):
+                """(track index or None, field) for each of control_outputs in this bank"""
+                return [(idx, field) for idx in self.bank_slots(bank_idx) for field, _ in control_fields]
+
+            # Push DAW-side changes to the controls in batches, not once per MIDI message
+            if self.midi_in:
+                midi_version = gr.State(0)
+
+                def refresh_controls(seen_version, bank_idx, shown_values):
+                    version, changed = self.midi_in.changed_since(seen_version)
+                    changed = set(changed)
+                    tracks = self.session_state['tracks']
+                    updates = []
+                    shown_values = list(shown_values)
+                    for i, (idx, field) in enumerate(strip_controls(bank_idx)):
+                        if idx is not None and ('tracks', idx, field) in changed:
+                            shown_values[i] = tracks[idx][field]
+                            updates.append(gr.update(value=shown_values[i]))
+                        else:
+                            updates.append(gr.update())
+                    transport_update = gr.update()
+                    if ('transport', 'playing') in changed:
+                        playing = self.session_state['transport']['playing']
+                        transport_update = gr.update(value="Playing" if playing else "Stopped")
+                    return [version, shown_values, transport_update] + updates
+
+                midi_timer = gr.Timer(float(os.getenv('MIDI_UI_REFRESH', 0.5)))
+                midi_timer.tick(
+                    refresh_controls,
+                    inputs=[midi_version, bank, shown],
+                    outputs=[midi_version, shown, transport_status] + control_outputs,
+                    show_progress="hidden"
+                )
+
+            bank_outputs = [bank, bank_label, shown] + [
+                track_comp[component] for track_comp in track_components
+                for component in ('column', 'name', 'fader', 'mute', 'solo')
+            ]
+
+            def switch_bank(bank_idx, step, shown_values):
+                """Point the 16 on-screen strips at another bank of tracks"""
+                bank_idx = (bank_idx + step) % self.mixer.bank_count
+                tracks = self.session_state['tracks']
+                updates = []
+                shown_values = list(shown_values)
+                for slot, idx in enumerate(self.bank_slots(bank_idx)):
+                    if idx is None:
+                        updates += [gr.update(visible=False)] + [gr.update()] * 4
+                        continue
+                    track = tracks[idx]
+                    values = [track[field] for field, _ in control_fields]
+                    shown_values[slot * 3:slot * 3 + 3] = values
+                    updates += [
+                        gr.update(visible=True),
+                        gr.update(label=f"Track {idx + 1}", value=track['name']),
+                    ] + [gr.update(value=value) for value in values]
+                return [bank_idx, self.bank_label(bank_idx), shown_values] + updates
+
+            prev_bank_btn.click(lambda b, v: switch_bank(b, -1, v), inputs=[bank, shown], outputs=bank_outputs)
+            next_bank_btn.click(lambda b, v: switch_bank(b, 1, v), inputs=[bank, shown], outputs=bank_outputs)
+
             def process_voice_command(audio_data, mode_selection):
                 """Process voice command based on mode"""
                 if audio_data is None:
                     return "No audio received", "Please record some audio first"
 
                 # Process audio to text
-                voice_text = self.record_voice_gradio(audio_data)
+                voice_text = self.record_voice_gradio(audio_data, chat=mode_selection == "Music Theory Chat")
 
                 # Generate response based on mode
                 if mode_selection == "Music Theory Chat":
@@ -453,40 +974,6 @@ class FaderPortEmulator:
 
                 return voice_text, response
 
-            def update_fader(track_idx, value):
-                """Update fader value"""
-                if self.midi_initialized:
-                    self.session_state['tracks'][track_idx]['fader'] = value
-                    midi_value = int(value * 127)
-                    try:
-                        self.midi_out.send(mido.Message('control_change', control=track_idx, value=midi_value))
-                        self.save_state()
-                    except Exception as e:
-                        logger.error(f"MIDI fader update failed: {e}")
-                return value
-
-            def update_mute(track_idx, muted):
-                """Update mute status"""
-                if self.midi_initialized:
-                    self.session_state['tracks'][track_idx]['muted'] = muted
-                    try:
-                        self.midi_out.send(mido.Message('control_change', control=track_idx + 16, value=127 if muted else 0))
-                        self.save_state()
-                    except Exception as e:
-                        logger.error(f"MIDI mute update failed: {e}")
-                return muted
-
-            def update_solo(track_idx, soloed):
-                """Update solo status"""
-                if self.midi_initialized:
-                    self.session_state['tracks'][track_idx]['solo'] = soloed
-                    try:
-                        self.midi_out.send(mido.Message('control_change', control=track_idx + 32, value=127 if soloed else 0))
-                        self.save_state()
-                    except Exception as e:
-                        logger.error(f"MIDI solo update failed: {e}")
-                return soloed
-
             # Event handlers
             audio_input.change(
                 process_voice_command,
@@ -494,33 +981,83 @@ class FaderPortEmulator:
                 outputs=[voice_text, response]
             )
 
-            # Bind track control events
-            for track_comp in track_components:
-                track_comp['fader'].change(
-                    lambda val, idx=track_comp['index']: update_fader(idx, val),
-                    inputs=[track_comp['fader']],
-                    outputs=[track_comp['fader']]
-                )
+            def apply_strip_controls(bank_idx, shown_values, *values):
+                """Apply whatever the user changed on any strip since the last call, as one batch"""
+                changes = []
+                for i, (idx, field) in enumerate(strip_controls(bank_idx)):
+                    if idx is not None and values[i] != shown_values[i]:
+                        changes.append({'track': idx, field: values[i]})
+                if changes:
+                    self.mixer_changes_result(changes, self.fader_glide)
+                return list(values)
+
+            # One endpoint for all 48 strip controls (.input fires on user edits only, so
+            # refreshes from DAW feedback are not sent back out as MIDI). always_last keeps one
+            # request in flight per browser: events during a drag collapse into the next call,
+            # which carries every control's current value, so no edit is lost.
+            gr.on(
+                triggers=[component.input for component in control_outputs],
+                fn=apply_strip_controls,
+                inputs=[bank, shown] + control_outputs,
+                outputs=[shown],
+                trigger_mode="always_last",
+                show_progress="hidden",
+                api_name=False
+            )
 
-                track_comp['mute'].change(
-                    lambda val, idx=track_comp['index']: update_mute(idx, val),
-                    inputs=[track_comp['mute']],
-                    outputs=[track_comp['mute']]
-                )
+            # The same batch for scripts and other clients:
+            #   Client(url).predict([{"track": 1, "fader": 80, "muted": True}], api_name="/apply_mixer_changes")
+            mixer_changes = gr.JSON(visible=False)
+            mixer_state = gr.JSON(visible=False)
+            mixer_changes.change(
+                lambda changes: self.apply_mixer_changes(changes or []),
+                inputs=[mixer_changes],
+                outputs=[mixer_state],
+                api_name="apply_mixer_changes"
+            )
 
-                track_comp['solo'].change(
-                    lambda val, idx=track_comp['index']: update_solo(idx, val),
-                    inputs=[track_comp['solo']],
-                    outputs=[track_comp['solo']]
+            # Chat history, read from the log one page at a time on request
+            with gr.Accordion("Chat History", open=False):
+                history_page = gr.State(0)
+                history_table = gr.Dataframe(
+                    headers=["Time", "You", "Assistant"],
+                    interactive=False,
+                    wrap=True
                 )
+                with gr.Row():
+                    newer_btn = gr.Button("Newer")
+                    older_btn = gr.Button("Older")
+
+            def show_history(page):
+                """Show a page of chat history, staying put past the oldest page"""
+                page = max(page, 0)
+                records = self.chat_history_page(page)
+                if not records and page > 0:
+                    page -= 1
+                    records = self.chat_history_page(page)
+                rows = [[r.get('timestamp'), r.get('user_input'), r.get('bot_response')] for r in records]
+                return page, rows
+
+            older_btn.click(lambda page: show_history(page + 1), inputs=[history_page],
+                            outputs=[history_page, history_table])
+            newer_btn.click(lambda page: show_history(page - 1), inputs=[history_page],
+                            outputs=[history_page, history_table])
+
+            # Live metrics; the same data is served on METRICS_PORT for Prometheus
+            with gr.Accordion("Metrics", open=False):
+                metrics_view = gr.JSON(label="Stage timings and counters")
+                metrics_btn = gr.Button("Refresh")
+            metrics_btn.click(self.metrics.as_dict, outputs=[metrics_view])
 
             # Add help section
             with gr.Accordion("Voice Commands Help", open=False):
                 gr.Markdown("""
                 ### DAW Control Commands:
                 - **Transport**: "play", "stop", "record"
-                - **Track Control**: "solo track 1", "mute track 2", "unmute track 3"
-                - **Fader Control**: "set fader 1 to 75", "fader 3 to 50"
+                - **Track Control**: "solo track 1", "mute track 2", "unmute track 3", "mute tracks 1 through 8", "unmute all"
+                - **Fader Control**: "set fader 1 to 75", "fader 3 to 50", "reset all faders"
+                - **Fades**: "fade track 3 to 20 over 4 seconds", "set fader 1 to 75 over 2 seconds"
+                - **Chaining**: "mute tracks 1 through 8 and solo 3 and set fader 5 to 60"
 
                 ### Music Theory Chat:
                 - Switch to "Music Theory Chat" mode
@@ -538,16 +1075,80 @@ class FaderPortEmulator:
     def cleanup(self):
         """Cleanup resources"""
         try:
+            if self.command_server:
+                self.command_server.shutdown()
+            if self.osc:
+                self.osc.shutdown()
+            self.stop_listening()
+            if self.midi_in:
+                self.midi_in.close()
+            if self.ramps:
+                self.ramps.shutdown()
             if self.midi_out:
                 self.midi_out.close()
             if self.p:
                 self.p.terminate()
+            self.recognition.shutdown()
+            self.chat_recognition.shutdown()
+            if self.inference:
+                self.inference.shutdown()
         except Exception as e:
             logger.error(f"Cleanup error: {e}")
+        try:
+            self.chat_log.close()
+            self.state_store.close()
+        except Exception as e:
+            logger.error(f"Failed to flush state on shutdown: {e}")
+        try:
+            self.metrics.shutdown()
+            if os.getenv('METRICS_DUMP'):
+                self.metrics.dump_json(os.getenv('METRICS_DUMP'))
+        except Exception as e:
+            logger.error(f"Failed to write metrics: {e}")
 
 # Initialize and run the application
 if __name__ == "__main__":
-    app = FaderPortEmulator()
+    parser = argparse.ArgumentParser(description="FaderPort 16 Emulator")
+    parser.add_argument("--daw-only", action="store_true",
+                        default=os.getenv('FADERPORT_MODE', '').lower() == 'daw',
+                        help="DAW control only: never load transformers/torch")
+    parser.add_argument("--listen", action="store_true",
+                        default=os.getenv('HANDS_FREE', '').lower() in ('1', 'true', 'yes'),
+                        help="hands-free: listen continuously for the wake phrase")
+    parser.add_argument("--headless", action="store_true",
+                        help="no UI or chat model: take DAW commands on a local socket (implies --daw-only)")
+    parser.add_argument("--socket", default=os.getenv('COMMAND_SOCKET') or COMMAND_ADDRESS,
+                        help="headless command socket: Unix socket path or host:port")
+    parser.add_argument("--udp", default=os.getenv('COMMAND_UDP') or None,
+                        help="headless: also take one command per datagram on host:port")
+    parser.add_argument("--osc", default=os.getenv('OSC_LISTEN') or None,
+                        help="take OSC from control surfaces on UDP host:port (e.g. 0.0.0.0:9000)")
+    args = parser.parse_args()
+
+    if args.headless:
+        # SIGTERM from a service manager shuts down as cleanly as Ctrl+C
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        app = FaderPortEmulator(daw_only=True)
+        try:
+            app.start_metrics_server()
+            app.serve_commands(args.socket, args.udp)
+            if args.osc:
+                app.serve_osc(args.osc)
+            if args.listen:
+                app.start_listening()
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("\nShutting down...")
+        finally:
+            app.cleanup()
+        sys.exit(0)
+
+    app = FaderPortEmulator(daw_only=args.daw_only)
+    if args.listen:
+        app.start_listening()
+    if args.osc:
+        app.serve_osc(args.osc)
     demo = app.create_interface()
 
     try:
@@ -556,8 +1157,13 @@ if __name__ == "__main__":
             server_port=7860,
             share=False,
             show_error=True,
-            quiet=False
+            quiet=False,
+            prevent_thread_lock=True
         )
+        app.start_metrics_server()
+        # Load the chat model only once the UI is already serving
+        app.start_model_warmup()
+        demo.block_thread()
     except KeyboardInterrupt:
         print("\nShutting down...")
     finally:
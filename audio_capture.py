@@ -0,0 +1,211 @@
+# audio_capture.py - Streaming voice capture with voice activity detection
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# PyAudio constants, mirrored so this module imports without PortAudio present
+PA_INT16 = 8
+PA_CONTINUE = 0
+PA_COMPLETE = 1
+
+
+class RingBuffer:
+    """Fixed-capacity int16 sample buffer addressed by absolute sample index"""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.buffer = np.zeros(self.capacity, dtype=np.int16)
+        self.total_written = 0
+
+    def extend(self, samples):
+        """Append samples, overwriting the oldest audio when full"""
+        n = len(samples)
+        if n == 0:
+            return
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+            self.total_written += n - self.capacity
+            n = self.capacity
+        start = self.total_written % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            self.buffer[start:end] = samples
+        else:
+            split = self.capacity - start
+            self.buffer[start:] = samples[:split]
+            self.buffer[:end - self.capacity] = samples[split:]
+        self.total_written += n
+
+    def oldest_index(self):
+        """Absolute index of the oldest sample still held"""
+        return max(0, self.total_written - self.capacity)
+
+    def read_from(self, index):
+        """Return a contiguous copy of all samples from an absolute index onwards"""
+        index = max(index, self.oldest_index())
+        n = self.total_written - index
+        if n <= 0:
+            return np.zeros(0, dtype=np.int16)
+        start = index % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            return self.buffer[start:end].copy()
+        return np.concatenate((self.buffer[start:], self.buffer[:end - self.capacity]))
+
+    def clear(self):
+        self.total_written = 0
+
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing rate voice activity detector with an adaptive noise floor"""
+
+    def __init__(self, energy_ratio=3.0, min_energy=300.0, zcr_range=(0.01, 0.35), noise_alpha=0.05):
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.zcr_low, self.zcr_high = zcr_range
+        self.noise_alpha = noise_alpha
+        self.noise_floor = None
+
+    @staticmethod
+    def frame_features(frame):
+        """Return (rms, zero crossing rate) for one int16 frame"""
+        x = frame.astype(np.float32)
+        rms = float(np.sqrt(np.mean(x * x))) if len(x) else 0.0
+        signs = np.signbit(x)
+        zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / max(len(x) - 1, 1)
+        return rms, zcr
+
+    def threshold(self):
+        if self.noise_floor is None:
+            return self.min_energy
+        return max(self.min_energy, self.noise_floor * self.energy_ratio)
+
+    def is_speech(self, frame):
+        """Classify a frame and adapt the noise floor on non-speech frames"""
+        rms, zcr = self.frame_features(frame)
+        threshold = self.threshold()
+        # Loud frames count as speech regardless of ZCR so plosives and fricatives are kept
+        speech = rms > threshold and (self.zcr_low <= zcr <= self.zcr_high or rms > threshold * 3)
+        if not speech:
+            if self.noise_floor is None:
+                self.noise_floor = rms
+            else:
+                self.noise_floor += self.noise_alpha * (rms - self.noise_floor)
+        return speech
+
+
+class UtteranceEndpointer:
+    """Frame-by-frame state machine that finds the start and end of one utterance"""
+
+    def __init__(self, frame_ms, onset_ms=60, silence_ms=400, max_speech_ms=8000, no_speech_ms=5000):
+        self.frame_ms = frame_ms
+        self.onset_frames = max(1, int(onset_ms / frame_ms))
+        self.silence_frames = max(1, int(silence_ms / frame_ms))
+        self.max_frames = max(1, int(max_speech_ms / frame_ms))
+        self.no_speech_frames = max(1, int(no_speech_ms / frame_ms))
+        self.reset()
+
+    def reset(self):
+        self.frames_seen = 0
+        self.speech_run = 0
+        self.silence_run = 0
+        self.speech_frames = 0
+        self.started = False
+        self.start_frame = None
+        self.last_speech_frame = None
+        self.result = None
+
+    def update(self, speech):
+        """Feed one VAD decision; returns None while listening, else 'speech' or 'timeout'"""
+        frame = self.frames_seen
+        self.frames_seen += 1
+        if not self.started:
+            self.speech_run = self.speech_run + 1 if speech else 0
+            if self.speech_run >= self.onset_frames:
+                self.started = True
+                self.start_frame = frame - self.speech_run + 1
+                self.last_speech_frame = frame
+            elif self.frames_seen >= self.no_speech_frames:
+                self.result = 'timeout'
+            return self.result
+
+        self.speech_frames += 1
+        if speech:
+            self.silence_run = 0
+            self.last_speech_frame = frame
+        else:
+            self.silence_run += 1
+        if self.silence_run >= self.silence_frames or self.speech_frames >= self.max_frames:
+            self.result = 'speech'
+        return self.result
+
+
+class StreamingCapture:
+    """Capture one utterance from a PyAudio callback stream, ending on trailing silence"""
+
+    def __init__(self, p, rate=16000, frame_ms=20, silence_ms=400, preroll_ms=200,
+                 max_speech_ms=8000, no_speech_ms=5000, input_device_index=None):
+        self.p = p
+        self.rate = rate
+        self.frame_ms = frame_ms
+        self.frame_samples = int(rate * frame_ms / 1000)
+        self.preroll_samples = int(rate * preroll_ms / 1000)
+        self.input_device_index = input_device_index
+        self.vad = VoiceActivityDetector()
+        self.endpointer = UtteranceEndpointer(frame_ms, silence_ms=silence_ms,
+                                              max_speech_ms=max_speech_ms, no_speech_ms=no_speech_ms)
+        capacity = int(rate * (max_speech_ms + preroll_ms + silence_ms) / 1000) + self.frame_samples
+        self.ring = RingBuffer(capacity)
+        self.done = threading.Event()
+        self.timings = {}
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """PyAudio callback: runs on the PortAudio thread for every frame"""
+        samples = np.frombuffer(in_data, dtype=np.int16)
+        self.ring.extend(samples)
+        result = self.endpointer.update(self.vad.is_speech(samples))
+        if result is None:
+            return (None, PA_CONTINUE)
+        now = time.perf_counter()
+        trailing = self.endpointer.frames_seen - 1 - (self.endpointer.last_speech_frame or 0)
+        self.timings['endpoint'] = now
+        # The speaker actually stopped when the trailing silence began
+        self.timings['end_of_speech'] = now - trailing * self.frame_ms / 1000
+        self.done.set()
+        return (None, PA_COMPLETE)
+
+    def record_utterance(self, timeout=None):
+        """Block until an utterance ends; returns (pcm_bytes, sample_rate) or (None, rate) if none"""
+        self.ring.clear()
+        self.endpointer.reset()
+        self.done.clear()
+        self.timings = {'start': time.perf_counter()}
+
+        stream = self.p.open(format=PA_INT16, channels=1, rate=self.rate, input=True,
+                             frames_per_buffer=self.frame_samples,
+                             input_device_index=self.input_device_index,
+                             stream_callback=self._callback)
+        try:
+            stream.start_stream()
+            if timeout is None:
+                timeout = (self.endpointer.no_speech_frames + self.endpointer.max_frames +
+                           self.endpointer.silence_frames) * self.frame_ms / 1000 + 1.0
+            if not self.done.wait(timeout):
+                logger.warning("Streaming capture timed out without an endpoint")
+                return None, self.rate
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+        if self.endpointer.result != 'speech':
+            return None, self.rate
+
+        start_sample = self.endpointer.start_frame * self.frame_samples - self.preroll_samples
+        end_sample = (self.endpointer.last_speech_frame + 1) * self.frame_samples + self.preroll_samples
+        samples = self.ring.read_from(max(start_sample, 0))[:end_sample - max(start_sample, 0)]
+        logger.info(f"Captured utterance: {len(samples) / self.rate:.2f}s")
+        return samples.tobytes(), self.rate
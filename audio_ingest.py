@@ -0,0 +1,164 @@
+# audio_ingest.py - Build speech_recognition AudioData straight from in-memory audio
+import numpy as np
+
+# Rate the recognizers work at natively (PocketSphinx requires 16 kHz)
+RECOGNIZER_SAMPLE_RATE = 16000
+
+
+def to_int16(array):
+    """Convert any Gradio/NumPy sample dtype to int16 PCM"""
+    array = np.asarray(array)
+    if array.dtype == np.int16:
+        return array
+    if np.issubdtype(array.dtype, np.floating):
+        return (np.clip(array, -1.0, 1.0) * 32767).astype(np.int16)
+    if array.dtype == np.uint8:
+        return ((array.astype(np.int16) - 128) << 8).astype(np.int16)
+    if array.dtype == np.int32:
+        return (array >> 16).astype(np.int16)
+    if array.dtype == np.int64:
+        return (array >> 48).astype(np.int16)
+    raise ValueError(f"Unsupported audio dtype: {array.dtype}")
+
+
+def downmix(array):
+    """Average channels to mono; accepts (samples,) or (samples, channels) arrays"""
+    if array.ndim == 1:
+        return array
+    if array.ndim != 2:
+        raise ValueError(f"Unsupported audio shape: {array.shape}")
+    # Gradio delivers (samples, channels); tolerate (channels, samples) as well
+    if array.shape[0] < array.shape[1] and array.shape[0] <= 8:
+        array = array.T
+    if array.shape[1] == 1:
+        return array[:, 0]
+    return array.mean(axis=1, dtype=np.float32).astype(array.dtype)
+
+
+def resample(samples, src_rate, dst_rate):
+    """Linear-interpolation resampler for int16 mono audio
+
+    When downsampling, everything above the new Nyquist frequency is removed
+    first, so it cannot fold back into the speech band.
+    """
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    if dst_rate < src_rate:
+        samples = lowpass(samples, src_rate, dst_rate / 2)
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    positions = np.arange(n_out, dtype=np.float64) * (src_rate / dst_rate)
+    out = np.interp(positions, np.arange(len(samples)), samples.astype(np.float32))
+    return out.astype(np.int16)
+
+
+def frame_rms(samples, frame):
+    """RMS of each whole frame of int16 samples (a trailing partial frame is ignored)"""
+    n = len(samples) // frame
+    x = samples[:n * frame].astype(np.float32).reshape(n, frame)
+    return np.sqrt(np.mean(x * x, axis=1))
+
+
+def trim_silence(samples, rate, threshold_db=-35.0, min_rms=100.0, frame_ms=20, pad_ms=150):
+    """Cut leading and trailing audio quieter than threshold_db below the loudest frame
+
+    pad_ms of audio is kept either side so soft word onsets survive. Audio
+    with no frame above min_rms is returned unchanged.
+    """
+    frame = max(1, int(rate * frame_ms / 1000))
+    rms = frame_rms(samples, frame)
+    if not len(rms) or rms.max() < min_rms:
+        return samples
+    loud = np.flatnonzero(rms >= max(min_rms, rms.max() * 10 ** (threshold_db / 20)))
+    pad = int(rate * pad_ms / 1000)
+    start = max(0, loud[0] * frame - pad)
+    end = min(len(samples), (loud[-1] + 1) * frame + pad)
+    return samples[start:end]
+
+
+def fft_filter(samples, rate, gain):
+    """Apply gain(freqs) as a zero-phase FFT mask to int16 samples (one rfft/irfft, no SciPy)"""
+    # Zero-pad to a power of two: odd take lengths with large prime factors make the FFT crawl
+    n = 1 << (len(samples) - 1).bit_length()
+    spectrum = np.fft.rfft(samples.astype(np.float32), n)
+    spectrum *= gain(np.fft.rfftfreq(n, 1.0 / rate))
+    return np.clip(np.fft.irfft(spectrum, n)[:len(samples)], -32768, 32767).astype(np.int16)
+
+
+def highpass(samples, rate, cutoff_hz):
+    """Remove rumble below cutoff_hz with a raised-cosine FFT mask"""
+    if cutoff_hz <= 0 or len(samples) < 2:
+        return samples
+
+    def gain(freqs):
+        # Half-octave transition band so the edge does not ring
+        ramp = np.clip((freqs - cutoff_hz / 1.414) / (cutoff_hz - cutoff_hz / 1.414), 0.0, 1.0)
+        return 0.5 - 0.5 * np.cos(np.pi * ramp)
+    return fft_filter(samples, rate, gain)
+
+
+def lowpass(samples, rate, cutoff_hz):
+    """Remove everything at and above cutoff_hz with a raised-cosine FFT mask (the anti-alias filter)"""
+    if cutoff_hz >= rate / 2 or len(samples) < 2:
+        return samples
+
+    def gain(freqs):
+        # Full level up to 90% of the cutoff, silent from the cutoff on
+        ramp = np.clip((cutoff_hz - freqs) / (cutoff_hz * 0.1), 0.0, 1.0)
+        return 0.5 - 0.5 * np.cos(np.pi * ramp)
+    return fft_filter(samples, rate, gain)
+
+
+def normalize_peak(samples, peak=0.9, max_gain=20.0):
+    """Scale so the loudest sample sits at peak of full scale, boosting by at most max_gain"""
+    top = int(np.abs(samples.astype(np.int32)).max()) if len(samples) else 0
+    if top == 0:
+        return samples
+    gain = min(peak * 32767 / top, max_gain)
+    if abs(gain - 1.0) < 0.01:
+        return samples
+    return np.clip(samples.astype(np.float32) * gain, -32768, 32767).astype(np.int16)
+
+
+def clean_samples(samples, rate, target_rate=None, trim=False, normalize=False, highpass_hz=0):
+    """High-pass, trim, resample and normalize int16 mono samples
+
+    The high-pass runs first so hum and rumble do not count as speech when
+    trimming; trimming runs before resampling so the resampler and everything
+    after it only see the speech.
+    """
+    if highpass_hz:
+        samples = highpass(samples, rate, highpass_hz)
+    if trim:
+        samples = trim_silence(samples, rate)
+    if target_rate:
+        samples = resample(samples, rate, target_rate)
+        rate = target_rate
+    if normalize:
+        samples = normalize_peak(samples)
+    return np.ascontiguousarray(samples), rate
+
+
+def prepare_samples(sample_rate, array, target_rate=RECOGNIZER_SAMPLE_RATE, **cleaning):
+    """Return (int16 mono samples, rate) ready for recognition
+
+    cleaning takes clean_samples' trim/normalize/highpass_hz options.
+    """
+    samples = to_int16(downmix(np.asarray(array)))
+    return clean_samples(samples, sample_rate, target_rate, **cleaning)
+
+
+def audio_data_from_array(sample_rate, array, target_rate=RECOGNIZER_SAMPLE_RATE, **cleaning):
+    """Build sr.AudioData from a Gradio (sample_rate, ndarray) pair without a temp file"""
+    import speech_recognition as sr
+    samples, rate = prepare_samples(sample_rate, array, target_rate, **cleaning)
+    return sr.AudioData(samples.tobytes(), rate, 2)
+
+
+def audio_data_from_frames(frames, sample_rate, sample_width=2, target_rate=None, **cleaning):
+    """Build sr.AudioData from raw PyAudio frames without a temp file"""
+    import speech_recognition as sr
+    pcm = frames if isinstance(frames, (bytes, bytearray)) else b''.join(frames)
+    if sample_width == 2 and ((target_rate and target_rate != sample_rate) or any(cleaning.values())):
+        samples, rate = clean_samples(np.frombuffer(pcm, dtype=np.int16), sample_rate, target_rate, **cleaning)
+        return sr.AudioData(samples.tobytes(), rate, 2)
+    return sr.AudioData(pcm, sample_rate, sample_width)
@@ -0,0 +1,108 @@
+# benchmarks/bench_batch.py - One compound utterance vs the same commands spoken one at a time
+#
+# Run from the repository root:  python -m benchmarks.bench_batch
+#
+# Drives FaderPortEmulator.daw_control with stand-in MIDI ports and counts the
+# per-utterance work: save requests, state file writes, MIDI queue wakeups and
+# messages on the wire.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import mido
+
+from benchmarks.common import FakeMidiInput, FakeMidiPort, percentiles
+
+PARTS = [
+    "mute tracks 1 through 8",
+    "solo track 3",
+    "set fader 5 to 60",
+    "set fader 6 to 40",
+    "unmute track 2",
+    "play",
+]
+
+
+def build_emulator():
+    sys.modules['pyaudio'] = None
+    os.environ.setdefault('SPHINX_DECODERS', '1')
+    mido.open_output = lambda name=None, **kwargs: FakeMidiPort()
+    mido.open_input = lambda name=None, **kwargs: FakeMidiInput(name or 'Fake MIDI In')
+    import app
+    return app.FaderPortEmulator(daw_only=True)
+
+
+def counters(emulator):
+    store = emulator.state_store.stats
+    return {
+        'save_requests': store['save_requests'],
+        'state_writes': store['snapshot_writes'] + store['journal_writes'],
+        'midi_enqueued': emulator.midi_out.stats['enqueued'],
+        'midi_sent': len(emulator.midi_out.port.messages),
+    }
+
+
+def settle(emulator, delay):
+    emulator.midi_out.flush(timeout=5)
+    time.sleep(delay * 4)
+
+
+def run(emulator, utterances, repeat, delay):
+    """Speak utterances in turn, pausing between them as a user would; returns per-round costs"""
+    wakeups = []
+    original = emulator.midi_out.send_many
+
+    def counting(messages):
+        wakeups.append(1)
+        original(messages)
+    emulator.midi_out.send_many = counting
+
+    dispatch = []
+    before = counters(emulator)
+    responses = []
+    for _ in range(repeat):
+        for text in utterances:
+            start = time.perf_counter()
+            responses.append(emulator.daw_control(text))
+            dispatch.append(time.perf_counter() - start)
+            settle(emulator, delay)
+    after = counters(emulator)
+    emulator.midi_out.send_many = original
+
+    report = {k: round((after[k] - before[k]) / repeat, 1) for k in after}
+    report['midi_wakeups'] = round(len(wakeups) / repeat, 1)
+    report['dispatch_ms_per_round'] = round(sum(dispatch) / repeat * 1000, 3)
+    report['dispatch_ms'] = percentiles(dispatch)
+    report['words_spoken'] = sum(len(t.split()) for t in utterances)
+    report['last_response'] = responses[-1]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compound command batching benchmark")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--save-delay', type=float, default=0.02,
+                        help="STATE_SAVE_DELAY; pauses between utterances are 4x this")
+    args = parser.parse_args()
+
+    os.environ['STATE_SAVE_DELAY'] = str(args.save_delay)
+    workdir = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    os.chdir(workdir.name)
+    try:
+        emulator = build_emulator()
+        separate = run(emulator, PARTS, args.repeat, args.save_delay)
+        compound = run(emulator, [" and ".join(PARTS)], args.repeat, args.save_delay)
+        emulator.cleanup()
+    finally:
+        os.chdir(cwd)
+        workdir.cleanup()
+
+    print(json.dumps({'commands': len(PARTS), 'separate': separate, 'compound': compound}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
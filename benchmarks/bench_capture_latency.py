@@ -0,0 +1,54 @@
+# benchmarks/bench_capture_latency.py - End-of-speech to MIDI latency: streaming VAD vs fixed record
+#
+# Run from the repository root:  python -m benchmarks.bench_capture_latency
+import argparse
+import json
+import time
+
+from audio_capture import StreamingCapture
+from benchmarks.common import FakeMidiPort, FakePyAudio, percentiles, synth_utterance
+
+
+def run_streaming(runs, rate, silence_ms, recognizer_delay):
+    latencies, detect_lags = [], []
+    for seed in range(runs):
+        signal, speech_end = synth_utterance(rate, seed=seed)
+        p = FakePyAudio(signal)
+        port = FakeMidiPort()
+        capture = StreamingCapture(p, rate=rate, silence_ms=silence_ms)
+        pcm, _ = capture.record_utterance()
+        if pcm is None:
+            continue
+        time.sleep(recognizer_delay)  # stand-in for recognition
+        port.send('start')
+        actual_eos = p.last_stream.t0 + speech_end
+        latencies.append(port.messages[-1][0] - actual_eos)
+        detect_lags.append(capture.timings['endpoint'] - actual_eos)
+    return latencies, detect_lags
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-of-speech to MIDI latency benchmark")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--rate', type=int, default=16000)
+    parser.add_argument('--silence-ms', type=int, default=400)
+    parser.add_argument('--recognizer-delay', type=float, default=0.15)
+    parser.add_argument('--record-seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    latencies, lags = run_streaming(args.runs, args.rate, args.silence_ms, args.recognizer_delay)
+    _, speech_end = synth_utterance(args.rate)
+    # The fixed path always records RECORD_SECONDS, so its latency is deterministic
+    fixed = args.record_seconds - speech_end + args.recognizer_delay
+    report = {
+        'runs': len(latencies),
+        'recognizer_delay_ms': args.recognizer_delay * 1000,
+        'streaming_eos_to_midi_ms': percentiles(latencies),
+        'streaming_endpoint_lag_ms': percentiles(lags),
+        'fixed_eos_to_midi_ms': round(fixed * 1000, 3),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_chat_log.py - Per-turn chat persistence cost as history grows
+#
+# Run from the repository root:  python -m benchmarks.bench_chat_log
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import percentiles
+from chat_log import ChatLog
+
+
+def prefill(path, entries):
+    record = json.dumps({'user_input': 'what is a ii-v-i', 'bot_response': 'x' * 200,
+                         'timestamp': '2024-01-01T00:00:00'}) + '\n'
+    with open(path, 'w') as f:
+        for _ in range(entries):
+            f.write(record)
+
+
+def time_chat_log(path, turns):
+    log = ChatLog(path, max_bytes=1 << 40)
+    times = []
+    for i in range(turns):
+        start = time.perf_counter()
+        log.append(f'question {i}', 'answer ' * 30)
+        times.append(time.perf_counter() - start)
+    log.close()
+    return times
+
+
+def time_pandas(path, entries, turns):
+    """The previous save_chat: concat onto the full DataFrame and rewrite it"""
+    import pandas as pd
+    history = pd.read_json(path, lines=True) if entries else pd.DataFrame(
+        columns=['user_input', 'bot_response', 'timestamp'])
+    times = []
+    for i in range(turns):
+        start = time.perf_counter()
+        row = pd.DataFrame({'user_input': [f'question {i}'], 'bot_response': ['answer ' * 30],
+                            'timestamp': [pd.Timestamp.now()]})
+        history = pd.concat([history, row], ignore_index=True)
+        history.to_json(path, orient='records', lines=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat log append benchmark")
+    parser.add_argument('--sizes', default='10,10000,100000', help="existing history sizes")
+    parser.add_argument('--turns', type=int, default=50)
+    parser.add_argument('--pandas', action='store_true', help="also time the old pandas rewrite")
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(',')):
+            path = os.path.join(tmp, f'chat_{size}.json')
+            prefill(path, size)
+            entry = {'chat_log_append_ms': percentiles(time_chat_log(path, args.turns))}
+            if args.pandas:
+                prefill(path, size)
+                entry['pandas_rewrite_ms'] = percentiles(time_pandas(path, size, args.turns))
+            report[str(size)] = entry
+    print(json.dumps({'turns': args.turns, 'history_sizes': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
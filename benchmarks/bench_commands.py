@@ -0,0 +1,77 @@
+# benchmarks/bench_commands.py - Command compiler correctness corpus and parse timing
+#
+# Run from the repository root:  python -m benchmarks.bench_commands
+# The corpus lives in tests/test_commands.py (python -m pytest runs it as tests).
+# Exits non-zero if any corpus entry parses differently from its expectation.
+import argparse
+import json
+import sys
+import time
+
+from commands import Action, CommandError, parse_command, parse_commands
+from tests.test_commands import COMPOUND, CORPUS, ERROR
+
+
+def legacy_kind(text):
+    """The substring if-chain daw_control used before the compiler, for comparison"""
+    for needle, kind in (("play", 'play'), ("stop", 'stop'), ("record", 'record'),
+                         ("solo track", 'solo'), ("mute track", 'mute'),
+                         ("unmute track", 'unmute'), ("fader", 'fader')):
+        if needle in text:
+            return kind
+    return None
+
+
+def check_corpus():
+    failures = []
+    for text, expected in CORPUS:
+        try:
+            got = parse_command(text)
+        except CommandError:
+            got = ERROR
+        if got != expected:
+            failures.append({'input': text, 'expected': expected, 'got': got})
+    for text, expected in COMPOUND:
+        try:
+            got = parse_commands(text)
+        except CommandError:
+            got = ERROR
+        if got != expected:
+            failures.append({'input': text, 'expected': expected, 'got': got})
+    return failures
+
+
+def time_parse(runs):
+    texts = [text for text, _ in CORPUS]
+    start = time.perf_counter()
+    for _ in range(runs):
+        for text in texts:
+            try:
+                parse_command(text)
+            except CommandError:
+                pass
+    return (time.perf_counter() - start) / (runs * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Command compiler benchmark")
+    parser.add_argument('--runs', type=int, default=2000)
+    args = parser.parse_args()
+
+    failures = check_corpus()
+    legacy_misroutes = sum(
+        1 for text, expected in CORPUS
+        if isinstance(expected, Action) and legacy_kind(text) != expected.kind
+    )
+    report = {
+        'corpus_size': len(CORPUS) + len(COMPOUND),
+        'corpus_failures': failures,
+        'legacy_misrouted_commands': legacy_misroutes,
+        'mean_parse_us': round(time_parse(args.runs) * 1e6, 3),
+    }
+    print(json.dumps(report, indent=2, default=str))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_daemon.py - Command round trip and throughput: headless socket vs the Gradio path
+#
+# Run from the repository root:  python -m benchmarks.bench_daemon
+#
+# Builds a DAW-only FaderPortEmulator with stand-in MIDI ports (as bench_batch
+# does) and serves it the way python app.py --headless does. A client sends
+# the same text command stream in-process (no transport, the floor), over the
+# Unix socket, over TCP and over UDP, and as structured JSON. Round trip is one
+# command in flight at a time. Throughput is several clients sending as fast
+# as their replies come back. When gradio and gradio_client are installed,
+# the same command also goes through a one-textbox Blocks app via the HTTP API.
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_batch import build_emulator
+from benchmarks.common import percentiles
+from command_server import CommandClient, CommandServer
+
+
+def commands(i):
+    track = i % 16 + 1
+    text = [f"set fader {track} to {i % 101}", f"mute track {track}", f"unmute track {track}", "play"]
+    structured = [{'kind': 'fader', 'track': track, 'value': i % 101}, {'kind': 'mute', 'track': track},
+                  {'kind': 'unmute', 'track': track}, {'kind': 'play'}]
+    return text[i % 4], structured[i % 4]
+
+
+def round_trip(send, count, structured=False):
+    samples = []
+    for i in range(count):
+        command = commands(i)[structured]
+        start = time.perf_counter()
+        reply = send(command)
+        samples.append(time.perf_counter() - start)
+        if not reply:
+            raise RuntimeError(f"empty reply to {command!r}")
+    return percentiles(samples)
+
+
+def throughput(make_client, clients, seconds, structured=False):
+    counts = [0] * clients
+    stop = threading.Event()
+
+    def run(n):
+        client = make_client()
+        i = n
+        while not stop.is_set():
+            client.send(commands(i)[structured])
+            counts[n] += 1
+            i += clients
+        client.close()
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return round(sum(counts) / (time.perf_counter() - start))
+
+
+def gradio_path(emulator, count):
+    """The same command through a minimal Gradio app and its HTTP API, if gradio is installed"""
+    try:
+        import gradio as gr
+        from gradio_client import Client
+    except ImportError as e:
+        return {'skipped': f"gradio not installed ({e.name})"}
+
+    with gr.Blocks() as demo:
+        text = gr.Textbox()
+        result = gr.Textbox()
+        text.submit(emulator.daw_control, inputs=text, outputs=result, api_name='daw_control')
+    _, url, _ = demo.launch(prevent_thread_lock=True, quiet=True)
+    try:
+        client = Client(url, verbose=False)
+        return {'round_trip_ms': round_trip(lambda c: client.predict(c, api_name='/daw_control'), count)}
+    finally:
+        demo.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless command socket benchmark")
+    parser.add_argument('--count', type=int, default=2000, help="commands per round-trip run")
+    parser.add_argument('--clients', type=int, default=4, help="concurrent clients for throughput")
+    parser.add_argument('--seconds', type=float, default=3.0, help="throughput run length")
+    parser.add_argument('--gradio-count', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_daemon_')
+    os.chdir(workdir)
+    emulator = build_emulator()
+    server = CommandServer(emulator)
+    unix_path = os.path.join(workdir, 'faderport.sock')
+    server.serve(unix_path)
+    tcp = '%s:%d' % server.serve('127.0.0.1:0')
+    udp = '%s:%d' % server.serve_udp('127.0.0.1:0')
+
+    transports = {
+        'unix': lambda: CommandClient(unix_path),
+        'tcp': lambda: CommandClient(tcp),
+        'udp': lambda: CommandClient(udp, udp=True),
+    }
+    report = {'commands': args.count, 'clients': args.clients,
+              'in_process': {'round_trip_ms': round_trip(emulator.daw_control, args.count)}}
+    for name, make_client in transports.items():
+        results = {}
+        for structured in (False, True):
+            client = make_client()
+            results['json' if structured else 'text'] = {
+                'round_trip_ms': round_trip(client.send, args.count, structured),
+                'commands_per_s': throughput(make_client, args.clients, args.seconds, structured),
+            }
+            client.close()
+        report[name] = results
+    report['gradio'] = gradio_path(emulator, args.gradio_count)
+
+    server.shutdown()
+    emulator.cleanup()
+    report['midi_sent'] = len(emulator.midi_out.port.messages)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
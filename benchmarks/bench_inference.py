@@ -0,0 +1,63 @@
+# benchmarks/bench_inference.py - InferenceService throughput with a stub model
+#
+# Run from the repository root:  python -m benchmarks.bench_inference
+# The stub costs a fixed overhead per pipeline call plus a smaller cost per
+# prompt, which is roughly how a transformer pipeline behaves on CPU.
+import argparse
+import json
+import threading
+import time
+
+from inference import InferenceService
+
+
+def stub_model(call_cost, item_cost):
+    def model(prompts):
+        time.sleep(call_cost + item_cost * len(prompts))
+        return [f"reply to {p}" for p in prompts]
+    return model
+
+
+def run(concurrency, requests_per_client, max_batch, call_cost, item_cost):
+    service = InferenceService(stub_model(call_cost, item_cost), max_queue=1024, max_batch=max_batch)
+
+    def client(n):
+        for i in range(requests_per_client):
+            service.generate(f"client {n} question {i}", timeout=60)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stats = service.stats()
+    service.shutdown()
+    return {
+        'requests_per_second': round(concurrency * requests_per_client / elapsed, 2),
+        'latency_p50_ms': stats['latency_p50_ms'],
+        'latency_p95_ms': stats['latency_p95_ms'],
+        'mean_batch_size': stats['mean_batch_size'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference service throughput benchmark")
+    parser.add_argument('--requests', type=int, default=20, help="requests per client")
+    parser.add_argument('--call-cost', type=float, default=0.05)
+    parser.add_argument('--item-cost', type=float, default=0.005)
+    parser.add_argument('--max-batch', type=int, default=8)
+    args = parser.parse_args()
+
+    report = {}
+    for concurrency in (1, 4, 16):
+        report[f'concurrency_{concurrency}'] = {
+            'unbatched': run(concurrency, args.requests, 1, args.call_cost, args.item_cost),
+            'batched': run(concurrency, args.requests, args.max_batch, args.call_cost, args.item_cost),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
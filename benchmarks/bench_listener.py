@@ -0,0 +1,118 @@
+# benchmarks/bench_listener.py - Idle CPU and wake-to-MIDI latency of hands-free listening
+#
+# Run from the repository root:  python -m benchmarks.bench_listener
+#
+# Audio is replayed in real time through a PyAudio stand-in. The keyword
+# spotter is the real PocketSphinx keyphrase search (its verdict is forced to
+# "heard" since the synthetic audio holds no words); the full recognizer is a
+# stub with a fixed delay; commands go through FaderPortEmulator.daw_control to
+# a fake MIDI port.
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_batch import build_emulator
+from benchmarks.common import FakePyAudio, percentiles, synth_utterance
+from listener import ContinuousListener, KeywordSpotter
+
+RATE = 16000
+
+
+def noise(seconds, seed=1):
+    rng = np.random.default_rng(seed)
+    return np.clip(rng.normal(0, 60, int(RATE * seconds)), -32768, 32767).astype(np.int16)
+
+
+def idle_cpu(seconds, spotter):
+    """CPU share while the room is quiet, and what running the spotter on every second would cost"""
+    listener = ContinuousListener(FakePyAudio(noise(seconds)), spotter, lambda pcm, rate: '',
+                                  lambda text: None, wake_phrase='hey fader', rate=RATE)
+    wall, cpu = time.perf_counter(), time.process_time()
+    listener.start()
+    while listener.stream.active:
+        time.sleep(0.05)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    frames = listener.stats['frames']
+    listener.stop()
+
+    one_second = noise(1.0, seed=2).tobytes()
+    start = time.perf_counter()
+    for _ in range(5):
+        spotter(one_second)
+    spot_every_second = (time.perf_counter() - start) / 5
+    return {
+        'seconds': seconds,
+        'frames': frames,
+        'segments': listener.stats['segments'],
+        'cpu_percent': round(100 * cpu / wall, 2),
+        'spotter_on_all_audio_cpu_percent': round(100 * spot_every_second, 2),
+    }
+
+
+def wake_to_midi(emulator, spotter, utterances, recognize_ms):
+    signal = np.concatenate([synth_utterance(RATE, lead_silence=0.4, tail_silence=0.8, seed=i)[0]
+                             for i in range(utterances)])
+    spot_times = []
+
+    def spot(pcm):
+        start = time.perf_counter()
+        spotter(pcm)
+        spot_times.append(time.perf_counter() - start)
+        return True
+
+    def recognize(pcm, rate):
+        time.sleep(recognize_ms / 1000)
+        return f"hey fader set fader {len(spot_times) % 16 + 1} to {len(spot_times) * 7 % 100}"
+
+    def command(text):
+        response = emulator.daw_control(text)
+        emulator.midi_out.flush(timeout=1)
+        return response
+
+    # window=0: every utterance carries its own wake phrase, so each one pays for the spotter
+    listener = ContinuousListener(FakePyAudio(signal), spot, recognize, command,
+                                  wake_phrase='hey fader', rate=RATE, window=0)
+    listener.start()
+    while listener.stream.active:
+        time.sleep(0.05)
+    time.sleep(0.5 + recognize_ms / 1000)
+    listener.stop()
+    return {
+        'utterances': utterances,
+        'stats': listener.stats,
+        'keyword_spot_ms': percentiles(spot_times),
+        'recognize_ms': recognize_ms,
+        # Included below: the endpointer waits this long to be sure the speaker stopped
+        'endpoint_silence_ms': listener.endpointer.silence_frames * listener.frame_ms,
+        'end_of_speech_to_midi_ms': percentiles(list(listener.latencies)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hands-free listening benchmark")
+    parser.add_argument('--idle-seconds', type=float, default=10.0)
+    parser.add_argument('--utterances', type=int, default=8)
+    parser.add_argument('--recognize-ms', type=float, default=150.0, help="stub full-recognizer delay")
+    args = parser.parse_args()
+
+    spotter = KeywordSpotter('hey fader', sample_rate=RATE)
+    workdir = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    os.chdir(workdir.name)
+    try:
+        report = {'idle': idle_cpu(args.idle_seconds, spotter)}
+        emulator = build_emulator()
+        report['wake_to_midi'] = wake_to_midi(emulator, spotter, args.utterances, args.recognize_ms)
+        emulator.cleanup()
+    finally:
+        os.chdir(cwd)
+        workdir.cleanup()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_metrics.py - Per-sample cost of the metrics primitives and the scrape endpoint
+#
+# Run from the repository root:  python -m benchmarks.bench_metrics
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+from metrics import MetricsRegistry
+
+
+def per_call_us(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def contended_us(fn, n, threads):
+    def work():
+        for _ in range(n):
+            fn()
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return (time.perf_counter() - start) / (n * threads) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics overhead benchmark")
+    parser.add_argument('--samples', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    stages = registry.histogram('bench_stage_seconds', 'bench', ('stage',))
+    commands = registry.counter('bench_commands_total', 'bench', ('kind',))
+    registry.callback('bench_gauge', 'bench', lambda: 42)
+
+    def timed_block():
+        with stages.time('parse'):
+            pass
+
+    n = args.samples
+    baseline = per_call_us(lambda: None, n)
+    report = {
+        'samples': n,
+        'empty_call_us': round(baseline, 3),
+        'counter_inc_us': round(per_call_us(lambda: commands.inc('fader'), n) - baseline, 3),
+        'histogram_observe_us': round(per_call_us(lambda: stages.observe(0.0042, 'recognize'), n) - baseline, 3),
+        'timer_context_us': round(per_call_us(timed_block, n) - baseline, 3),
+        f'histogram_observe_{args.threads}_threads_us': round(
+            contended_us(lambda: stages.observe(0.0042, 'recognize'), n // args.threads, args.threads) - baseline, 3),
+    }
+
+    start = time.perf_counter()
+    text = registry.render_prometheus()
+    report['render_prometheus_ms'] = round((time.perf_counter() - start) * 1000, 3)
+
+    port = registry.serve(0)
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics') as r:
+        scraped = r.read().decode()
+        report['scrape_content_type'] = r.headers['Content-Type']
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics.json') as r:
+        report['scrape_json_keys'] = sorted(json.load(r))
+    registry.shutdown()
+    report['scrape_matches_render'] = scraped.splitlines()[:5] == text.splitlines()[:5]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# benchmarks/bench_midi_backend.py - MIDI event log cost and shared-backend latency under load
+#
+# Run from the repository root:  python -m benchmarks.bench_midi_backend
+#
+# Part one compares the Streamlit app's old activity log (strftime per message,
+# list.pop(0) past the cap) with MidiEventLog.append at several capacities.
+# Part two starts a MidiBackend on a loopback socket with a stand-in port.
+# Several clients stream fader moves at a fixed total rate while another
+# client polls the log the way the UI does. It reports request latency as
+# the UI sees it, and events/s reaching the port.
+# Part three sends one NRPN mute per track through the backend and straight
+# to an engine. Both must put every track's write on the wire.
+import argparse
+import json
+import threading
+import time
+from datetime import datetime
+
+import mido
+
+from benchmarks.common import FakeMidiPort, percentiles
+from midi_backend import LoggedPort, MidiBackend, MidiBackendClient, MidiEventLog, format_events
+from midi_engine import MidiOutputEngine
+from mixer import MidiAddressMap
+
+
+def old_log(capacity):
+    """The previous log_midi: format on append, pop(0) once full"""
+    log = []
+
+    def append(msg):
+        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        log.append(f"[{timestamp}] Ch{msg.channel+1} CC{msg.control}: {msg.value}")
+        if len(log) > capacity:
+            log.pop(0)
+    return append
+
+
+def append_cost(events, capacities):
+    messages = [mido.Message('control_change', channel=i % 16, control=7, value=i % 128) for i in range(events)]
+    report = {}
+    for capacity in capacities:
+        append = old_log(capacity)
+        start = time.perf_counter()
+        for msg in messages:
+            append(msg)
+        old = (time.perf_counter() - start) / events
+
+        log = MidiEventLog(capacity)
+        start = time.perf_counter()
+        for msg in messages:
+            log.append(msg.bytes())
+        new = (time.perf_counter() - start) / events
+
+        start = time.perf_counter()
+        format_events(log.recent(20)[1])
+        report[capacity] = {
+            'old_append_us': round(old * 1e6, 3),
+            'ring_append_us': round(new * 1e6, 3),
+            'format_20_lines_ms': round((time.perf_counter() - start) * 1000, 3),
+        }
+    return report
+
+
+def backend_load(rate, seconds, clients, batch, max_rate):
+    log = MidiEventLog(4096)
+    port = FakeMidiPort()
+    engine = MidiOutputEngine(LoggedPort(port, log), max_rate=max_rate)
+    backend = MidiBackend(engine, log)
+    address = '%s:%d' % backend.serve('127.0.0.1:0')
+
+    send_latency, poll_latency = [], []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def sender(n):
+        client = MidiBackendClient(address)
+        interval = batch * clients / rate
+        due = time.perf_counter()
+        i = 0
+        while not stop.is_set():
+            messages = [mido.Message('control_change', channel=n % 16, control=(i + k) % 16, value=(i + k) % 128)
+                        for k in range(batch)]
+            start = time.perf_counter()
+            client.send(messages)
+            with lock:
+                send_latency.append(time.perf_counter() - start)
+            i += batch
+            due += interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        client.close()
+
+    def poller():
+        client = MidiBackendClient(address)
+        while not stop.is_set():
+            start = time.perf_counter()
+            _, events = client.recent(20)
+            format_events(events)
+            poll_latency.append(time.perf_counter() - start)
+            time.sleep(0.05)
+        client.close()
+
+    threads = [threading.Thread(target=sender, args=(n,)) for n in range(clients)]
+    threads.append(threading.Thread(target=poller))
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.flush(timeout=5)
+    elapsed = time.perf_counter() - started
+    backend.shutdown()
+    engine.close()
+    return {
+        'target_events_per_s': rate,
+        'clients': clients,
+        'batch': batch,
+        'enqueued_per_s': round(engine.stats['enqueued'] / elapsed),
+        'coalesced': engine.stats['coalesced'],
+        'sent_per_s': round(engine.stats['sent'] / elapsed),
+        'logged': log.total,
+        'send_request_ms': percentiles(send_latency),
+        'log_poll_ms': percentiles(poll_latency),
+    }
+
+
+def nrpn_writes(tracks):
+    """Wire messages for one NRPN mute per track, via the backend and straight to an engine"""
+    address_map = MidiAddressMap(tracks, mode='nrpn')
+    writes = [address_map.encode('muted', track, True) for track in range(tracks)]
+    report = {}
+    for name in ('direct', 'backend'):
+        log = MidiEventLog(4096)
+        port = FakeMidiPort()
+        engine = MidiOutputEngine(LoggedPort(port, log))
+        if name == 'direct':
+            engine.send_many(writes)
+        else:
+            backend = MidiBackend(engine, log)
+            client = MidiBackendClient('%s:%d' % backend.serve('127.0.0.1:0'))
+            client.send(writes)
+            client.close()
+            backend.shutdown()
+        engine.flush(timeout=5)
+        engine.close()
+        sent = [m for _, m in port.messages]
+        # Parameter numbers of the writes that reached the wire (CC99/CC98 pairs)
+        params = {sent[i].value << 7 | sent[i + 1].value for i in range(0, len(sent) - 1) if sent[i].is_cc(99)}
+        report[name] = {'sent': len(sent), 'coalesced': engine.stats['coalesced'], 'tracks_written': len(params)}
+    if report['backend']['sent'] != 4 * tracks:
+        raise SystemExit(f"NRPN writes lost through the backend: {report}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MIDI backend benchmark")
+    parser.add_argument('--events', type=int, default=100000, help="appends per log capacity")
+    parser.add_argument('--rates', default='1000,5000,20000', help="total client events/s, comma separated")
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--batch', type=int, default=8, help="messages per send request")
+    parser.add_argument('--max-rate', type=float, default=10000, help="MIDI_MAX_RATE of the backend's engine")
+    parser.add_argument('--nrpn-tracks', type=int, default=8, help="tracks in the NRPN write check")
+    args = parser.parse_args()
+
+    report = {
+        'log_append': append_cost(args.events, (50, 4096, 65536)),
+        'backend': [backend_load(int(r), args.seconds, args.clients, args.batch, args.max_rate)
+                    for r in args.rates.split(',')],
+        'nrpn_writes': nrpn_writes(args.nrpn_tracks),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_midi_engine.py - Direct port.send vs MidiOutputEngine during fader drags
+#
+# Run from the repository root:  python -m benchmarks.bench_midi_engine
+import argparse
+import json
+import time
+
+import mido
+
+from benchmarks.common import FakeMidiPort, percentiles
+from midi_engine import MidiOutputEngine
+
+
+def drag_messages(tracks, events_per_track):
+    """Interleaved slider drags on several tracks plus a solo sweep, like the UI produces"""
+    messages = []
+    for step in range(events_per_track):
+        for track in range(tracks):
+            value = int(127 * step / max(events_per_track - 1, 1))
+            messages.append(mido.Message('control_change', control=track, value=value))
+    for i in range(16):
+        messages.append(mido.Message('control_change', control=i + 32, value=0))
+    messages.append(mido.Message('control_change', control=35, value=127))
+    return messages
+
+
+def run(sender, messages, interval):
+    latencies = []
+    for msg in messages:
+        start = time.perf_counter()
+        sender.send(msg)
+        latencies.append(time.perf_counter() - start)
+        if interval:
+            time.sleep(interval)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MIDI output engine benchmark")
+    parser.add_argument('--tracks', type=int, default=4)
+    parser.add_argument('--events', type=int, default=200, help="change events per track")
+    parser.add_argument('--port-cost-ms', type=float, default=0.5, help="simulated per-message port cost")
+    parser.add_argument('--max-rate', type=float, default=1000.0)
+    parser.add_argument('--event-interval-ms', type=float, default=0.2)
+    args = parser.parse_args()
+
+    messages = drag_messages(args.tracks, args.events)
+    interval = args.event_interval_ms / 1000
+
+    port = FakeMidiPort(send_cost=args.port_cost_ms / 1000)
+    start = time.perf_counter()
+    direct = run(port, messages, interval)
+    direct_elapsed = time.perf_counter() - start
+
+    port = FakeMidiPort(send_cost=args.port_cost_ms / 1000)
+    engine = MidiOutputEngine(port, max_rate=args.max_rate)
+    start = time.perf_counter()
+    queued = run(engine, messages, interval)
+    engine.flush()
+    engine_elapsed = time.perf_counter() - start
+    final = {m.control: m.value for _, m in port.messages}
+    engine.close()
+
+    report = {
+        'messages_offered': len(messages),
+        'direct': {
+            'caller_latency_ms': percentiles(direct),
+            'messages_sent': len(messages),
+            'elapsed_s': round(direct_elapsed, 3),
+        },
+        'engine': {
+            'caller_latency_ms': percentiles(queued),
+            'messages_sent': engine.stats['sent'],
+            'messages_coalesced': engine.stats['coalesced'],
+            'elapsed_s': round(engine_elapsed, 3),
+            'final_values_correct': all(final[t] == 127 for t in range(args.tracks)) and final[35] == 127,
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_midi_input.py - Replay DAW automation into the MIDI input listener
+#
+# Run from the repository root:  python -m benchmarks.bench_midi_input
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import mido
+
+from benchmarks.common import FakeMidiInput, FakeMidiPort, percentiles
+from midi_engine import MidiOutputEngine
+from midi_input import MidiInputListener
+from persistence import StateStore
+
+# 31250 baud, 10 bits per byte on the wire, 3 bytes per CC
+MIDI_WIRE_RATE = 31250 / 10 / 3
+
+
+def automation(count, tracks=16):
+    """Fader automation on every track plus the odd mute toggle and transport message"""
+    messages = []
+    for i in range(count):
+        track = i % tracks
+        if i % 97 == 0:
+            messages.append(mido.Message('control_change', control=track + 16, value=127 * (i // 97 % 2)))
+        elif i % 1009 == 0:
+            messages.append(mido.Message('stop'))
+        else:
+            messages.append(mido.Message('control_change', control=track, value=(i // tracks) % 128))
+    return messages
+
+
+def new_state(tracks=16):
+    return {
+        'tracks': [{'name': f'Track {i+1}', 'fader': 0.5, 'muted': False, 'solo': False} for i in range(tracks)],
+        'transport': {'playing': False, 'recording': False, 'tempo': 120},
+    }
+
+
+def replay(messages, rate, echo_filter=None, poll_interval=0.5):
+    state = new_state()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StateStore(os.path.join(tmp, 'state.json'), snapshot=lambda: state)
+        port = FakeMidiInput()
+        listener = MidiInputListener(port, state, echo_filter=echo_filter, on_change=store.save)
+
+        handle_times = []
+        handle = listener.handle
+
+        def timed(msg):
+            start = time.perf_counter()
+            handle(msg)
+            handle_times.append(time.perf_counter() - start)
+        port.callback = timed
+
+        # A UI poller like the Gradio timer: one refresh per poll that saw changes
+        refreshes = 0
+        seen = 0
+        start = time.perf_counter()
+        thread = port.replay(messages, rate)
+        while thread.is_alive():
+            thread.join(timeout=poll_interval)
+            seen, changed = listener.changed_since(seen)
+            refreshes += bool(changed)
+        elapsed = time.perf_counter() - start
+        store.close()
+
+    return {
+        'messages': len(messages),
+        'throughput_msgs_per_s': round(len(messages) / elapsed),
+        'handler_us': {k: round(v * 1000, 2) for k, v in percentiles(handle_times).items()},
+        'delivery_lateness_ms': percentiles(port.lateness) if rate else None,
+        'ui_refreshes': refreshes,
+        'state_writes': store.stats['snapshot_writes'] + store.stats['journal_writes'],
+        'listener': listener.stats,
+    }
+
+
+def echo_check(count, interval=0.0002):
+    """Send through the output engine on a loopback port that feeds every message straight back in"""
+    state = new_state()
+    loopback = FakeMidiInput()
+    engine = MidiOutputEngine(FakeMidiPort(), max_rate=0)
+    listener = MidiInputListener(loopback, state, echo_filter=engine.is_echo)
+    engine.port.send = lambda msg: loopback.callback(msg)
+    for msg in automation(count):
+        engine.send(msg)
+        time.sleep(interval)
+    engine.flush()
+    engine.close()
+    return {'sent': engine.stats['sent'], 'suppressed': listener.stats['echoes'],
+            'applied': listener.stats['applied']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MIDI input listener replay benchmark")
+    parser.add_argument('--seconds', type=float, default=3.0, help="length of the paced replay")
+    parser.add_argument('--burst', type=int, default=100000, help="messages in the unpaced replay")
+    args = parser.parse_args()
+
+    paced = automation(int(MIDI_WIRE_RATE * args.seconds))
+    report = {
+        'full_midi_bandwidth': dict(replay(paced, MIDI_WIRE_RATE), target_msgs_per_s=round(MIDI_WIRE_RATE)),
+        'unpaced': replay(automation(args.burst), None),
+        'echo_suppression': echo_check(2000),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_mixer.py - Memory and bulk-operation cost of the array mixer vs list-of-dicts
+#
+# Run from the repository root:  python -m benchmarks.bench_mixer
+import argparse
+import json
+import time
+import tracemalloc
+
+from mixer import MidiAddressMap, MixerState
+
+
+def dict_tracks(count):
+    """The list-of-dicts layout session_state used before MixerState"""
+    return [{'name': f'Track {i+1}', 'fader': 0.5, 'muted': False, 'solo': False, 'pan': 0.5}
+            for i in range(count)]
+
+
+def allocated_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - start) / repeat * 1e6, 2)
+
+
+def dict_ops(tracks):
+    def mute_all():
+        for track in tracks:
+            track['muted'] = not track['muted']
+
+    def reset_faders():
+        for track in tracks:
+            track['fader'] = 0.5
+
+    def solo_exclusive():
+        for track in tracks:
+            track['solo'] = False
+        tracks[len(tracks) // 2]['solo'] = True
+
+    return {
+        'mute_all': mute_all,
+        'reset_faders': reset_faders,
+        'solo_exclusive': solo_exclusive,
+        'snapshot': lambda: json.dumps(tracks),
+    }
+
+
+def mixer_ops(mixer):
+    flip = [True]
+
+    def mute_all():
+        flip[0] = not flip[0]
+        mixer.set_all('muted', flip[0])
+
+    return {
+        'mute_all': mute_all,
+        'reset_faders': lambda: mixer.reset_faders(0.5),
+        'solo_exclusive': lambda: mixer.solo_exclusive(mixer.track_count // 2),
+        'snapshot': lambda: json.dumps(mixer.to_records()),
+    }
+
+
+def run(count, repeat):
+    mode = 'channel' if count <= 256 else 'nrpn'
+    address_map = MidiAddressMap(count, mode=mode)
+    mixer = MixerState(count)
+    tracks = dict_tracks(count)
+
+    report = {
+        'addressing': mode,
+        'memory_bytes': {
+            'dicts': allocated_bytes(lambda: dict_tracks(count)),
+            'mixer': allocated_bytes(lambda: MixerState(count)),
+            'mixer_arrays_only': mixer.nbytes(),
+        },
+        'dicts_us': {name: per_call_us(fn, repeat) for name, fn in dict_ops(tracks).items()},
+        'mixer_us': {name: per_call_us(fn, repeat) for name, fn in mixer_ops(mixer).items()},
+    }
+
+    # Bulk ops only produce MIDI for tracks that actually changed
+    mixer.set_all('muted', False)
+    mixer.set_range('muted', 0, count // 4 - 1, True)
+    changed = mixer.set_all('muted', True)
+    start = time.perf_counter()
+    for i in changed.tolist():
+        address_map.encode('muted', i, True)
+    report['mute_all_after_quarter_muted'] = {
+        'messages': len(changed),
+        'encode_us': round((time.perf_counter() - start) * 1e6, 1),
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Array-backed mixer state benchmark")
+    parser.add_argument('--tracks', default='16,256,4096', help="track counts to compare")
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    report = {count: run(count, args.repeat) for count in (int(c) for c in args.tracks.split(','))}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/bench_mixer_changes.py - Per-control UI handlers vs the batched apply_mixer_changes
+#
+# Run from the repository root:  python -m benchmarks.bench_mixer_changes
+#
+# Part one changes every control of a 16-track bank, as a scene recall or a
+# scripted client would. First it uses the old per-control handlers (one
+# state update / send / save_state per control, i.e. 48 requests), then it uses
+# one apply_mixer_changes call. It counts save requests, state writes, MIDI
+# queue wakeups, messages on the wire and server time.
+#
+# Part two replays a fader drag: browser input events at --event-hz, each
+# request taking the measured server time plus --rtt-ms of network, under the
+# three Gradio trigger modes:
+#   multiple     every event is a request
+#   once         events while a request is pending are dropped
+#                (the default for .input, which the old handlers used)
+#   always_last  pending events collapse into one follow-up request
+#                (the new endpoint)
+# The drag is modelled, not driven through Gradio (not needed to run this).
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.bench_batch import build_emulator, counters, settle
+from benchmarks.common import percentiles
+
+
+def per_control(emulator, changes):
+    """What the removed update_fader / update_mute / update_solo handlers did, one request per control"""
+    for change in changes:
+        track = change['track']
+        for field in ('fader', 'muted', 'solo'):
+            if field in change:
+                if field == 'fader':
+                    emulator.ramps.cancel(track)
+                emulator.session_state['tracks'][track][field] = change[field]
+                emulator.midi_out.send(emulator.address_map.encode(field, track, change[field]))
+                emulator.save_state(('tracks', track, field), change[field])
+
+
+def count_wakeups(emulator):
+    """Count send_many calls (send goes through it), one queue wakeup each"""
+    wakeups = []
+    original = emulator.midi_out.send_many
+
+    def counting(messages):
+        wakeups.append(1)
+        original(messages)
+    emulator.midi_out.send_many = counting
+    return wakeups
+
+
+def scene(round_idx, track_count):
+    """Changes in mixer units (0-based tracks, faders 0.0-1.0)"""
+    return [{'track': t, 'fader': ((round_idx * 7 + t * 13) % 100) / 100,
+             'muted': (round_idx + t) % 2 == 0, 'solo': (round_idx + t) % 5 == 0}
+            for t in range(track_count)]
+
+
+def api_units(changes):
+    """The same changes as apply_mixer_changes takes them (1-based tracks, faders 0-100)"""
+    return [dict(c, track=c['track'] + 1, fader=c['fader'] * 100) for c in changes]
+
+
+def recall(emulator, rounds, delay):
+    wakeups = count_wakeups(emulator)
+    report = {}
+    for name in ('per_control', 'batched'):
+        before = counters(emulator)
+        wakeups.clear()
+        timings = []
+        for i in range(rounds):
+            changes = scene(i + (rounds if name == 'batched' else 0), 16)
+            start = time.perf_counter()
+            if name == 'per_control':
+                per_control(emulator, [{'track': c['track'], field: c[field]}
+                                       for c in changes for field in ('fader', 'muted', 'solo')])
+            else:
+                emulator.apply_mixer_changes(api_units(changes))
+            timings.append(time.perf_counter() - start)
+            settle(emulator, delay)
+        after = counters(emulator)
+        report[name] = {
+            'requests_per_recall': 48 if name == 'per_control' else 1,
+            'server_ms': percentiles(timings),
+            'midi_wakeups_per_recall': len(wakeups) / rounds,
+        }
+        report[name].update({k: (after[k] - before[k]) / rounds for k in after})
+    del emulator.midi_out.send_many
+    return report
+
+
+def drag(emulator, mode, seconds, event_hz, rtt):
+    """Simulated browser: returns requests sent and whether the final position reached the server"""
+    events = [(i / event_hz, round(i / (seconds * event_hz), 4)) for i in range(int(seconds * event_hz) + 1)]
+    busy_until = 0.0
+    pending = None
+    requests = 0
+    server_time = []
+    last_applied = None
+
+    def request(t, value):
+        nonlocal busy_until, requests, last_applied
+        start = time.perf_counter()
+        emulator.apply_mixer_changes([{'track': 1, 'fader': value * 100}])
+        elapsed = time.perf_counter() - start
+        server_time.append(elapsed)
+        requests += 1
+        last_applied = value
+        busy_until = t + elapsed + rtt
+
+    for t, value in events:
+        if mode == 'multiple':
+            request(t, value)
+            continue
+        while pending is not None and busy_until <= t:
+            value_then, pending = pending, None
+            request(busy_until, value_then)
+        if busy_until <= t:
+            request(t, value)
+        elif mode == 'always_last':
+            pending = value
+    if pending is not None:
+        request(busy_until, pending)
+    return {
+        'events': len(events),
+        'requests': requests,
+        'requests_per_s': round(requests / seconds, 1),
+        'final_position_applied': last_applied == events[-1][1],
+        'server_ms': percentiles(server_time),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched mixer update benchmark")
+    parser.add_argument('--rounds', type=int, default=50, help="scene recalls per path")
+    parser.add_argument('--delay', type=float, default=0.02, help="STATE_SAVE_DELAY for the run")
+    parser.add_argument('--seconds', type=float, default=2.0, help="drag length")
+    parser.add_argument('--event-hz', type=float, default=120.0, help="browser input events per second in a drag")
+    parser.add_argument('--rtt-ms', type=float, default=25.0, help="browser to server round trip")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='bench_mixer_changes_'))
+    os.environ['STATE_SAVE_DELAY'] = str(args.delay)
+    emulator = build_emulator()
+    report = {
+        'scene_recall': recall(emulator, args.rounds, args.delay),
+        'fader_drag': {mode: drag(emulator, mode, args.seconds, args.event_hz, args.rtt_ms / 1000)
+                       for mode in ('multiple', 'once', 'always_last')},
+    }
+    emulator.cleanup()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+# benchmarks/bench_osc.py - OSC load generator: fader streams from several surfaces at once
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_osc                              # in-process server, full report
+#   python -m benchmarks.bench_osc --target 127.0.0.1:9000      # load a running app.py --osc
+#
+# Each surface is a thread with its own UDP socket that owns 8 faders. It
+# streams fader moves at a fixed rate, and one packet in --bundle-every is a
+# bundle (mute, solo and fader on one strip). A probe surface moves the last
+# track every 10 ms and times the move to the mixer state. The in-process
+# report has packets lost, messages applied per second, batches, coalescing,
+# MIDI on the wire, probe latency, and whether every fader ended on the last
+# value its surface sent.
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from addresses import parse_address
+from benchmarks.common import percentiles
+from osc_server import encode_bundle, encode_message
+
+TRACKS_PER_SURFACE = 8
+
+
+def surface(target, n, rate, seconds, bundle_every, last_sent, counts):
+    """Stream fader moves over this surface's tracks at rate messages/s"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    first = n * TRACKS_PER_SURFACE
+    start = time.perf_counter()
+    i = 0
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            break
+        # Catch up in a burst when behind, as a surface's network stack would
+        due = int(elapsed * rate)
+        while i < due:
+            track = first + i % TRACKS_PER_SURFACE
+            value = (i % 1000) / 999
+            if bundle_every and i % bundle_every == 0:
+                packet = encode_bundle([encode_message(f'/track/{track + 1}/mute', i % 2),
+                                        encode_message(f'/track/{track + 1}/solo', 0),
+                                        encode_message(f'/track/{track + 1}/fader', value)])
+            else:
+                packet = encode_message(f'/track/{track + 1}/fader', value)
+            sock.sendto(packet, target)
+            last_sent[track] = value
+            counts[n] += 1
+            i += 1
+        time.sleep(0.001)
+    sock.close()
+
+
+def probe(target, track, seconds, mixer, latencies):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    end = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < end:
+        value = (i % 2) * 0.5 + (i % 97) / 400
+        start = time.perf_counter()
+        sock.sendto(encode_message(f'/track/{track + 1}/fader', value), target)
+        while abs(mixer.get('fader', track) - value) > 1e-6:
+            if time.perf_counter() - start > 1.0:
+                break
+            time.sleep(0.0001)
+        else:
+            latencies.append(time.perf_counter() - start)
+        i += 1
+        time.sleep(0.01)
+    sock.close()
+
+
+def generate(target, surfaces, rate, seconds, bundle_every, mixer=None, probe_track=None):
+    last_sent = {}
+    counts = [0] * surfaces
+    latencies = []
+    threads = [threading.Thread(target=surface, args=(target, n, rate, seconds, bundle_every, last_sent, counts))
+               for n in range(surfaces)]
+    if mixer is not None:
+        threads.append(threading.Thread(target=probe, args=(target, probe_track, seconds, mixer, latencies)))
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {
+        'sent': sum(counts),
+        'sent_per_s': round(sum(counts) / (time.perf_counter() - start)),
+        'last_sent': last_sent,
+        'latencies': latencies,
+        'cpu_s': time.process_time() - cpu,
+    }
+
+
+def in_process(surfaces, rate, seconds, bundle_every):
+    from benchmarks.bench_batch import build_emulator
+    from osc_server import OscServer
+
+    os.environ['MIXER_TRACKS'] = str((surfaces + 1) * TRACKS_PER_SURFACE)
+    emulator = build_emulator()
+    server = OscServer(emulator)
+    target = server.serve('127.0.0.1:0')
+    probe_track = emulator.mixer.track_count - 1
+
+    load = generate(target, surfaces, rate, seconds, bundle_every, emulator.mixer, probe_track)
+    # Wait for the socket to drain
+    seen = -1
+    while server.stats['packets'] != seen:
+        seen = server.stats['packets']
+        time.sleep(0.2)
+    emulator.midi_out.flush(timeout=5)
+    stale = sum(1 for track, value in load['last_sent'].items()
+                if abs(emulator.mixer.get('fader', track) - value) > 1e-6)
+    stats = dict(server.stats)
+    probes = len(load['latencies'])
+    report = {
+        'surfaces': surfaces,
+        'rate_per_surface': rate,
+        'sent_per_s': load['sent_per_s'],
+        'packets_received': stats['packets'] - probes,
+        'packets_lost': load['sent'] - (stats['packets'] - probes),
+        'messages_applied_per_s': round((stats['messages'] - stats['coalesced']) / seconds),
+        'batches': stats['batches'],
+        'bundles': stats['bundles'],
+        'coalesced': stats['coalesced'],
+        'errors': stats['errors'],
+        'midi_enqueued': emulator.midi_out.stats['enqueued'],
+        'midi_sent': len(emulator.midi_out.port.messages),
+        'faders_not_on_last_value': stale,
+        'probe_to_state_ms': percentiles(load['latencies']),
+        'process_cpu_share': round(load['cpu_s'] / seconds, 3),
+    }
+    server.shutdown()
+    emulator.cleanup()
+    sys.modules.pop('app', None)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSC front end load generator and benchmark")
+    parser.add_argument('--target', help="host:port of a running server; only generates load")
+    parser.add_argument('--surfaces', type=int, default=4)
+    parser.add_argument('--rates', default='500,2000,8000', help="fader messages/s per surface, comma separated")
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--bundle-every', type=int, default=50, help="one packet in N is a bundle (0 = never)")
+    args = parser.parse_args()
+
+    rates = [int(r) for r in args.rates.split(',')]
+    if args.target:
+        target = parse_address(args.target)
+        report = []
+        for rate in rates:
+            load = generate(target, args.surfaces, rate, args.seconds, args.bundle_every)
+            report.append({'surfaces': args.surfaces, 'rate_per_surface': rate,
+                           'sent': load['sent'], 'sent_per_s': load['sent_per_s']})
+        print(json.dumps(report, indent=2))
+        return
+
+    os.chdir(tempfile.mkdtemp(prefix='bench_osc_'))
+    report = [in_process(args.surfaces, rate, args.seconds, args.bundle_every) for rate in rates]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
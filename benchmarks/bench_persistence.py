@@ -0,0 +1,91 @@
+# benchmarks/bench_persistence.py - Synchronous save_state vs write-behind StateStore during a fader drag
+#
+# Run from the repository root:  python -m benchmarks.bench_persistence
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import percentiles
+from persistence import StateStore
+
+
+def make_state(tracks):
+    return {
+        'tracks': [{'name': f'Track {i+1}', 'fader': 0.5, 'muted': False, 'solo': False}
+                   for i in range(tracks)],
+        'plugins': ['Blue Cat PatchWork'],
+        'transport': {'playing': False, 'recording': False},
+        'settings': {'audio_sample_rate': 44100, 'buffer_size': 512},
+    }
+
+
+def drag_values(events):
+    return [0.5 + 0.4 * (i / max(events - 1, 1)) for i in range(events)]
+
+
+def run_sync(path, state, events, interval):
+    """The original save_state: full json.dump on the request thread for every change"""
+    latencies = []
+    start = time.perf_counter()
+    for value in drag_values(events):
+        t = time.perf_counter()
+        state['tracks'][0]['fader'] = value
+        with open(path, 'w') as f:
+            json.dump(state, f, indent=2)
+        latencies.append(time.perf_counter() - t)
+        time.sleep(interval)
+    elapsed = time.perf_counter() - start
+    return latencies, events, elapsed
+
+
+def run_store(path, state, events, interval, delay, journal):
+    store = StateStore(path, snapshot=lambda: state, delay=delay,
+                       journal_path=path + '.journal' if journal else None)
+    latencies = []
+    start = time.perf_counter()
+    for value in drag_values(events):
+        t = time.perf_counter()
+        state['tracks'][0]['fader'] = value
+        store.save(('tracks', 0, 'fader'), value)
+        latencies.append(time.perf_counter() - t)
+        time.sleep(interval)
+    store.close()
+    elapsed = time.perf_counter() - start
+    writes = store.stats['snapshot_writes'] + store.stats['journal_writes']
+    with open(path) as f:
+        assert json.load(f)['tracks'][0]['fader'] == state['tracks'][0]['fader']
+    return latencies, writes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session persistence benchmark")
+    parser.add_argument('--events', type=int, default=300, help="slider change events in the drag")
+    parser.add_argument('--rate', type=float, default=60.0, help="change events per second")
+    parser.add_argument('--tracks', type=int, default=16)
+    parser.add_argument('--delay', type=float, default=0.25)
+    args = parser.parse_args()
+
+    interval = 1.0 / args.rate
+    report = {'events': args.events, 'event_rate_hz': args.rate}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'faderport_data.json')
+        for name, run in (
+            ('sync_save_state', lambda: run_sync(path, make_state(args.tracks), args.events, interval)),
+            ('write_behind', lambda: run_store(path, make_state(args.tracks), args.events, interval,
+                                               args.delay, False)),
+            ('write_behind_journal', lambda: run_store(path, make_state(args.tracks), args.events, interval,
+                                                       args.delay, True)),
+        ):
+            latencies, writes, elapsed = run()
+            report[name] = {
+                'request_latency_ms': percentiles(latencies),
+                'file_writes': writes,
+                'writes_per_second': round(writes / elapsed, 2),
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+# benchmarks/bench_pipeline.py - End-to-end voice -> MIDI and voice -> chat latency
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_pipeline --output results.json
+#   python -m benchmarks.bench_pipeline --wav-dir recordings/ --recognizer sphinx
+#   python -m benchmarks.bench_pipeline --compare results.json
+#
+# Drives FaderPortEmulator.record_voice_gradio -> daw_control -> midi_out and
+# music_theory_chat. The MIDI ports, the recognizer and the transformer
+# pipeline are local stand-ins with configurable delays, so only this repo's
+# own code is measured. WAV directories use the same transcript rules as
+# bench_sphinx.
+import argparse
+import collections
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import mido
+import numpy as np
+
+import app
+from benchmarks.common import FakeMidiInput, FakeMidiPort, percentiles, synth_utterance
+from inference import InferenceService
+from midi_engine import echo_key
+from recognition import CircuitBreaker, RecognitionEngine
+
+COMMANDS = [
+    "play", "stop", "record", "solo track 3", "mute track 5", "unmute track 5",
+    "set fader 1 to 75", "fader 3 to 50", "set fader sixteen to one hundred",
+]
+QUESTIONS = ["what is a ii-v-i progression", "which modes work over a minor seventh chord"]
+
+
+class Recorder:
+    """Collects per-stage durations and ties each MIDI message back to the call that sent it"""
+
+    def __init__(self):
+        self.stages = collections.defaultdict(list)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.waiting = collections.defaultdict(list)
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.stages[stage].append(seconds)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return timed
+
+    def enqueued(self, msg, done):
+        with self.lock:
+            self.waiting[echo_key(msg)].append((time.perf_counter(), done))
+
+    def delivered(self, msg):
+        """A coalesced message is superseded, so the wire send of its key satisfies every waiter"""
+        now = time.perf_counter()
+        with self.lock:
+            waiters = self.waiting.pop(echo_key(msg), [])
+        for enqueued, done in waiters:
+            self.add('midi_queue', now - enqueued)
+            done.set()
+
+    def report(self):
+        return {stage: dict(percentiles(times), n=len(times)) for stage, times in sorted(self.stages.items())}
+
+
+class WirePort(FakeMidiPort):
+    """Output port stand-in that records enqueue -> wire time and keeps no message history"""
+
+    def __init__(self, recorder, send_cost):
+        super().__init__(send_cost)
+        self.recorder = recorder
+        self.name = 'Fake MIDI Out'
+
+    def send(self, msg):
+        if self.send_cost:
+            time.sleep(self.send_cost)
+        self.recorder.delivered(msg)
+
+
+def load_wavs(wav_dir):
+    """[(transcript, (rate, int16 array))] using transcripts.tsv or the file names"""
+    transcripts = {}
+    tsv = os.path.join(wav_dir, 'transcripts.tsv')
+    if os.path.exists(tsv):
+        with open(tsv) as f:
+            for line in f:
+                name, _, text = line.rstrip('\n').partition('\t')
+                transcripts[name] = text
+    samples = []
+    for name in sorted(os.listdir(wav_dir)):
+        if not name.lower().endswith('.wav'):
+            continue
+        with wave.open(os.path.join(wav_dir, name), 'rb') as wf:
+            frames = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            if wf.getnchannels() > 1:
+                frames = frames.reshape(-1, wf.getnchannels())
+            rate = wf.getframerate()
+        text = transcripts.get(name, os.path.splitext(name)[0].replace('_', ' '))
+        samples.append((text.lower(), (rate, frames)))
+    return samples
+
+
+def synthetic_samples(rate=48000):
+    signal, _ = synth_utterance(rate)
+    # Gradio delivers stereo from most browsers
+    stereo = np.stack([signal, signal], axis=1)
+    return [(text, (rate, stereo)) for text in COMMANDS]
+
+
+def build_emulator(recorder, args, max_workers):
+    """A FaderPortEmulator wired to stand-in ports, recognizer and chat model"""
+    sys.modules['pyaudio'] = None  # no microphone; the Gradio path is what we drive
+    mido.open_output = lambda name=None, **kwargs: WirePort(recorder, args.midi_cost_ms / 1000)
+    mido.open_input = lambda name=None, **kwargs: FakeMidiInput(name or 'Fake MIDI In')
+
+    emulator = app.FaderPortEmulator()
+    engine_send_many = emulator.midi_out.send_many
+
+    def send_many(messages):
+        messages = list(messages)
+        done = getattr(recorder.local, 'midi_done', None)
+        if done is not None and messages:
+            for msg in messages:
+                recorder.enqueued(msg, done)
+            recorder.local.midi_sent = True
+        engine_send_many(messages)
+    # send() goes through send_many() too
+    emulator.midi_out.send_many = send_many
+
+    # Stand-in recognizer: returns the transcript attached to the audio after a fixed delay
+    ingest = app.audio_data_from_array
+
+    def audio_data_from_array(sample_rate, array, **cleaning):
+        audio = ingest(sample_rate, array, **cleaning)
+        audio.transcript = recorder.local.transcript
+        return audio
+
+    def scripted(audio):
+        time.sleep(args.recognize_ms / 1000)
+        return audio.transcript
+
+    app.audio_data_from_array = recorder.wrap('ingest', audio_data_from_array)
+    emulator.recognition.shutdown()
+    if args.recognizer == 'sphinx' and emulator.sphinx:
+        backend = ('sphinx', emulator.sphinx.recognize, CircuitBreaker())
+    else:
+        backend = ('stub', scripted, CircuitBreaker())
+    emulator.recognition = RecognitionEngine([backend], budget=5.0, max_workers=max_workers)
+    emulator.recognize_audio = recorder.wrap('recognize', emulator.recognize_audio)
+
+    # Stand-in transformer pipeline: fixed cost per batch plus per prompt
+    def chat_model(prompts):
+        time.sleep((args.chat_ms + args.chat_per_prompt_ms * len(prompts)) / 1000)
+        return [f"answer to {p}" for p in prompts]
+
+    emulator.inference = InferenceService(chat_model)
+    emulator.transformer_initialized = True
+    return emulator
+
+
+def voice_to_midi(emulator, recorder, transcript, audio):
+    recorder.local.transcript = transcript
+    done = threading.Event()
+    recorder.local.midi_done = done
+    recorder.local.midi_sent = False
+    start = time.perf_counter()
+    text = emulator.record_voice_gradio(audio)
+    dispatch_start = time.perf_counter()
+    response = emulator.daw_control(text)
+    recorder.add('dispatch', time.perf_counter() - dispatch_start)
+    # Total is audio in -> first message on the wire (or the reply, for errors)
+    if recorder.local.midi_sent:
+        done.wait(timeout=2.0)
+    recorder.add('total_voice_to_midi', time.perf_counter() - start)
+    recorder.local.midi_done = None
+    return text, response
+
+
+def voice_to_chat(emulator, recorder, question, audio):
+    recorder.local.transcript = question
+    start = time.perf_counter()
+    text = emulator.record_voice_gradio(audio)
+    chat_start = time.perf_counter()
+    response = emulator.music_theory_chat(text)
+    recorder.add('chat', time.perf_counter() - chat_start)
+    recorder.add('total_voice_to_chat', time.perf_counter() - start)
+    return text, response
+
+
+def run_phase(emulator, recorder, samples, iterations, concurrency, chat_every):
+    totals_before = sum(len(v) for k, v in recorder.stages.items() if k.startswith('total_'))
+    chat_audio = samples[0][1]
+    mismatches = []
+
+    def one(i):
+        if chat_every and i % chat_every == 0:
+            voice_to_chat(emulator, recorder, QUESTIONS[i % len(QUESTIONS)], chat_audio)
+            return
+        transcript, audio = samples[i % len(samples)]
+        text, _ = voice_to_midi(emulator, recorder, transcript, audio)
+        if text != transcript:
+            mismatches.append({'expected': transcript, 'got': text})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(iterations)))
+    elapsed = time.perf_counter() - start
+    calls = sum(len(v) for k, v in recorder.stages.items() if k.startswith('total_')) - totals_before
+    return {'concurrency': concurrency, 'calls': calls, 'elapsed_s': round(elapsed, 3),
+            'throughput_per_s': round(calls / elapsed, 1), 'recognition_mismatches': mismatches[:10]}
+
+
+def settle(emulator):
+    """Let the background writers go idle so in-flight buffers are not counted as growth"""
+    emulator.midi_out.flush(timeout=2.0)
+    emulator.state_store.flush()
+    gc.collect()
+
+
+def memory_growth(emulator, recorder, samples, iterations, chat_every):
+    """Run a long single-caller loop under tracemalloc and report retained growth"""
+    run_phase(emulator, recorder, samples, min(200, iterations), 1, chat_every)
+    settle(emulator)
+    tracemalloc.start(10)
+    # The harness's own bookkeeping (stage timings) grows by design; leave it out
+    harness = [tracemalloc.Filter(False, os.path.join('*', 'benchmarks', '*'))]
+    before = tracemalloc.take_snapshot().filter_traces(harness)
+    run_phase(emulator, recorder, samples, iterations, 1, chat_every)
+    settle(emulator)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot().filter_traces(harness)
+    tracemalloc.stop()
+    growth = sum(s.size_diff for s in after.compare_to(before, 'filename'))
+    top = after.compare_to(before, 'lineno')[:5]
+    return {
+        'iterations': iterations,
+        'growth_kb': round(growth / 1024, 1),
+        'growth_bytes_per_call': round(growth / iterations, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'top_growth_sites': [{'site': str(s.traceback[0]), 'kb': round(s.size_diff / 1024, 1)} for s in top],
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(current, baseline_path):
+    """Per-stage percentile change against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    deltas = {}
+    for stage, now in current['stages_ms'].items():
+        before = baseline.get('stages_ms', {}).get(stage)
+        if not before:
+            continue
+        deltas[stage] = {
+            p: {'before': before[p], 'after': now[p],
+                'change_pct': round(100 * (now[p] - before[p]) / before[p], 1) if before[p] else None}
+            for p in ('p50', 'p95', 'p99') if before.get(p) is not None and now.get(p) is not None
+        }
+    return {'baseline': baseline_path, 'baseline_revision': baseline.get('meta', {}).get('revision'),
+            'stages': deltas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end voice pipeline latency benchmark")
+    parser.add_argument('--wav-dir', help="replay recorded command WAVs instead of synthetic audio")
+    parser.add_argument('--recognizer', choices=['stub', 'sphinx'], default='stub',
+                        help="stub returns the transcript after --recognize-ms; sphinx decodes for real")
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--concurrency', default='1,4,16', help="concurrent caller counts")
+    parser.add_argument('--chat-every', type=int, default=10, help="every Nth call is a chat question (0 = none)")
+    parser.add_argument('--memory-iterations', type=int, default=2000, help="0 skips the memory run")
+    parser.add_argument('--recognize-ms', type=float, default=20.0)
+    parser.add_argument('--chat-ms', type=float, default=50.0)
+    parser.add_argument('--chat-per-prompt-ms', type=float, default=5.0)
+    parser.add_argument('--midi-cost-ms', type=float, default=0.3)
+    parser.add_argument('--output', help="write the JSON results here as well as to stdout")
+    parser.add_argument('--compare', help="earlier --output file to diff percentiles against")
+    args = parser.parse_args()
+
+    samples = load_wavs(args.wav_dir) if args.wav_dir else synthetic_samples()
+    if not samples:
+        parser.error(f"no WAV files in {args.wav_dir}")
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    workdir = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    os.chdir(workdir.name)  # session state and chat log land in the scratch directory
+    try:
+        recorder = Recorder()
+        emulator = build_emulator(recorder, args, max(levels))
+        throughput = [run_phase(emulator, recorder, samples, args.iterations, c, args.chat_every) for c in levels]
+        stages = recorder.report()
+        memory = (memory_growth(emulator, recorder, samples, args.memory_iterations, args.chat_every)
+                  if args.memory_iterations else None)
+        midi_stats = dict(emulator.midi_out.stats)
+        emulator.cleanup()
+    finally:
+        os.chdir(cwd)
+        workdir.cleanup()
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+            'samples': len(samples),
+        },
+        'stages_ms': stages,
+        'throughput': throughput,
+        'memory': memory,
+        'midi_engine': midi_stats,
+    }
+    if args.compare:
+        results['comparison'] = compare(results, args.compare)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_ramps.py - Tick jitter and CPU cost of 16 fader ramps running together
+#
+# Run from the repository root:  python -m benchmarks.bench_ramps
+import argparse
+import json
+import time
+
+from benchmarks.common import FakeMidiPort, percentiles
+from midi_engine import MidiOutputEngine
+from mixer import MidiAddressMap
+from ramps import RampScheduler
+
+
+def run(tracks, duration, rate_hz, high_res):
+    port = FakeMidiPort()
+    engine = MidiOutputEngine(port, max_rate=0)
+    done = []
+    scheduler = RampScheduler(engine.send, rate_hz=rate_hz,
+                              address_map=MidiAddressMap(tracks, high_res=high_res),
+                              on_done=lambda track, value: done.append(track))
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for track in range(tracks):
+        scheduler.start_ramp(track, 0.0, 1.0, duration)
+    while len(done) < tracks:
+        time.sleep(0.01)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    engine.flush(timeout=5)
+    scheduler.shutdown()
+    engine.close()
+
+    positions = {}
+    for _, msg in port.messages:
+        key = msg.channel if high_res else msg.control
+        positions.setdefault(key, set()).add(msg.pitch if high_res else msg.value)
+    return {
+        'ticks': scheduler.stats['ticks'],
+        'tick_jitter_ms': percentiles(list(scheduler.jitter), points=(50, 95, 99, 100)),
+        'messages_sent': len(port.messages),
+        'distinct_positions_per_track': min(len(p) for p in positions.values()),
+        'cpu_percent': round(100 * cpu / wall, 2),
+        'wall_s': round(wall, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fader ramp scheduler benchmark")
+    parser.add_argument('--tracks', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=4.0, help="ramp length in seconds")
+    parser.add_argument('--rates', default='100,200,500', help="scheduler rates in Hz")
+    args = parser.parse_args()
+
+    report = {}
+    for rate in (float(r) for r in args.rates.split(',')):
+        for resolution, high_res in (('7bit', False), ('14bit', True)):
+            report[f'{rate:g}hz_{resolution}'] = run(args.tracks, args.duration, rate, high_res)
+    print(json.dumps({'tracks': args.tracks, 'ramp_seconds': args.duration, 'runs': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_recognition.py - Sequential fallback vs racing RecognitionEngine
+#
+# Run from the repository root:  python -m benchmarks.bench_recognition
+import argparse
+import json
+import time
+
+import speech_recognition as sr
+
+from benchmarks.common import FakeRecognizer, percentiles
+from recognition import CircuitBreaker, RecognitionEngine
+
+SCENARIOS = {
+    # name: (remote delay, remote mode, local delay)
+    'remote_healthy': (0.30, 'ok', 0.40),
+    'remote_slow': (4.00, 'ok', 0.40),
+    'remote_down': (5.00, 'down', 0.40),
+}
+
+
+def sequential(remote, local, audio):
+    """The original recognize_google -> recognize_sphinx fallback"""
+    try:
+        return remote.recognize(audio)
+    except (sr.UnknownValueError, sr.RequestError):
+        return local.recognize(audio)
+
+
+def run(scenario, utterances, budget):
+    remote_delay, remote_mode, local_delay = SCENARIOS[scenario]
+    report = {}
+
+    remote, local = FakeRecognizer('play', remote_delay, remote_mode), FakeRecognizer('play', local_delay)
+    times = []
+    for _ in range(utterances):
+        start = time.perf_counter()
+        sequential(remote, local, None)
+        times.append(time.perf_counter() - start)
+    report['sequential_ms'] = percentiles(times)
+
+    remote, local = FakeRecognizer('play', remote_delay, remote_mode), FakeRecognizer('play', local_delay)
+    engine = RecognitionEngine([
+        ('remote', remote.recognize, CircuitBreaker(failure_threshold=2, reset_timeout=60)),
+        ('local', local.recognize, None),
+    ], budget=budget, max_workers=4 * utterances)
+    times, winners = [], {}
+    for _ in range(utterances):
+        start = time.perf_counter()
+        _, name = engine.recognize(None)
+        times.append(time.perf_counter() - start)
+        winners[name] = winners.get(name, 0) + 1
+    engine.shutdown()
+    report['racing_ms'] = percentiles(times)
+    report['racing_winners'] = winners
+    report['remote_calls'] = remote.calls
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognizer racing benchmark")
+    parser.add_argument('--utterances', type=int, default=6)
+    parser.add_argument('--budget', type=float, default=1.0)
+    args = parser.parse_args()
+    results = {name: run(name, args.utterances, args.budget) for name in SCENARIOS}
+    print(json.dumps({'budget_s': args.budget, 'scenarios': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_sphinx.py - Warm grammar decoder vs free-form recognize_sphinx
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_sphinx --wav-dir recordings/
+#
+# Each WAV's transcript comes from transcripts.tsv in the same directory
+# ("file.wav<TAB>set fader 1 to 75") or, failing that, from the file name
+# with underscores as spaces (set_fader_1_to_75.wav). Without --wav-dir only
+# decode time is measured, on synthetic noise.
+import argparse
+import json
+import os
+import time
+import wave
+
+import numpy as np
+import speech_recognition as sr
+
+from benchmarks.common import percentiles
+from commands import words_to_digits
+from sphinx_decoder import SphinxDecoderPool
+
+
+def load_samples(wav_dir):
+    transcripts = {}
+    tsv = os.path.join(wav_dir, 'transcripts.tsv')
+    if os.path.exists(tsv):
+        with open(tsv) as f:
+            for line in f:
+                name, _, text = line.rstrip('\n').partition('\t')
+                transcripts[name] = text
+    samples = []
+    for name in sorted(os.listdir(wav_dir)):
+        if not name.lower().endswith('.wav'):
+            continue
+        with wave.open(os.path.join(wav_dir, name), 'rb') as wf:
+            audio = sr.AudioData(wf.readframes(wf.getnframes()), wf.getframerate(), wf.getsampwidth())
+        text = transcripts.get(name, os.path.splitext(name)[0].replace('_', ' '))
+        samples.append((audio, words_to_digits(text.lower())))
+    return samples
+
+
+def word_errors(reference, hypothesis):
+    """Levenshtein distance over words"""
+    ref, hyp = reference.split(), hypothesis.split()
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1], len(ref)
+
+
+def measure(name, recognize, samples):
+    times, errors, words = [], 0, 0
+    for audio, reference in samples:
+        start = time.perf_counter()
+        try:
+            text = words_to_digits(recognize(audio).lower())
+        except sr.UnknownValueError:
+            text = ''
+        except Exception as e:
+            return {'error': f"{name}: {e}"}
+        times.append(time.perf_counter() - start)
+        if reference is not None:
+            e, n = word_errors(reference, text)
+            errors, words = errors + e, words + n
+    report = {'decode_ms': percentiles(times)}
+    if words:
+        report['word_accuracy'] = round(1 - errors / words, 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PocketSphinx decode time and accuracy benchmark")
+    parser.add_argument('--wav-dir')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.wav_dir:
+        samples = load_samples(args.wav_dir)
+    else:
+        rng = np.random.default_rng(0)
+        noise = rng.normal(0, 300, 16000 * 2).astype(np.int16).tobytes()
+        samples = [(sr.AudioData(noise, 16000, 2), None)] * args.runs
+
+    pool = SphinxDecoderPool(size=1)
+    recognizer = sr.Recognizer()
+    report = {
+        'samples': len(samples),
+        'warm_load_s': round(pool.load_seconds, 3),
+        'warm_grammar': measure('warm_grammar', pool.recognize, samples),
+        'free_form_recognize_sphinx': measure('recognize_sphinx', recognizer.recognize_sphinx, samples),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_startup.py - Startup time and peak memory for full vs DAW-only launch
+#
+# Run from the repository root (needs the real dependencies installed):
+#   python -m benchmarks.bench_startup
+# Each mode runs in a fresh interpreter so import costs are measured cold.
+import argparse
+import json
+import subprocess
+import sys
+
+CHILD = r"""
+import json, sys, time
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # Windows: fall back to psutil when it is installed
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2**20
+        except Exception:
+            return None
+    scale = 2**20 if sys.platform == 'darwin' else 2**10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+speech_recognition_at_import = 'speech_recognition' in sys.modules
+emulator = app.FaderPortEmulator(daw_only={daw_only})
+demo = emulator.create_interface()
+ui_ready = time.perf_counter()
+report = {{
+    'import_s': imported - start,
+    'speech_recognition_imported_by_import': speech_recognition_at_import,
+    'ui_ready_s': ui_ready - start,
+    'peak_rss_mb_at_ui_ready': peak_rss_mb(),
+    'torch_imported_at_ui_ready': 'torch' in sys.modules,
+    'transformers_imported_at_ui_ready': 'transformers' in sys.modules,
+}}
+if {wait_model}:
+    thread = emulator.start_model_warmup()
+    if thread is not None:
+        thread.join()
+    report['model_ready_s'] = time.perf_counter() - start
+    report['model_loaded'] = emulator.transformer_initialized
+    report['peak_rss_mb_after_model'] = peak_rss_mb()
+emulator.cleanup()
+print(json.dumps(report))
+"""
+
+
+def run_mode(daw_only, wait_model):
+    code = CHILD.format(daw_only=daw_only, wait_model=wait_model)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time and memory benchmark")
+    parser.add_argument('--skip-model', action='store_true', help="don't wait for the chat model in full mode")
+    args = parser.parse_args()
+    report = {
+        'daw_only': run_mode(True, False),
+        'full': run_mode(False, not args.skip_model),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
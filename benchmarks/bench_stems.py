@@ -0,0 +1,190 @@
+# benchmarks/bench_stems.py - Stem separation real-time factor and peak memory vs file length and workers
+#
+# Run from the repository root:  python -m benchmarks.bench_stems
+#
+# Writes a synthetic stereo mix per length, built block by block so the
+# generator never holds the whole track: a centre-panned vibrato voice, a
+# kick/hat pattern, bass notes and a pad panned to the sides. Each
+# (length, workers) pair runs in a fresh subprocess. Peak RSS is read from
+# /proc (VmHWM; Linux only; ru_maxrss would carry over from the parent
+# across exec) for that process and for its largest worker. Real-
+# time factor is separation wall time / audio duration (below 1 is faster
+# than real time). A short clip is also scored against its known sources:
+# SDR per stem, and how exactly the stems sum back to the mix.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+from stem_separation import StemSeparator
+
+RATE = 44100
+BLOCK_SECONDS = 5
+
+
+def sources(t):
+    """(vocals, drums, bass, other) as (n, 2) arrays for sample times t"""
+    n = len(t)
+    # Voice: 220-330 Hz notes with 5 Hz vibrato, eight harmonics, syllables at 4 Hz, centre
+    f0 = 220 * 2 ** ((np.floor(t / 1.5) % 5) * 2 / 12)
+    phase = 2 * np.pi * f0 * t - (f0 * 0.02 / 5) * np.cos(2 * np.pi * 5 * t)
+    voice = sum(np.sin(k * phase) / k for k in range(1, 9)) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t) ** 2)
+    vocals = np.repeat((0.15 * voice)[:, None], 2, axis=1)
+    # Kick every 0.5 s, hats between, both centre
+    beat = np.mod(t, 0.5)
+    kick = np.sin(2 * np.pi * 55 * beat) * np.exp(-beat * 18)
+    hat_time = np.mod(t, 0.25)
+    noise = np.random.default_rng(int(t[0] * RATE)).normal(size=n)
+    hats = np.diff(noise, prepend=0) * np.exp(-hat_time * 120) * 0.08
+    drums = np.repeat((0.5 * kick + hats)[:, None], 2, axis=1)
+    # Bass notes every 2 s
+    bass_f = np.array([55.0, 73.42, 82.41, 61.74])[(np.floor(t / 2) % 4).astype(int)]
+    bass = np.repeat((0.3 * np.sin(2 * np.pi * bass_f * t))[:, None], 2, axis=1)
+    # Pad chord, one voice hard left and one hard right
+    other = np.stack([0.08 * (np.sin(2 * np.pi * 261.6 * t) + np.sin(2 * np.pi * 392.0 * t)),
+                      0.08 * (np.sin(2 * np.pi * 329.6 * t) + np.sin(2 * np.pi * 493.9 * t))], axis=1)
+    return vocals, drums, bass, other
+
+
+def blocks(seconds):
+    """Sample times of each block (the hat noise is seeded per block, so always generate through here)"""
+    total = int(seconds * RATE)
+    for start in range(0, total, BLOCK_SECONDS * RATE):
+        yield np.arange(start, min(start + BLOCK_SECONDS * RATE, total)) / RATE
+
+
+def to_pcm(mix):
+    return (np.clip(mix, -1, 1) * 32767).astype('<i2')
+
+
+def write_mix(path, seconds):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        for t in blocks(seconds):
+            wf.writeframes(to_pcm(sum(sources(t))).tobytes())
+
+
+def sdr(reference, estimate):
+    noise = reference - estimate
+    return round(float(10 * np.log10((reference ** 2).sum() / max((noise ** 2).sum(), 1e-12))), 2)
+
+
+def quality(workdir, seconds, preset):
+    path = os.path.join(workdir, 'quality.wav')
+    write_mix(path, seconds)
+    result = StemSeparator('4stems', preset, workers=1).separate(path)
+    parts = [sources(t) for t in blocks(seconds)]
+    refs = {stem: np.concatenate([p[i] for p in parts]) for i, stem in enumerate(('vocals', 'drums', 'bass', 'other'))}
+    # What the 16-bit WAV holds, which is all the stems can sum back to
+    mix = to_pcm(sum(refs.values())) / 32768
+    total = sum(np.asarray(result.stems[stem], dtype=np.float64) for stem in refs)
+    report = {
+        'seconds': seconds,
+        'quality': preset,
+        'sdr_db': {stem: sdr(ref, np.asarray(result.stems[stem])) for stem, ref in refs.items()},
+        'max_sum_error': float(np.abs(total - mix).max()),
+    }
+    result.cleanup()
+    return report
+
+
+def peak_rss_mb(pid='self'):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def child_pids():
+    pids = set()
+    for tid in os.listdir('/proc/self/task'):
+        try:
+            with open(f'/proc/self/task/{tid}/children') as f:
+                pids.update(f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def watch_workers(peaks, stop):
+    """Sample the peak RSS of every child process until stop is set"""
+    while not stop.is_set():
+        for pid in child_pids():
+            peak = peak_rss_mb(pid)
+            if peak:
+                peaks[pid] = max(peaks.get(pid, 0), peak)
+        stop.wait(0.05)
+
+
+def run_one(path, seconds, workers, preset, chunk_seconds):
+    """In a fresh process: separate path and report timings and peak memory"""
+    peaks, stop = {}, threading.Event()
+    watcher = threading.Thread(target=watch_workers, args=(peaks, stop), daemon=True)
+    watcher.start()
+    start = time.perf_counter()
+    result = StemSeparator('4stems', preset, workers=workers, chunk_seconds=chunk_seconds).separate(path)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    watcher.join()
+    report = {
+        'seconds': seconds,
+        'workers': workers,
+        'chunks': result.timings['chunks'],
+        'wall_s': round(elapsed, 2),
+        'decode_s': round(result.timings['decode_s'], 2),
+        'real_time_factor': round(elapsed / result.duration, 4),
+        'input_f32_mb': round(result.frames * result.channels * 4 / 2 ** 20, 1),
+        'main_peak_rss_mb': round(peak_rss_mb(), 1),
+        'worker_peak_rss_mb': round(max(peaks.values()), 1) if peaks else None,
+    }
+    result.cleanup()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stem separation benchmark")
+    parser.add_argument('--lengths', default='30,120,600', help="track lengths in seconds, comma separated")
+    parser.add_argument('--workers', default='1,2,4', help="worker counts, comma separated")
+    parser.add_argument('--quality', default='Balanced', choices=['Fast', 'Balanced', 'High Quality'])
+    parser.add_argument('--chunk-seconds', type=float, default=10.0)
+    parser.add_argument('--quality-seconds', type=float, default=20.0, help="clip length for the SDR check (0 = skip)")
+    parser.add_argument('--one', nargs=2, metavar=('WAV', 'WORKERS'), help=argparse.SUPPRESS)
+    parser.add_argument('--length', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        print(json.dumps(run_one(args.one[0], args.length, int(args.one[1]), args.quality, args.chunk_seconds)))
+        return
+
+    workdir = tempfile.mkdtemp(prefix='bench_stems_')
+    report = {'cpus': os.cpu_count(), 'quality': args.quality, 'chunk_seconds': args.chunk_seconds, 'runs': []}
+    if args.quality_seconds:
+        report['separation'] = quality(workdir, args.quality_seconds, args.quality)
+    for seconds in (float(s) for s in args.lengths.split(',')):
+        path = os.path.join(workdir, f'mix_{int(seconds)}.wav')
+        write_mix(path, seconds)
+        for workers in args.workers.split(','):
+            out = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_stems', '--one', path, workers, '--length', str(seconds),
+                 '--quality', args.quality, '--chunk-seconds', str(args.chunk_seconds)],
+                check=True, capture_output=True, text=True)
+            report['runs'].append(json.loads(out.stdout))
+        os.remove(path)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# benchmarks/bench_streamlit.py - Server cost of one mixer interaction in the Streamlit frontend
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_streamlit
+#   git show HEAD~1:streamlit_app.py > old_streamlit_app.py
+#   python -m benchmarks.bench_streamlit --script old_streamlit_app.py   # compare another revision
+#
+# Drives streamlit_app.py through streamlit.testing's AppTest (needs the
+# streamlit package; no browser or server). Each interaction is timed from the
+# widget event to the end of the rerun it causes, in wall time and in process
+# CPU time, which includes the script thread.
+#
+# AppTest reruns the whole script for every widget event. A browser sends
+# events from inside an st.fragment with that fragment's id, and the server
+# reruns only the fragment. --scope fragment reproduces that: each fragment
+# call's id is recorded, and the rerun request carries the id of the fragment
+# that holds the widget. Scripts without fragments always run in full.
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from benchmarks.common import percentiles
+
+
+def share_script_cache():
+    """A server compiles the script once; AppTest would recompile it on every run"""
+    from streamlit.testing.v1 import local_script_runner
+
+    cache = local_script_runner.ScriptCache()
+    local_script_runner.ScriptCache = lambda: cache
+
+
+def instrument_fragments():
+    """Map (fragment function, args) -> fragment id, and let reruns target one fragment"""
+    import streamlit as st
+    from streamlit.runtime.fragment import MemoryFragmentStorage
+    from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+    from streamlit.testing.v1 import local_script_runner
+
+    ids = {}
+    state = {'last_set': None, 'target': None}
+
+    # Fragment definitions are stored with register() (set() before Streamlit 1.50)
+    method = 'register' if hasattr(MemoryFragmentStorage, 'register') else 'set'
+    original_store = getattr(MemoryFragmentStorage, method)
+
+    def recording_store(self, key, *args, **kwargs):
+        state['last_set'] = key
+        return original_store(self, key, *args, **kwargs)
+    setattr(MemoryFragmentStorage, method, recording_store)
+
+    original_fragment = st.fragment
+
+    def recording_fragment(func=None, **kwargs):
+        if func is None:
+            return lambda f: recording_fragment(f, **kwargs)
+        wrapped = original_fragment(func, **kwargs)
+
+        def call(*args):
+            result = wrapped(*args)
+            ids[(func.__name__, args)] = state['last_set']
+            return result
+        return call
+    st.fragment = recording_fragment
+
+    # Every AppTest run starts a fresh runner whose initial (full) rerun request would swallow a
+    # fragment-scoped one, so both requests are built scoped while a target is set
+    def scoped_rerun_data(**kwargs):
+        if state['target'] is not None:
+            kwargs['fragment_id_queue'] = [state['target']]
+        return RerunData(**kwargs)
+    local_script_runner.RerunData = scoped_rerun_data
+    return ids, state
+
+
+def timed(samples, action):
+    wall, cpu = time.perf_counter(), time.process_time()
+    action()
+    samples['wall'].append(time.perf_counter() - wall)
+    samples['cpu'].append(time.process_time() - cpu)
+
+
+def run(script, rounds, scope, seed=0):
+    from streamlit.testing.v1 import AppTest
+
+    share_script_cache()
+    ids, state = instrument_fragments() if scope == 'fragment' else ({}, {'target': None})
+    at = AppTest.from_file(os.path.abspath(script), default_timeout=60)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    def in_fragment(name, *args):
+        state['target'] = ids.get((name, args))
+
+    def widget(kind, key):
+        """The widget, after an untimed full run if the last (fragment) run did not draw it"""
+        try:
+            return getattr(at, kind)(key=key)
+        except KeyError:
+            target, state['target'] = state['target'], None
+            at.run()
+            state['target'] = target
+            return getattr(at, kind)(key=key)
+
+    rng = np.random.default_rng(seed)
+    samples = {kind: {'wall': [], 'cpu': []} for kind in ('fader', 'mute', 'transport', 'voice_command')}
+    for i in range(rounds):
+        track = int(rng.integers(16))
+        in_fragment('track_strip', track)
+        slider = widget('slider', f'fader_{track}').set_value(round(rng.random(), 2))
+        timed(samples['fader'], slider.run)
+        button = widget('button', f'mute_{track}').click()
+        timed(samples['mute'], button.run)
+        in_fragment('transport_panel')
+        button = widget('button', 'play_btn').click()
+        timed(samples['transport'], button.run)
+        in_fragment(None)
+        widget('text_input', 'voice_input').input(f"set fader {track + 1} to {i % 100}")
+        button = widget('button', 'process_voice').click()
+        timed(samples['voice_command'], button.run)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    report = {'fragments_found': len(ids)} if scope == 'fragment' else {}
+    for kind, s in samples.items():
+        report[kind] = {'wall_ms': percentiles(s['wall']), 'cpu_ms': percentiles(s['cpu'])}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit mixer rerun cost benchmark")
+    parser.add_argument('--script', default='streamlit_app.py')
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--scope', choices=['full', 'fragment'], default='fragment',
+                        help="full: every event reruns the script, as AppTest does; "
+                             "fragment: events inside a fragment rerun only that fragment, as a browser does")
+    args = parser.parse_args()
+
+    report = {'script': args.script, 'scope': args.scope, 'rounds': args.rounds}
+    report.update(run(args.script, args.rounds, args.scope))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
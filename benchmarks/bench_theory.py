@@ -0,0 +1,112 @@
+# benchmarks/bench_theory.py - Retrieval hit rate and latency of the music theory answer index
+#
+# Run from the repository root:  python -m benchmarks.bench_theory
+#
+# Part one scores the TF-IDF index on paraphrased questions (none of them
+# copied from the corpus phrasings) plus off-topic ones that must fall through
+# to the model: hit rate, wrong answers, false accepts and lookup latency.
+# Part two replays a skewed question stream through TheoryAssistant with a
+# stub model of fixed delay and reports where answers came from and the
+# latency of each source. The question set lives in tests/test_theory_index.py
+# (python -m pytest runs it as tests).
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.common import percentiles
+from tests.test_theory_index import QUESTIONS
+from theory_index import TheoryAssistant, TheoryIndex
+
+
+def score_index(index, rounds):
+    hits = wrong = false_accepts = misses = 0
+    details = []
+    for question, expected in QUESTIONS:
+        match = index.search(question)
+        accepted = index.confident(match)
+        topic = match.topic if accepted else None
+        if expected is None:
+            false_accepts += accepted
+        elif topic == expected:
+            hits += 1
+        elif accepted:
+            wrong += 1
+        else:
+            misses += 1
+        if topic != expected:
+            details.append({'question': question, 'expected': expected, 'got': topic,
+                            'score': round(match.score, 3) if match else None,
+                            'margin': round(match.margin, 3) if match else None,
+                            'matched_terms': match.matched if match else None})
+    timings = []
+    for _ in range(rounds):
+        for question, _ in QUESTIONS:
+            start = time.perf_counter()
+            index.lookup(question)
+            timings.append(time.perf_counter() - start)
+    on_topic = sum(1 for _, expected in QUESTIONS if expected is not None)
+    return {
+        'questions': len(QUESTIONS),
+        'on_topic': on_topic,
+        'hit_rate': round(hits / on_topic, 3),
+        'wrong_answers': wrong,
+        'fell_through': misses,
+        'false_accepts': false_accepts,
+        'lookup_ms': percentiles(timings),
+        'mismatches': details,
+    }
+
+
+def replay(stream_length, model_ms, cache_size, seed=0):
+    """Zipf-ish stream over all questions: popular ones repeat, as they do in a session"""
+    assistant = TheoryAssistant(cache_size=cache_size)
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(QUESTIONS) + 1)
+    order = rng.permutation(len(QUESTIONS))
+    picks = rng.choice(order, size=stream_length, p=weights / weights.sum())
+
+    def model(question):
+        time.sleep(model_ms / 1000)
+        return f"generated answer to {question}"
+
+    for i in picks:
+        assistant.answer(QUESTIONS[i][0], generate=model)
+    served = sum(assistant.stats.values())
+    return {
+        'questions': stream_length,
+        'stub_model_ms': model_ms,
+        'answers_by_source': assistant.stats,
+        'model_call_share': round(assistant.stats['model'] / served, 3),
+        'latency_ms': {source: percentiles(list(assistant.latencies[source]))
+                       for source in assistant.stats if assistant.latencies[source]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Music theory answer index benchmark")
+    parser.add_argument('--rounds', type=int, default=200, help="lookup timing passes over the question set")
+    parser.add_argument('--stream', type=int, default=300, help="questions in the replayed session")
+    parser.add_argument('--model-ms', type=float, default=200.0, help="stub model latency")
+    parser.add_argument('--cache-size', type=int, default=256)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = TheoryIndex()
+    build_ms = round((time.perf_counter() - start) * 1000, 3)
+    report = {
+        'topics': len(index.topics),
+        'vocabulary': len(index.term_ids),
+        'build_ms': build_ms,
+        'threshold': index.threshold,
+        'min_terms': index.min_terms,
+        'min_margin': index.min_margin,
+        'index': score_index(index, args.rounds),
+        'session': replay(args.stream, args.model_ms, args.cache_size),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
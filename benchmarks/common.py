@@ -0,0 +1,165 @@
+# benchmarks/common.py - Shared stand-ins and reporting helpers for the benchmarks
+import threading
+import time
+
+import numpy as np
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Return {'p50': ..., ...} in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {f'p{p}': None for p in points}
+    values = np.percentile(np.asarray(samples) * 1000.0, points)
+    return {f'p{p}': round(float(v), 3) for p, v in zip(points, values)}
+
+
+def synth_utterance(rate, speech_seconds=0.6, lead_silence=0.5, tail_silence=1.5, seed=0):
+    """Build an int16 signal: low noise, a voiced burst standing in for a word, then noise"""
+    rng = np.random.default_rng(seed)
+    total = int(rate * (lead_silence + speech_seconds + tail_silence))
+    signal = rng.normal(0, 60, total)
+    start = int(rate * lead_silence)
+    n = int(rate * speech_seconds)
+    t = np.arange(n) / rate
+    voiced = 4000 * np.sin(2 * np.pi * 180 * t) + 1500 * np.sin(2 * np.pi * 720 * t)
+    signal[start:start + n] += voiced * np.hanning(n) ** 0.25
+    return np.clip(signal, -32768, 32767).astype(np.int16), (start + n) / rate
+
+
+class FakeMidiPort:
+    """In-memory stand-in for a mido output port that timestamps every message"""
+
+    def __init__(self, send_cost=0.0):
+        self.messages = []
+        self.send_cost = send_cost
+        self.closed = False
+
+    def send(self, msg):
+        if self.send_cost:
+            time.sleep(self.send_cost)
+        self.messages.append((time.perf_counter(), msg))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeMidiInput:
+    """Stand-in for a mido input port: replays messages into .callback from its own thread"""
+
+    def __init__(self, name='Fake MIDI In'):
+        self.name = name
+        self.callback = None
+        self.closed = False
+        self.lateness = []
+
+    def replay(self, messages, rate=None):
+        """Deliver messages at rate per second (None = as fast as possible); returns the thread"""
+        def run():
+            start = time.perf_counter()
+            for i, msg in enumerate(messages):
+                if rate:
+                    due = start + i / rate
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    self.lateness.append(max(0.0, time.perf_counter() - due))
+                self.callback(msg)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStream:
+    """Plays a prepared int16 signal into a PyAudio-style callback at real-time pace"""
+
+    def __init__(self, signal, rate, frames_per_buffer, stream_callback, realtime=True):
+        self.signal = signal
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.callback = stream_callback
+        self.realtime = realtime
+        self.active = False
+        self.fed_until = 0.0
+        self.t0 = None
+        self.thread = None
+
+    def start_stream(self):
+        self.active = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        t0 = self.t0 = time.perf_counter()
+        n = self.frames_per_buffer
+        for i, offset in enumerate(range(0, len(self.signal) - n + 1, n)):
+            if not self.active:
+                break
+            if self.realtime:
+                # A buffer is only delivered once all of its samples have been "spoken"
+                due = t0 + (offset + n) / self.rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.fed_until = (offset + n) / self.rate
+            _, flag = self.callback(self.signal[offset:offset + n].tobytes(), n, {}, 0)
+            if flag != 0:
+                break
+        self.active = False
+
+    def stop_stream(self):
+        self.active = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def close(self):
+        self.active = False
+
+    def read(self, n, exception_on_overflow=True):
+        raise NotImplementedError("FakeStream only supports callback mode")
+
+
+class FakePyAudio:
+    """Minimal PyAudio stand-in whose input streams replay a fixed signal"""
+
+    def __init__(self, signal, realtime=True):
+        self.signal = signal
+        self.realtime = realtime
+        self.last_stream = None
+
+    def open(self, format=None, channels=1, rate=16000, input=True, frames_per_buffer=1024,
+             input_device_index=None, stream_callback=None):
+        self.last_stream = FakeStream(self.signal, rate, frames_per_buffer, stream_callback, self.realtime)
+        return self.last_stream
+
+    def get_sample_size(self, format):
+        return 2
+
+    def terminate(self):
+        pass
+
+
+class FakeRecognizer:
+    """Recognizer backend stand-in with an artificial delay and optional failure mode
+
+    mode is 'ok', 'unknown' (raises UnknownValueError) or 'down' (raises RequestError).
+    """
+
+    def __init__(self, text, delay, mode='ok'):
+        self.text = text
+        self.delay = delay
+        self.mode = mode
+        self.calls = 0
+
+    def recognize(self, audio):
+        import speech_recognition as sr
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.mode == 'down':
+            raise sr.RequestError("recognition connection failed")
+        if self.mode == 'unknown':
+            raise sr.UnknownValueError()
+        return self.text
@@ -0,0 +1,123 @@
+# chat_log.py - Append-only JSONL chat history with rotation and lazy paging
+import collections
+import glob
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def read_lines_reversed(path, block_size=8192):
+    """Yield the lines of a file from last to first without reading it all into memory"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step) + remainder
+            lines = block.split(b'\n')
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode('utf-8')
+        if remainder:
+            yield remainder.decode('utf-8')
+
+
+class ChatLog:
+    """Chat history that appends one JSON line per turn and keeps a bounded window in memory
+
+    The active file rotates when it exceeds max_bytes or the day changes.
+    Rotated files sit next to it as <name>.<YYYYmmddTHHMMSS><ext>.
+    """
+
+    def __init__(self, path='chat_history.json', max_bytes=5 * 1024 * 1024, window=50, rotate_daily=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.recent = collections.deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.file = None
+        self.opened_on = None
+        self.size = 0
+        self._open()
+        # Seed the in-memory window from the tail of the current file only
+        for line in read_lines_reversed(self.path):
+            if len(self.recent) == self.recent.maxlen:
+                break
+            try:
+                self.recent.appendleft(json.loads(line))
+            except ValueError:
+                continue
+
+    def _open(self):
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.size = self.file.tell()
+        if self.size:
+            self.opened_on = datetime.fromtimestamp(os.path.getmtime(self.path)).date()
+        else:
+            self.opened_on = datetime.now().date()
+
+    def _rotate(self):
+        self.file.close()
+        base, ext = os.path.splitext(self.path)
+        rotated = f"{base}.{datetime.now().strftime('%Y%m%dT%H%M%S%f')}{ext}"
+        os.replace(self.path, rotated)
+        logger.info(f"Rotated chat log to {rotated}")
+        self._open()
+
+    def append(self, user_input, bot_response):
+        """Persist one exchange; cost is independent of how much history exists"""
+        now = datetime.now()
+        record = {'user_input': user_input, 'bot_response': bot_response,
+                  'timestamp': now.isoformat(timespec='seconds')}
+        line = json.dumps(record) + '\n'
+        with self.lock:
+            if self.size and (self.size + len(line) > self.max_bytes or
+                              (self.rotate_daily and now.date() != self.opened_on)):
+                self._rotate()
+            self.file.write(line)
+            self.file.flush()
+            self.size += len(line.encode('utf-8'))
+            self.recent.append(record)
+        return record
+
+    def files_newest_first(self):
+        base, ext = os.path.splitext(self.path)
+        rotated = sorted(glob.glob(glob.escape(base) + '.*' + ext), reverse=True)
+        return [self.path] + [p for p in rotated if p != self.path]
+
+    def page(self, page=0, page_size=20):
+        """Return one page of records, newest first; page 0 is the most recent"""
+        start = page * page_size
+        if start + page_size <= len(self.recent):
+            newest = list(reversed(self.recent))
+            return newest[start:start + page_size]
+        records = []
+        skipped = 0
+        for path in self.files_newest_first():
+            if not os.path.exists(path):
+                continue
+            for line in read_lines_reversed(path):
+                if skipped < start:
+                    skipped += 1
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+                if len(records) == page_size:
+                    return records
+        return records
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
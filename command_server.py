@@ -0,0 +1,189 @@
+# command_server.py - Local command socket for running the emulator headless (python app.py --headless)
+#
+# Send a command from a script, foot pedal or stream deck action:
+#   python command_server.py "mute track 3 and play"
+#   python command_server.py '{"kind": "fader", "track": 1, "value": 75}'
+#   python command_server.py --udp 127.0.0.1:9467 stop
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+
+from dotenv import load_dotenv
+
+from addresses import format_address, parse_address
+
+logger = logging.getLogger(__name__)
+
+# Unix socket where available; Windows Python has no AF_UNIX socketserver, so TCP there
+DEFAULT_ADDRESS = (os.path.join(tempfile.gettempdir(), 'faderport.sock')
+                   if hasattr(socketserver, 'ThreadingUnixStreamServer') else '127.0.0.1:9466')
+MAX_DATAGRAM = 65507
+
+
+class CommandServer:
+    """Drive an emulator's DAW control from a stream socket and/or UDP
+
+    A request is one line on the stream socket, or one datagram:
+      mute tracks 1 through 8 and play                  (text, as if spoken)
+      {"kind": "fader", "track": 3, "value": 75}        (structured, see commands.action_from_dict)
+      [{"kind": "solo", "track": 2}, {"kind": "play"}]  (a structured batch, applied all or nothing)
+    The reply is the result string daw_control gives the UI, as one line or
+    one datagram. The emulator applies commands one batch at a time, whichever
+    connection, the UI or the listener they come from.
+    """
+
+    def __init__(self, emulator):
+        self.emulator = emulator
+        self.servers = []
+
+    def handle(self, line):
+        """Run one request and return its result string"""
+        text = line.strip()
+        if not text:
+            return "Empty command"
+        if text[0] in '{[':
+            try:
+                command = json.loads(text)
+            except ValueError as e:
+                return f"Invalid command JSON: {e}"
+            return self.emulator.structured_control(command)
+        return self.emulator.daw_control(text)
+
+    def _start(self, server_class, target, handler, name):
+        server = server_class(target, handler)
+        threading.Thread(target=server.serve_forever, name=name, daemon=True).start()
+        self.servers.append(server)
+        return server.server_address
+
+    def serve(self, address=DEFAULT_ADDRESS):
+        """Accept line-per-request connections on a Unix socket path or 'host:port' (TCP)"""
+        commands = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    reply = commands.handle(line.decode('utf-8', 'replace'))
+                    self.wfile.write(reply.replace('\n', ' ').encode() + b'\n')
+                    self.wfile.flush()
+
+        target = parse_address(address)
+        if isinstance(target, tuple):
+            base = socketserver.ThreadingTCPServer
+        else:
+            if os.path.exists(target):
+                os.unlink(target)
+            base = socketserver.ThreadingUnixStreamServer
+        server_class = type('CommandStreamServer', (base,), {'allow_reuse_address': True, 'daemon_threads': True})
+        bound = self._start(server_class, target, Handler, 'command-socket')
+        logger.info(f"Command socket on {format_address(bound)}")
+        return bound
+
+    def serve_udp(self, address):
+        """Accept one request per datagram on 'host:port'; each reply goes back to the sender"""
+        commands = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                data, sock = self.request
+                reply = commands.handle(data.decode('utf-8', 'replace'))
+                sock.sendto(reply.encode()[:MAX_DATAGRAM], self.client_address)
+
+        target = parse_address(address)
+        if not isinstance(target, tuple):
+            raise ValueError(f"UDP address must be host:port, got {address!r}")
+        # Requests are serialized anyway, so one thread reading datagrams is all it takes
+        bound = self._start(socketserver.UDPServer, target, Handler, 'command-udp')
+        logger.info(f"Command UDP on {format_address(bound)}")
+        return bound
+
+    def shutdown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+            if isinstance(server.server_address, str) and os.path.exists(server.server_address):
+                os.unlink(server.server_address)
+        self.servers = []
+
+
+class CommandClient:
+    """Send commands to a CommandServer; keeps one connection (or UDP socket) open between calls"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, udp=False, timeout=5.0):
+        self.address = parse_address(address)
+        self.udp = udp
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+
+    def _connect(self):
+        if self.udp:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.settimeout(self.timeout)
+            self.sock.connect(self.address)
+            return
+        family = socket.AF_INET if isinstance(self.address, tuple) else socket.AF_UNIX
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.address)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+
+    def send(self, command):
+        """Send text or a structured command (dict or list of dicts); returns the result string"""
+        if not isinstance(command, str):
+            command = json.dumps(command)
+        data = command.replace('\n', ' ').encode()
+        try:
+            if self.sock is None:
+                self._connect()
+            if self.udp:
+                self.sock.send(data)
+                return self.sock.recv(MAX_DATAGRAM).decode()
+            self.sock.sendall(data + b'\n')
+            line = self.reader.readline()
+            if not line:
+                raise ConnectionError("command server closed the connection")
+            return line.decode().rstrip('\n')
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        for f in (self.reader, self.sock):
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+        self.sock = None
+        self.reader = None
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Send commands to a headless FaderPort emulator")
+    parser.add_argument('commands', nargs='+', help="text or JSON commands, sent in order")
+    parser.add_argument('--socket', default=os.getenv('COMMAND_SOCKET') or DEFAULT_ADDRESS,
+                        help="Unix socket path or host:port of python app.py --headless")
+    parser.add_argument('--udp', default=None, help="send over UDP to host:port instead")
+    args = parser.parse_args()
+
+    address = args.udp or args.socket
+    client = CommandClient(address, udp=bool(args.udp))
+    try:
+        for command in args.commands:
+            print(client.send(command))
+    except OSError as e:
+        parser.exit(1, f"No headless emulator answering on {address}: {e}\n")
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
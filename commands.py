@@ -0,0 +1,262 @@
+# commands.py - Tokenizing command compiler shared by the Gradio and Streamlit frontends
+import re
+from collections import namedtuple
+
+# A parsed command. track is 0-based; value is 0.0-1.0 for faders, or True/False to set one solo
+# (None solos exclusively, as spoken); duration is seconds for fades;
+# last is the final track (inclusive) of a range like 'mute tracks 1 through 64'
+Action = namedtuple('Action', ['kind', 'track', 'value', 'duration', 'last'], defaults=(None, None))
+
+TRANSPORT_WORDS = ('play', 'stop', 'record')
+TRACK_VERBS = ('solo', 'mute', 'unmute')
+RANGE_VERBS = ('mute', 'unmute')
+RANGE_WORDS = ('through', 'thru', 'to')
+ALL_WORD = 'all'
+RESET_WORD = 'reset'
+# 'mute tracks 1 through 8 and solo 3 then set fader 5 to 60' splits into parts here
+CONJUNCTIONS = ('and', 'then')
+FADER_WORDS = ('fader', 'fade')
+DURATION_WORD = 'over'
+DEFAULT_FADE_SECONDS = 2.0
+MAX_FADE_SECONDS = 600
+
+UNITS = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine']
+TEENS = ['ten', 'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen',
+         'seventeen', 'eighteen', 'nineteen']
+TENS = ['twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety']
+
+NUMBER_WORDS = dict({w: i for i, w in enumerate(UNITS)},
+                    **{w: i + 10 for i, w in enumerate(TEENS)},
+                    **{w: (i + 2) * 10 for i, w in enumerate(TENS)})
+TENS_VALUES = frozenset((i + 2) * 10 for i in range(len(TENS)))
+
+# First command keyword in the utterance decides the action
+DISPATCH = dict({w: 'transport' for w in TRANSPORT_WORDS},
+                **{w: 'track' for w in TRACK_VERBS},
+                **{w: 'fader' for w in FADER_WORDS},
+                **{RESET_WORD: 'reset'})
+
+# Decimals ('over 0.5 seconds', 'to 75.5') stay one number
+TOKEN_RE = re.compile(r'[a-z]+|\d+(?:\.\d+)?|\.\d+')
+
+USAGE = ("play, stop, record, solo track [n], mute track [n], mute tracks [n] through [m], unmute all, "
+         "set fader [n] to [0-100], fade track [n] to [0-100] over [seconds], reset all faders; "
+         "chain commands with 'and'")
+
+
+class CommandError(ValueError):
+    """A command keyword was found but its arguments were invalid"""
+
+
+def tokenize(text):
+    """Split text into words and numbers (ints, or floats for decimals), folding spelled-out numbers ('seventy five' -> 75)"""
+    tokens = []
+    open_tens = False
+    for word in TOKEN_RE.findall(text.lower()):
+        joinable, open_tens = open_tens, False
+        if word[0] in '.0123456789':
+            tokens.append(int(word) if word.isdigit() else float(word))
+            continue
+        value = NUMBER_WORDS.get(word)
+        if value is not None:
+            if joinable and 0 < value < 10:
+                tokens[-1] += value
+            else:
+                tokens.append(value)
+                open_tens = value in TENS_VALUES
+        elif word == 'hundred':
+            if tokens and tokens[-1] in (1, 'a'):
+                tokens[-1] = 100
+            else:
+                tokens.append(100)
+        elif word == 'mute' and tokens and tokens[-1] == 'un':
+            # 'un mute', as recognizers sometimes hear it
+            tokens[-1] = 'unmute'
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def words_to_digits(text):
+    """Normalize a hypothesis so numbers are digits: 'fader seventy five' -> 'fader 75'"""
+    return ' '.join(str(t) for t in tokenize(text))
+
+
+def _numbers(tokens, start):
+    return [t for t in tokens[start:] if isinstance(t, (int, float))]
+
+
+def _track_index(number, track_count, message):
+    """0-based track for a spoken 1-based track number; fractions and out of range raise CommandError"""
+    if number != int(number) or not 1 <= number <= track_count:
+        raise CommandError(message)
+    return int(number) - 1
+
+
+def _parse_transport(verb, tokens, start, track_count):
+    return Action(verb, None, None)
+
+
+def _parse_track(verb, tokens, start, track_count):
+    # 'mute track 5' / 'mute tracks 1 through 64' / 'unmute all'
+    if verb in RANGE_VERBS and ALL_WORD in tokens[start:]:
+        return Action(verb, 0, None, last=track_count - 1)
+    numbers = _numbers(tokens, start)
+    if not numbers:
+        raise CommandError(f"Invalid {verb} command format")
+    track = _track_index(numbers[0], track_count, f"Invalid track number (1-{track_count})")
+    if verb in RANGE_VERBS and len(numbers) > 1 and any(w in tokens[start:] for w in RANGE_WORDS):
+        last = _track_index(numbers[1], track_count, f"Invalid track range (1-{track_count})")
+        if last < track:
+            raise CommandError(f"Invalid track range (1-{track_count})")
+        return Action(verb, track, None, last=last)
+    return Action(verb, track, None)
+
+
+def _parse_fader(verb, tokens, start, track_count):
+    # 'fade track 3 to 20 over 4 seconds' / 'set fader 1 to 75 over 2 seconds'
+    duration = None
+    end = len(tokens)
+    if DURATION_WORD in tokens[start:]:
+        end = tokens.index(DURATION_WORD, start)
+        seconds = _numbers(tokens, end + 1)
+        # 'over 0 seconds' is not a fade; refuse it rather than jump the fader
+        if not seconds or not 0 < seconds[0] <= MAX_FADE_SECONDS:
+            raise CommandError(f"Invalid fade duration (more than 0, up to {MAX_FADE_SECONDS} seconds)")
+        duration = float(seconds[0])
+    elif verb == 'fade':
+        duration = DEFAULT_FADE_SECONDS
+    numbers = _numbers(tokens[:end], start)
+    if len(numbers) < 2:
+        raise CommandError("Invalid fader command format. Try 'set fader 1 to 75'")
+    track = _track_index(numbers[0], track_count, "Invalid fader command format. Try 'set fader 1 to 75'")
+    percent = numbers[1]
+    if not 0 <= percent <= 100:
+        raise CommandError("Invalid fader command format. Try 'set fader 1 to 75'")
+    if duration:
+        return Action('fade', track, percent / 100, duration)
+    return Action('fader', track, percent / 100)
+
+
+def _parse_reset(verb, tokens, start, track_count):
+    # 'reset all faders' / 'reset faders'
+    if not any(w in tokens[start:] for w in FADER_WORDS + ('faders',)):
+        raise CommandError("Invalid reset command format. Try 'reset all faders'")
+    return Action('reset', 0, None, last=track_count - 1)
+
+
+PARSERS = {
+    'transport': _parse_transport,
+    'track': _parse_track,
+    'fader': _parse_fader,
+    'reset': _parse_reset,
+}
+
+
+def _keyword(tokens):
+    return next((t for t in tokens if t in DISPATCH), None)
+
+
+def _parse_tokens(tokens, track_count):
+    for i, token in enumerate(tokens):
+        group = DISPATCH.get(token)
+        if group is not None:
+            return PARSERS[group](token, tokens, i + 1, track_count)
+    return None
+
+
+def _split(tokens):
+    part = []
+    for token in tokens:
+        if token in CONJUNCTIONS:
+            if part:
+                yield part
+            part = []
+        else:
+            part.append(token)
+    if part:
+        yield part
+
+
+def parse_command(text, track_count=16):
+    """Compile recognized text into an Action
+
+    Returns None when no command keyword is present; raises CommandError when
+    a keyword is present but its arguments are missing or out of range.
+    """
+    return _parse_tokens(tokenize(text), track_count)
+
+
+def parse_commands(text, track_count=16):
+    """Compile a compound utterance into a list of Actions, in spoken order
+
+    Parts are separated by 'and'/'then'. Every part is validated before
+    anything is returned, so one bad part raises CommandError for the whole
+    utterance. A part with numbers but no keyword repeats the previous
+    part's keyword ('mute track 1 and 3'). Returns [] when there is no command.
+    """
+    actions = []
+    keyword = None
+    parts = list(_split(tokenize(text)))
+    for part in parts:
+        if _keyword(part) is None and keyword is not None and _numbers(part, 0):
+            part = [keyword] + part
+        try:
+            action = _parse_tokens(part, track_count)
+        except CommandError as e:
+            if len(parts) == 1:
+                raise
+            raise CommandError(f"{e} (in '{' '.join(map(str, part))}')") from None
+        if action is not None:
+            keyword = _keyword(part)
+            actions.append(action)
+    return actions
+
+
+def _track_field(data, field, track_count):
+    value = data.get(field)
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= track_count:
+        raise CommandError(f"Invalid {field} (1-{track_count})")
+    return value - 1
+
+
+def action_from_dict(data, track_count=16):
+    """Compile a structured command into an Action, with the same checks as a spoken one
+
+    Tracks are 1-based and fader values 0-100, as when spoken:
+      {"kind": "play"}
+      {"kind": "mute", "track": 1, "last": 8}      (or "track": "all")
+      {"kind": "fader", "track": 3, "value": 75}   (with "duration": seconds it fades)
+      {"kind": "reset"}
+    """
+    if not isinstance(data, dict):
+        raise CommandError("Structured command must be a JSON object")
+    kind = data.get('kind')
+    if kind in TRANSPORT_WORDS:
+        return Action(kind, None, None)
+    if kind == RESET_WORD:
+        return Action('reset', 0, None, last=track_count - 1)
+    if kind in TRACK_VERBS:
+        if kind in RANGE_VERBS and data.get('track') == ALL_WORD:
+            return Action(kind, 0, None, last=track_count - 1)
+        track = _track_field(data, 'track', track_count)
+        if kind in RANGE_VERBS and data.get('last') is not None:
+            last = _track_field(data, 'last', track_count)
+            if last < track:
+                raise CommandError(f"Invalid track range (1-{track_count})")
+            return Action(kind, track, None, last=last)
+        return Action(kind, track, None)
+    if kind in FADER_WORDS:
+        track = _track_field(data, 'track', track_count)
+        percent = data.get('value')
+        if isinstance(percent, bool) or not isinstance(percent, (int, float)) or not 0 <= percent <= 100:
+            raise CommandError("Invalid fader value (0-100)")
+        duration = data.get('duration', DEFAULT_FADE_SECONDS if kind == 'fade' else None)
+        if duration is not None and (isinstance(duration, bool) or not isinstance(duration, (int, float))
+                                     or not 0 <= duration <= MAX_FADE_SECONDS):
+            raise CommandError(f"Invalid fade duration (0-{MAX_FADE_SECONDS} seconds)")
+        if duration:
+            return Action('fade', track, percent / 100, float(duration))
+        return Action('fader', track, percent / 100)
+    raise CommandError(f"Unknown command kind {kind!r}. Kinds: "
+                       + ", ".join(TRANSPORT_WORDS + TRACK_VERBS + FADER_WORDS + (RESET_WORD,)))
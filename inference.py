@@ -0,0 +1,155 @@
+# inference.py - Off-thread model inference with a bounded queue and micro-batching
+import collections
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """The inference queue is at capacity"""
+
+
+def generated_text(result):
+    """Pull the reply text out of one pipeline result (dict, list of dicts or Conversation)"""
+    if isinstance(result, list):
+        result = result[0] if result else {}
+    if isinstance(result, dict):
+        return result.get('generated_text', '')
+    responses = getattr(result, 'generated_responses', None)
+    if responses:
+        return responses[-1]
+    return str(result)
+
+
+class InferenceService:
+    """A single worker thread that drains a bounded queue and runs prompts in batches
+
+    model_fn takes a list of prompts and returns a list of replies in the same order.
+    Callers get a Future from submit(), or block with a timeout via generate().
+    After taking a request the worker waits up to batch_wait seconds for more.
+    """
+
+    def __init__(self, model_fn, max_queue=64, max_batch=8, batch_wait=0.01, latency_window=1000):
+        self.model_fn = model_fn
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self.requests = queue.Queue(maxsize=max_queue)
+        self.latencies = collections.deque(maxlen=latency_window)
+        self.batch_sizes = collections.deque(maxlen=latency_window)
+        self.counts = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0}
+        self.lock = threading.Lock()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='inference-worker', daemon=True)
+        self.thread.start()
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.counts[key] += n
+
+    def submit(self, prompt):
+        """Queue a prompt; returns a Future, raises QueueFullError when the queue is full"""
+        future = Future()
+        try:
+            self.requests.put_nowait((prompt, future, time.perf_counter()))
+        except queue.Full:
+            self._count('rejected')
+            raise QueueFullError("Inference queue is full")
+        self._count('submitted')
+        return future
+
+    def generate(self, prompt, timeout=None):
+        """Submit and wait; on timeout the request is cancelled if it has not started"""
+        future = self.submit(prompt)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def _next_batch(self):
+        item = self.requests.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.perf_counter() + self.batch_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while self.running:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            # Drop requests whose callers already cancelled or timed out
+            live = [(p, f, t) for p, f, t in batch if f.set_running_or_notify_cancel()]
+            if len(live) < len(batch):
+                self._count('cancelled', len(batch) - len(live))
+            if not live:
+                continue
+            try:
+                replies = self.model_fn([p for p, _, _ in live])
+            except Exception as e:
+                logger.error(f"Inference batch of {len(live)} failed: {e}")
+                for _, future, _ in live:
+                    future.set_exception(e)
+                self._count('failed', len(live))
+                continue
+            replies = list(replies)
+            if len(replies) != len(live):
+                logger.error(f"Inference batch of {len(live)} returned {len(replies)} replies")
+            now = time.perf_counter()
+            for (_, future, submitted), reply in zip(live, replies):
+                future.set_result(reply)
+                self.latencies.append(now - submitted)
+            # Requests the model returned no reply for fail now rather than waiting out their timeout
+            unanswered = live[len(replies):]
+            for _, future, _ in unanswered:
+                future.set_exception(RuntimeError(f"Model returned {len(replies)} replies for {len(live)} prompts"))
+            answered = len(live) - len(unanswered)
+            self.batch_sizes.append(len(live))
+            self._count('completed', answered)
+            if unanswered:
+                self._count('failed', len(unanswered))
+
+    def stats(self):
+        """Queue depth, request counts, latency percentiles (ms) and mean batch size"""
+        latencies = sorted(self.latencies)
+        report = dict(self.counts, queue_depth=self.requests.qsize())
+        for p in (50, 95, 99):
+            report[f'latency_p{p}_ms'] = (
+                round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000, 3)
+                if latencies else None
+            )
+        sizes = list(self.batch_sizes)
+        report['mean_batch_size'] = round(sum(sizes) / len(sizes), 2) if sizes else None
+        return report
+
+    def shutdown(self):
+        self.running = False
+        try:
+            self.requests.put_nowait(None)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=1.0)
+        # Fail anything still waiting so callers do not hang
+        while True:
+            try:
+                item = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].cancel()
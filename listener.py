@@ -0,0 +1,170 @@
+# listener.py - Always-on hands-free listening: VAD -> wake-word spotter -> full recognizer -> command
+import collections
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+from audio_capture import PA_COMPLETE, PA_CONTINUE, PA_INT16, RingBuffer, UtteranceEndpointer, VoiceActivityDetector
+from sphinx_decoder import SphinxDecoderPool
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordSpotter:
+    """Wake-word check for one speech segment using a PocketSphinx keyphrase search"""
+
+    def __init__(self, keyphrase, threshold=1e-20, sample_rate=16000):
+        self.keyphrase = keyphrase
+        self.pool = SphinxDecoderPool(size=1, keyphrase=keyphrase, kws_threshold=threshold,
+                                      sample_rate=sample_rate)
+
+    def __call__(self, pcm):
+        return bool(self.pool.decode(pcm))
+
+
+def strip_wake_phrase(text, phrase):
+    """Drop the wake phrase (and anything before it) from recognized text"""
+    words = text.lower().split()
+    wake = phrase.lower().split()
+    for i in range(len(words) - len(wake) + 1):
+        if words[i:i + len(wake)] == wake:
+            return ' '.join(words[i + len(wake):])
+    return text
+
+
+class ContinuousListener:
+    """Keep one PyAudio callback stream open and turn spoken commands into on_command(text) calls
+
+    The PortAudio callback only runs the energy VAD and the endpointer, so an
+    idle room costs a few NumPy ops per frame. Each finished speech segment is
+    handed to a worker thread. Until the wake phrase is heard, the worker runs
+    only the keyword spotter and drops segments without it. A segment with
+    the wake phrase, or any segment within `window` seconds of the last wake
+    or command, goes to the full recognizer. The resulting text, minus the
+    wake phrase, is passed to on_command. recognize returns None for speech
+    it could not make out; that is counted and dropped, and does not keep the
+    listener awake. observe(seconds), if given, gets the
+    end-of-speech to on_command-returned latency of each command.
+    """
+
+    def __init__(self, p, spotter, recognize, on_command, wake_phrase='', rate=16000, frame_ms=20,
+                 silence_ms=400, preroll_ms=200, max_speech_ms=6000, window=5.0,
+                 input_device_index=None, observe=None, max_pending=8):
+        self.p = p
+        self.spotter = spotter
+        self.recognize = recognize
+        self.on_command = on_command
+        self.wake_phrase = wake_phrase
+        self.rate = rate
+        self.frame_ms = frame_ms
+        self.frame_samples = int(rate * frame_ms / 1000)
+        self.preroll_samples = int(rate * preroll_ms / 1000)
+        self.window = window
+        self.input_device_index = input_device_index
+        self.observe = observe
+        self.vad = VoiceActivityDetector()
+        # Background noise never ends a 'no speech' wait here; the endpointer is just reset
+        self.endpointer = UtteranceEndpointer(frame_ms, silence_ms=silence_ms, max_speech_ms=max_speech_ms,
+                                              no_speech_ms=60000)
+        capacity = int(rate * (max_speech_ms + 2 * preroll_ms + silence_ms) / 1000) + self.frame_samples
+        self.ring = RingBuffer(capacity)
+        self.segment_base = 0
+        self.segments = queue.Queue(maxsize=max_pending)
+        self.awake_until = 0.0
+        self.latencies = collections.deque(maxlen=512)
+        self.stats = {'frames': 0, 'segments': 0, 'dropped': 0, 'rejected': 0, 'wakes': 0,
+                      'unrecognized': 0, 'commands': 0, 'errors': 0}
+        self.stream = None
+        self.worker = None
+        self.running = False
+
+    @property
+    def awake(self):
+        return time.perf_counter() < self.awake_until
+
+    def start(self):
+        self.running = True
+        self.worker = threading.Thread(target=self._run, name='listener', daemon=True)
+        self.worker.start()
+        self.stream = self.p.open(format=PA_INT16, channels=1, rate=self.rate, input=True,
+                                  frames_per_buffer=self.frame_samples,
+                                  input_device_index=self.input_device_index,
+                                  stream_callback=self._callback)
+        self.stream.start_stream()
+        logger.info(f"Hands-free listening started (wake phrase '{self.wake_phrase}')")
+
+    def stop(self):
+        self.running = False
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.worker is not None:
+            self.segments.put(None)
+            self.worker.join(timeout=5.0)
+            self.worker = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """PyAudio callback: VAD and endpointing only, so it never holds up the audio thread"""
+        samples = np.frombuffer(in_data, dtype=np.int16)
+        self.ring.extend(samples)
+        self.stats['frames'] += 1
+        result = self.endpointer.update(self.vad.is_speech(samples))
+        if result is None:
+            return (None, PA_CONTINUE if self.running else PA_COMPLETE)
+        if result == 'speech':
+            now = time.perf_counter()
+            trailing = self.endpointer.frames_seen - 1 - self.endpointer.last_speech_frame
+            end_of_speech = now - trailing * self.frame_ms / 1000
+            start = self.segment_base + self.endpointer.start_frame * self.frame_samples - self.preroll_samples
+            end = self.segment_base + (self.endpointer.last_speech_frame + 1) * self.frame_samples
+            start = max(start, self.ring.oldest_index())
+            pcm = self.ring.read_from(start)[:end - start].tobytes()
+            self.stats['segments'] += 1
+            try:
+                self.segments.put_nowait((pcm, end_of_speech))
+            except queue.Full:
+                self.stats['dropped'] += 1
+        self.endpointer.reset()
+        self.segment_base = self.ring.total_written
+        return (None, PA_CONTINUE if self.running else PA_COMPLETE)
+
+    def _run(self):
+        while True:
+            item = self.segments.get()
+            if item is None:
+                return
+            try:
+                self._handle(*item)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Hands-free command failed: {e}")
+
+    def _handle(self, pcm, end_of_speech):
+        if not self.awake:
+            if not self.spotter(pcm):
+                self.stats['rejected'] += 1
+                return
+            self.stats['wakes'] += 1
+            self.awake_until = time.perf_counter() + self.window
+
+        heard = self.recognize(pcm, self.rate)
+        if heard is None:
+            self.stats['unrecognized'] += 1
+            return
+        text = strip_wake_phrase(heard, self.wake_phrase).strip()
+        if not text or text.lower() == self.wake_phrase.lower():
+            # Wake phrase on its own: stay awake for the command that follows
+            self.awake_until = time.perf_counter() + self.window
+            return
+        response = self.on_command(text)
+        latency = time.perf_counter() - end_of_speech
+        self.latencies.append(latency)
+        self.stats['commands'] += 1
+        self.awake_until = time.perf_counter() + self.window
+        if self.observe:
+            self.observe(latency)
+        logger.info(f"Hands-free: '{text}' -> {response} ({latency * 1000:.0f} ms after speech)")
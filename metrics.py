@@ -0,0 +1,230 @@
+# metrics.py - Low-overhead counters and histograms with Prometheus text and JSON export
+import bisect
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; tuned for stages between a parse (~us) and a model reply (~s)
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _label_text(labelnames, values):
+    if not labelnames:
+        return ''
+    pairs = ','.join(f'{n}="{str(v)}"' for n, v in zip(labelnames, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    """Monotonic count, optionally split by label values"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f'{self.name}{_label_text(self.labelnames, k)} {v}' for k, v in items]
+
+    def as_dict(self):
+        with self.lock:
+            return {','.join(map(str, k)) or 'total': v for k, v in self.values.items()}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and three adds under a lock"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def time(self, *labels):
+        """Context manager that observes the elapsed monotonic time of its block"""
+        return _Timer(self, labels)
+
+    def _snapshot(self):
+        with self.lock:
+            return sorted((k, (list(s[0]), s[1], s[2])) for k, s in self.series.items())
+
+    def render(self):
+        lines = []
+        names = self.labelnames + ('le',)
+        for labels, (counts, total, count) in self._snapshot():
+            cumulative = 0
+            for bound, n in zip(self.buckets + ('+Inf',), counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{_label_text(names, labels + (bound,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_label_text(self.labelnames, labels)} {total}')
+            lines.append(f'{self.name}_count{_label_text(self.labelnames, labels)} {count}')
+        return lines
+
+    def quantile_ms(self, counts, count, q):
+        """Upper bound (ms) of the bucket holding the q-th observation; None past the last bucket"""
+        rank = q * count
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            if cumulative >= rank:
+                return bound * 1000
+        return None
+
+    def as_dict(self):
+        report = {}
+        for labels, (counts, total, count) in self._snapshot():
+            report[','.join(map(str, labels)) or 'total'] = {
+                'count': count,
+                'mean_ms': round(total / count * 1000, 3) if count else None,
+                'p50_ms_le': self.quantile_ms(counts, count, 0.5),
+                'p95_ms_le': self.quantile_ms(counts, count, 0.95),
+                'p99_ms_le': self.quantile_ms(counts, count, 0.99),
+            }
+        return report
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class CallbackMetric:
+    """A counter or gauge read from existing state at scrape time (zero cost on the hot path)"""
+
+    def __init__(self, name, help_text, fn, kind='gauge'):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.kind = kind
+
+    def render(self):
+        value = self.fn()
+        return [] if value is None else [f'{self.name} {value}']
+
+    def as_dict(self):
+        return self.fn()
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them as Prometheus text or JSON"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.server = None
+        self.started = time.time()
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name, help_text, fn, kind='gauge'):
+        return self._add(CallbackMetric(name, help_text, fn, kind))
+
+    def render_prometheus(self):
+        lines = []
+        for metric in self.metrics.values():
+            try:
+                body = metric.render()
+            except Exception as e:
+                logger.error(f"Metric {metric.name} failed to render: {e}")
+                continue
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(body)
+        return '\n'.join(lines) + '\n'
+
+    def as_dict(self):
+        report = {'uptime_s': round(time.time() - self.started, 1)}
+        for name, metric in self.metrics.items():
+            try:
+                report[name] = metric.as_dict()
+            except Exception as e:
+                report[name] = f"error: {e}"
+        return report
+
+    def dump_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body, content_type = json.dumps(registry.as_dict()).encode(), 'application/json'
+                elif self.path.startswith('/metrics'):
+                    body, content_type = registry.render_prometheus().encode(), PROMETHEUS_CONTENT_TYPE
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='metrics-http', daemon=True).start()
+        logger.info(f"Metrics on http://{host}:{self.server.server_port}/metrics")
+        return self.server.server_port
+
+    def shutdown(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
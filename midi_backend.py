@@ -0,0 +1,318 @@
+# midi_backend.py - Shared MIDI backend: owns the output port, logs wire events, serves clients on a local socket
+#
+# Run it next to the DAW, then point the Streamlit app at it:
+#   python midi_backend.py --listen 127.0.0.1:9465
+#   MIDI_BACKEND=127.0.0.1:9465 streamlit run streamlit_app.py
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+
+import mido
+import numpy as np
+from dotenv import load_dotenv
+
+from addresses import format_address, parse_address
+from midi_engine import MidiOutputEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = '127.0.0.1:9465'
+MAX_EVENT_BYTES = 3
+
+
+class BackendError(Exception):
+    """The MIDI backend could not be reached or rejected a request"""
+
+
+def describe(msg):
+    """Short display text for one message, e.g. 'Ch1 CC7: 100'"""
+    if msg.type == 'control_change':
+        return f"Ch{msg.channel+1} CC{msg.control}: {msg.value}"
+    if msg.type == 'pitchwheel':
+        return f"Ch{msg.channel+1} PB: {msg.pitch}"
+    if msg.type in ('note_on', 'note_off'):
+        return f"Ch{msg.channel+1} {msg.type} {msg.note} vel {msg.velocity}"
+    return msg.type.replace('_', ' ').capitalize()
+
+
+def format_events(events):
+    """Log lines for (wall time, raw bytes) events; only called when the log is shown"""
+    lines = []
+    for t, raw in events:
+        stamp = time.strftime('%H:%M:%S', time.localtime(t)) + f".{int(t * 1000) % 1000:03d}"
+        try:
+            text = describe(mido.Message.from_bytes(raw))
+        except ValueError:
+            text = raw.hex(' ')
+        lines.append(f"[{stamp}] {text}")
+    return lines
+
+
+def message_bytes(messages):
+    """Flatten messages and message tuples (NRPN writes) into one byte string"""
+    data = bytearray()
+    for msg in messages:
+        for part in (msg if isinstance(msg, tuple) else (msg,)):
+            data.extend(part.bytes())
+    return bytes(data)
+
+
+NRPN_CONTROLS = (99, 98, 6, 38)
+
+
+def group_nrpn(messages):
+    """Regroup flattened NRPN writes (CC99, CC98, CC6, CC38 on one channel) into tuples
+
+    The socket protocol carries raw bytes, so a tuple's boundaries are lost on
+    the way. Without them the engine would coalesce the four CCs by controller
+    and every write in a request but the last would be dropped.
+    """
+    grouped = []
+    i = 0
+    while i < len(messages):
+        run = messages[i:i + 4]
+        if len(run) == 4 and all(m.is_cc(c) and m.channel == run[0].channel for m, c in zip(run, NRPN_CONTROLS)):
+            grouped.append(tuple(run))
+            i += 4
+        else:
+            grouped.append(messages[i])
+            i += 1
+    return grouped
+
+
+class MidiEventLog:
+    """Fixed-capacity ring buffer of raw MIDI events with monotonic timestamps
+
+    Appending writes one row of preallocated arrays, so it costs the same at any
+    fill level. Events carry a sequence number (total appended so far), which
+    lets a reader ask only for what it has not seen yet.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        # Each event packed as (length << 24) | status, data1, data2 - 12 bytes a slot with its timestamp
+        self.codes = np.zeros(capacity, dtype=np.uint32)
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def append(self, raw, t=None):
+        """Record one message's bytes (system exclusive is not logged)"""
+        size = len(raw)
+        if size > MAX_EVENT_BYTES:
+            return
+        code = (size << 24) | int.from_bytes(bytes(raw).ljust(MAX_EVENT_BYTES, b'\0'), 'big')
+        t = time.monotonic() if t is None else t
+        with self.lock:
+            slot = self.total % self.capacity
+            self.times[slot] = t
+            self.codes[slot] = code
+            self.total += 1
+
+    def extend(self, messages, t=None):
+        for msg in messages:
+            for part in (msg if isinstance(msg, tuple) else (msg,)):
+                self.append(part.bytes(), t)
+
+    def recent(self, limit=20, since=0):
+        """(next sequence number, [(wall time, raw bytes), ...]) for up to the last limit events after since"""
+        with self.lock:
+            total = self.total
+            start = max(since, total - limit, total - self.capacity, 0)
+            slots = np.arange(start, total) % self.capacity
+            times, codes = self.times[slots], self.codes[slots]
+        offset = time.time() - time.monotonic()
+        return total, [(t + offset, (code & 0xFFFFFF).to_bytes(MAX_EVENT_BYTES, 'big')[:code >> 24])
+                       for t, code in zip(times.tolist(), codes.tolist())]
+
+
+class LoggedPort:
+    """Output port wrapper that records every message actually written to the wire"""
+
+    def __init__(self, port, log):
+        self.port = port
+        self.log = log
+        self.name = getattr(port, 'name', 'MIDI')
+
+    def send(self, msg):
+        self.port.send(msg)
+        self.log.append(msg.bytes())
+
+    def close(self):
+        self.port.close()
+
+
+class MidiBackend:
+    """Serve one MIDI output engine and its event log to any number of local clients
+
+    The protocol is one JSON object per line in each direction:
+      {"op": "send", "midi": "<hex bytes>"}        -> {"ok": true, "count": n}
+      {"op": "log", "since": seq, "limit": n}      -> {"ok": true, "next": seq, "events": [[t, "<hex>"], ...]}
+      {"op": "status"}                             -> {"ok": true, "port": name, "stats": {...}, "logged": n}
+    Sends only queue on the engine's sender thread, so a client is answered
+    straight away however busy the port is.
+    """
+
+    def __init__(self, engine, log):
+        self.engine = engine
+        self.log = log
+        self.server = None
+
+    def handle(self, request):
+        op = request.get('op')
+        if op == 'send':
+            messages = mido.parse_all(bytes.fromhex(request.get('midi', '')))
+            self.engine.send_many(group_nrpn(messages))
+            return {'ok': True, 'count': len(messages)}
+        if op == 'log':
+            next_seq, events = self.log.recent(int(request.get('limit', 20)), int(request.get('since', 0)))
+            return {'ok': True, 'next': next_seq, 'events': [[t, raw.hex()] for t, raw in events]}
+        if op == 'status':
+            return {'ok': True, 'port': self.engine.name, 'stats': dict(self.engine.stats),
+                    'logged': self.log.total}
+        return {'ok': False, 'error': f"unknown op {op!r}"}
+
+    def serve(self, address=DEFAULT_ADDRESS):
+        """Listen on address ('host:port' or a Unix socket path) from a daemon thread"""
+        backend = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        reply = backend.handle(json.loads(line))
+                    except (ValueError, TypeError) as e:
+                        reply = {'ok': False, 'error': str(e)}
+                    self.wfile.write(json.dumps(reply).encode() + b'\n')
+                    self.wfile.flush()
+
+        target = parse_address(address)
+        if isinstance(target, tuple):
+            base = socketserver.ThreadingTCPServer
+        else:
+            if os.path.exists(target):
+                os.unlink(target)
+            base = socketserver.ThreadingUnixStreamServer
+        server_class = type('BackendServer', (base,), {'allow_reuse_address': True, 'daemon_threads': True})
+        self.server = server_class(target, Handler)
+        threading.Thread(target=self.server.serve_forever, name='midi-backend', daemon=True).start()
+        bound = self.server.server_address
+        logger.info(f"MIDI backend for '{self.engine.name}' on {format_address(bound)}")
+        return bound
+
+    def shutdown(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class MidiBackendClient:
+    """Connection to a MidiBackend; safe to share between threads (one request at a time)
+
+    Reconnects on the next call after a failure. Every failure surfaces as
+    BackendError so callers can fall back to running without the backend.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=1.0):
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        family = socket.AF_INET if isinstance(self.address, tuple) else socket.AF_UNIX
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.address)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+
+    def request(self, payload):
+        with self.lock:
+            try:
+                if self.sock is None:
+                    self._connect()
+                self.sock.sendall(json.dumps(payload).encode() + b'\n')
+                line = self.reader.readline()
+                if not line:
+                    raise ConnectionError("backend closed the connection")
+            except OSError as e:
+                self.close()
+                raise BackendError(f"MIDI backend unreachable: {e}") from e
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            raise BackendError(reply.get('error', 'request failed'))
+        return reply
+
+    def send(self, messages):
+        """Queue messages (or NRPN tuples) on the backend's port; returns the message count"""
+        data = message_bytes(messages)
+        if not data:
+            return 0
+        return self.request({'op': 'send', 'midi': data.hex()})['count']
+
+    def recent(self, limit=20, since=0):
+        """Same shape as MidiEventLog.recent, read from the backend's log"""
+        reply = self.request({'op': 'log', 'limit': limit, 'since': since})
+        return reply['next'], [(t, bytes.fromhex(raw)) for t, raw in reply['events']]
+
+    def status(self):
+        return self.request({'op': 'status'})
+
+    def close(self):
+        for f in (self.reader, self.sock):
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+        self.sock = None
+        self.reader = None
+
+
+def open_output(port_name=None):
+    """Open the named output port, or the first of the usual LoopMIDI names"""
+    names = [port_name] if port_name else ['LoopMIDI Port 1', 'LoopMIDI Port', 'loopMIDI Port 1']
+    for name in names:
+        try:
+            return mido.open_output(name)
+        except (OSError, IOError):
+            continue
+    raise OSError(f"No MIDI output port found (tried {', '.join(names)})")
+
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Shared MIDI backend for the Streamlit frontend")
+    parser.add_argument('--listen', default=os.getenv('MIDI_BACKEND') or DEFAULT_ADDRESS,
+                        help="host:port or Unix socket path")
+    parser.add_argument('--port-name', default=os.getenv('MIDI_PORT_NAME'), help="MIDI output port")
+    parser.add_argument('--log-size', type=int, default=int(os.getenv('MIDI_LOG_SIZE', 4096)))
+    args = parser.parse_args()
+
+    log = MidiEventLog(args.log_size)
+    engine = MidiOutputEngine(LoggedPort(open_output(args.port_name), log),
+                              max_rate=float(os.getenv('MIDI_MAX_RATE', 1000)))
+    backend = MidiBackend(engine, log)
+    backend.serve(args.listen)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        backend.shutdown()
+        engine.close()
+
+
+if __name__ == '__main__':
+    main()
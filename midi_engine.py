@@ -0,0 +1,139 @@
+# midi_engine.py - Coalescing, rate-limited MIDI output on a dedicated sender thread
+import collections
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce_key(msg):
+    """Messages with the same key supersede each other; None means always send"""
+    if isinstance(msg, tuple):
+        # An NRPN write: CC99/CC98 select the parameter, so a newer write to it supersedes
+        if len(msg) == 4 and msg[0].is_cc(99) and msg[1].is_cc(98):
+            return ('nrpn', msg[0].channel, msg[0].value, msg[1].value)
+        return None
+    if msg.type == 'control_change':
+        return ('cc', msg.channel, msg.control)
+    if msg.type == 'pitchwheel':
+        return ('pitchwheel', msg.channel)
+    return None
+
+
+def echo_key(msg):
+    """Key under which a sent message is remembered for echo suppression"""
+    return coalesce_key(msg) or (msg[0].type if isinstance(msg, tuple) else msg.type,)
+
+
+def wire_bytes(msg):
+    """Raw bytes of a message or message tuple, for echo comparison"""
+    if isinstance(msg, tuple):
+        return b''.join(bytes(m.bytes()) for m in msg)
+    return bytes(msg.bytes())
+
+
+class MidiOutputEngine:
+    """Wraps a mido output port so send() never blocks the caller
+
+    Pending messages live in an ordered dict. A newer CC for the same
+    (channel, controller) replaces the pending one in place, so only the
+    latest value is ever sent. One sender thread drains the queue no faster
+    than max_rate messages per second. observe(seconds), if given, is called
+    with the time each port.send() took.
+    """
+
+    def __init__(self, port, max_rate=1000.0, echo_depth=8, observe=None):
+        self.port = port
+        self.name = getattr(port, 'name', 'MIDI')
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.pending = collections.OrderedDict()
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.stats = {'enqueued': 0, 'sent': 0, 'coalesced': 0, 'errors': 0}
+        self.observe = observe
+        # Last few messages actually sent per controller, so MIDI input can spot echoes
+        self.echo_depth = echo_depth
+        self.recent_sent = {}
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='midi-sender', daemon=True)
+        self.thread.start()
+
+    def send(self, msg):
+        """Queue a message (or a tuple sent back-to-back, e.g. an NRPN write) for the sender thread"""
+        self.send_many((msg,))
+
+    def send_many(self, messages):
+        """Queue a batch under one lock and one wakeup; later messages for a controller replace earlier ones"""
+        with self.lock:
+            for msg in messages:
+                key = coalesce_key(msg)
+                self.stats['enqueued'] += 1
+                if key is None:
+                    key = ('seq', next(self.sequence))
+                elif key in self.pending:
+                    self.stats['coalesced'] += 1
+                self.pending[key] = msg
+            self.idle.clear()
+        self.wakeup.set()
+
+    def _run(self):
+        next_send = time.perf_counter()
+        while True:
+            self.wakeup.wait()
+            while True:
+                with self.lock:
+                    if not self.pending:
+                        self.wakeup.clear()
+                        self.idle.set()
+                        break
+                    _, msg = self.pending.popitem(last=False)
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    # Remember first: a loopback port can deliver the echo before send() returns
+                    self._remember(msg)
+                    start = time.perf_counter()
+                    for part in (msg if isinstance(msg, tuple) else (msg,)):
+                        self.port.send(part)
+                    if self.observe:
+                        self.observe(time.perf_counter() - start)
+                    self.stats['sent'] += 1
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    logger.error(f"MIDI send failed: {e}")
+                next_send = max(next_send + self.min_interval, time.perf_counter())
+            if not self.running:
+                return
+
+    def _remember(self, msg):
+        key = echo_key(msg)
+        sent = self.recent_sent.get(key)
+        if sent is None:
+            sent = self.recent_sent[key] = collections.deque(maxlen=self.echo_depth)
+        sent.append((wire_bytes(msg), time.perf_counter()))
+
+    def is_echo(self, msg, window=0.5):
+        """True if an identical message was sent within the last window seconds"""
+        sent = self.recent_sent.get(echo_key(msg))
+        if not sent:
+            return False
+        data = wire_bytes(msg)
+        cutoff = time.perf_counter() - window
+        return any(d == data and t >= cutoff for d, t in list(sent))
+
+    def flush(self, timeout=None):
+        """Block until every queued message has been sent"""
+        return self.idle.wait(timeout)
+
+    def close(self):
+        """Send whatever is pending, then close the port"""
+        self.running = False
+        self.wakeup.set()
+        self.thread.join(timeout=2.0)
+        self.port.close()
@@ -0,0 +1,128 @@
+# midi_input.py - DAW feedback listener that folds incoming MIDI back into session_state
+import contextlib
+import logging
+import threading
+
+from mixer import MidiAddressMap
+from persistence import apply_change
+
+logger = logging.getLogger(__name__)
+
+RECORD_CONTROL = 95
+NRPN_CONTROLS = (99, 98, 6, 38)
+
+
+def message_key(msg):
+    """(type, channel, control) for CCs; (type, channel) for pitch-bend; (type,) otherwise"""
+    if msg.type == 'control_change':
+        return (msg.type, msg.channel, msg.control)
+    if msg.type == 'pitchwheel':
+        return (msg.type, msg.channel)
+    return (msg.type,)
+
+
+def build_address_map(address_map):
+    """Map every single-message key we send to (state path, decoder), plus transport"""
+    table = address_map.decoders()
+    table[('control_change', 0, RECORD_CONTROL)] = (('transport', 'recording'), lambda msg: msg.value >= 64)
+    table[('start',)] = (('transport', 'playing'), lambda msg: True)
+    table[('continue',)] = (('transport', 'playing'), lambda msg: True)
+    table[('stop',)] = (('transport', 'playing'), lambda msg: False)
+    return table
+
+
+class MidiInputListener:
+    """Apply DAW feedback from a mido input port to the in-memory session state
+
+    The port's callback thread does one dict lookup per message and writes the
+    decoded value straight into state. Messages the output engine sent itself
+    moments ago are dropped as echoes. on_change(path, value) is called per
+    applied update (e.g. to schedule a save); UIs poll version/changed_since()
+    instead of being notified per message. state_lock, if given, is held around
+    each write, so other writers of the same state (batches, ramps) never
+    interleave with one.
+    """
+
+    def __init__(self, port, state, echo_filter=None, on_change=None, address_map=None, echo_window=0.5,
+                 state_lock=None):
+        self.port = port
+        self.state = state
+        self.state_lock = state_lock or contextlib.nullcontext()
+        self.echo_filter = echo_filter
+        self.on_change = on_change
+        self.address_map = address_map or MidiAddressMap()
+        self.table = build_address_map(self.address_map)
+        # NRPN writes arrive as CC99, CC98, CC6, CC38; collect them per channel
+        self.nrpn_parts = {}
+        self.echo_window = echo_window
+        self.lock = threading.Lock()
+        self.version = 0
+        self.dirty = {}
+        self.stats = {'received': 0, 'applied': 0, 'echoes': 0, 'ignored': 0, 'errors': 0}
+        self.name = getattr(port, 'name', 'MIDI In')
+        port.callback = self.handle
+
+    def handle(self, msg):
+        """Port callback; runs on the MIDI backend's thread"""
+        self.stats['received'] += 1
+        if self.address_map.mode == 'nrpn' and msg.type == 'control_change' and msg.control in NRPN_CONTROLS:
+            self._handle_nrpn(msg)
+            return
+        entry = self.table.get(message_key(msg))
+        if entry is None:
+            self.stats['ignored'] += 1
+            return
+        if self.echo_filter and self.echo_filter(msg, self.echo_window):
+            self.stats['echoes'] += 1
+            return
+        path, decode = entry
+        self._apply(path, decode, msg)
+
+    def _handle_nrpn(self, msg):
+        parts = self.nrpn_parts.setdefault(msg.channel, {})
+        parts[msg.control] = msg
+        if msg.control != 38:
+            return
+        if len(parts) < len(NRPN_CONTROLS):
+            self.stats['ignored'] += 1
+            return
+        group = tuple(parts[c] for c in NRPN_CONTROLS)
+        parts.clear()
+        if self.echo_filter and self.echo_filter(group, self.echo_window):
+            self.stats['echoes'] += 1
+            return
+        param = (group[0].value << 7) | group[1].value
+        data = (group[2].value << 7) | group[3].value
+        decoded = self.address_map.decode_nrpn(param, data)
+        if decoded is None:
+            self.stats['ignored'] += 1
+            return
+        path, value = decoded
+        self._apply(path, lambda _: value, group)
+
+    def _apply(self, path, decode, msg):
+        try:
+            value = decode(msg)
+            with self.state_lock:
+                apply_change(self.state, path, value)
+            with self.lock:
+                self.version += 1
+                self.dirty[path] = self.version
+            self.stats['applied'] += 1
+            if self.on_change:
+                self.on_change(path, value)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"MIDI input update failed for {msg}: {e}")
+
+    def changed_since(self, version):
+        """Return (current version, paths changed after version) for batched UI refresh"""
+        with self.lock:
+            return self.version, [p for p, v in self.dirty.items() if v > version]
+
+    def close(self):
+        try:
+            self.port.callback = None
+            self.port.close()
+        except Exception as e:
+            logger.error(f"Failed to close MIDI input: {e}")
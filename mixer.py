@@ -0,0 +1,263 @@
+# mixer.py - Array-backed mixer state, 16-fader banks and the MIDI address map
+from functools import lru_cache
+
+import mido
+import numpy as np
+
+BANK_SIZE = 16
+DEFAULT_FADER = 0.5
+DEFAULT_PAN = 0.5
+
+# Per-track fields and how they are stored
+FLOAT_FIELDS = ('fader', 'pan')
+BOOL_FIELDS = ('muted', 'solo')
+FIELDS = FLOAT_FIELDS + BOOL_FIELDS
+
+PITCHWHEEL_MIN = -8192
+PITCHWHEEL_MAX = 8191
+NRPN_MAX = 16383
+
+# Channel mode: CC offsets within a bank, same layout the emulator has always sent on channel 0
+CC_OFFSETS = {'fader': 0, 'muted': 16, 'solo': 32, 'pan': 48}
+# NRPN mode: parameter number = field block * 4096 + track
+NRPN_BLOCK = 4096
+NRPN_FIELDS = ('fader', 'pan', 'muted', 'solo')
+
+
+class TrackView:
+    """Dict-style access to one track's row, so track['fader'] code works on the arrays"""
+
+    __slots__ = ('mixer', 'index')
+
+    def __init__(self, mixer, index):
+        self.mixer = mixer
+        self.index = index
+
+    def __getitem__(self, field):
+        return self.mixer.get(field, self.index)
+
+    def __setitem__(self, field, value):
+        self.mixer.set(field, self.index, value)
+
+    def get(self, field, default=None):
+        try:
+            return self.mixer.get(field, self.index)
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return {field: self.mixer.get(field, self.index) for field in ('name',) + FIELDS}
+
+
+class TrackList:
+    """Read-only sequence of TrackViews over a MixerState"""
+
+    def __init__(self, mixer):
+        self.mixer = mixer
+
+    def __len__(self):
+        return self.mixer.track_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TrackView(self.mixer, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"track {index} out of range")
+        return TrackView(self.mixer, index)
+
+    def __iter__(self):
+        return (TrackView(self.mixer, i) for i in range(len(self)))
+
+
+class MixerState:
+    """Fader, pan, mute and solo for any number of tracks as NumPy arrays
+
+    Bulk operations work on array slices and return the indices that actually
+    changed, so callers only send MIDI for those. Tracks are grouped in banks
+    of BANK_SIZE like the FaderPort's 16 physical faders.
+    """
+
+    def __init__(self, track_count=16, names=None):
+        self.track_count = track_count
+        self.fader = np.full(track_count, DEFAULT_FADER)
+        self.pan = np.full(track_count, DEFAULT_PAN)
+        self.muted = np.zeros(track_count, dtype=bool)
+        self.solo = np.zeros(track_count, dtype=bool)
+        self.names = list(names or [])
+        self.names += [f'Track {i+1}' for i in range(len(self.names), track_count)]
+        self.tracks = TrackList(self)
+
+    @classmethod
+    def from_records(cls, records, track_count=16):
+        """Build from the saved list-of-dicts layout; pads to track_count with defaults"""
+        records = list(records or [])
+        mixer = cls(max(track_count, len(records)), [r.get('name', f'Track {i+1}') for i, r in enumerate(records)])
+        for field in FIELDS:
+            array = mixer.array(field)
+            for i, record in enumerate(records):
+                if field in record:
+                    array[i] = record[field]
+        return mixer
+
+    def to_records(self):
+        """The list-of-dicts layout used on disk and in exported sessions"""
+        return [
+            {'name': name, 'fader': fader, 'pan': pan, 'muted': muted, 'solo': solo}
+            for name, fader, pan, muted, solo in zip(
+                self.names, self.fader.tolist(), self.pan.tolist(), self.muted.tolist(), self.solo.tolist())
+        ]
+
+    def array(self, field):
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, track):
+        if field == 'name':
+            return self.names[track]
+        value = self.array(field)[track]
+        return bool(value) if field in BOOL_FIELDS else float(value)
+
+    def set(self, field, track, value):
+        if field == 'name':
+            self.names[track] = value
+        else:
+            self.array(field)[track] = value
+
+    def snapshot(self):
+        """Copies of the value arrays, for restore() if a batch of changes fails part way"""
+        return {field: self.array(field).copy() for field in FIELDS}
+
+    def restore(self, arrays):
+        for field, values in arrays.items():
+            self.array(field)[:] = values
+
+    def set_range(self, field, first, last, value):
+        """Set tracks first..last (inclusive); returns the indices whose value changed"""
+        array = self.array(field)
+        window = array[first:last + 1]
+        changed = np.flatnonzero(window != value) + first
+        window[:] = value
+        return changed
+
+    def set_all(self, field, value):
+        return self.set_range(field, 0, self.track_count - 1, value)
+
+    def reset_faders(self, value=DEFAULT_FADER):
+        return self.set_all('fader', value)
+
+    def solo_exclusive(self, track):
+        """Solo one track and clear every other solo; returns the changed indices"""
+        previous = np.flatnonzero(self.solo)
+        self.solo[previous] = False
+        self.solo[track] = True
+        changed = previous[previous != track]
+        return changed if len(changed) < len(previous) else np.append(changed, track)
+
+    # Banks of BANK_SIZE tracks, like the hardware's fader pages
+    @property
+    def bank_count(self):
+        return max(1, -(-self.track_count // BANK_SIZE))
+
+    def bank_tracks(self, bank):
+        start = bank * BANK_SIZE
+        return range(start, min(start + BANK_SIZE, self.track_count))
+
+    def nbytes(self):
+        return sum(self.array(field).nbytes for field in FIELDS)
+
+
+class MidiAddressMap:
+    """Where each track's controls live on the wire
+
+    channel: bank b uses MIDI channel b with the original layout (fader CC n,
+      mute CC n+16, solo CC n+32, pan CC n+48), so tracks 1-16 are unchanged.
+      Up to 256 tracks. 14-bit faders use pitch-bend on channel n, as the
+      FaderPort does, which only covers 16 tracks.
+    nrpn: every control is NRPN parameter (field block * 4096 + track) on
+      channel 0 with a 14-bit value. Up to 4096 tracks.
+    """
+
+    def __init__(self, track_count=16, mode='channel', high_res=False):
+        if mode not in ('channel', 'nrpn'):
+            raise ValueError(f"Unknown MIDI addressing mode '{mode}'")
+        if mode == 'channel' and track_count > 16 * BANK_SIZE:
+            raise ValueError(f"Channel addressing covers {16 * BANK_SIZE} tracks; use nrpn for {track_count}")
+        if mode == 'channel' and high_res and track_count > BANK_SIZE:
+            raise ValueError("14-bit pitch-bend faders cover 16 tracks; use nrpn addressing for more")
+        if mode == 'nrpn' and track_count > NRPN_BLOCK:
+            raise ValueError(f"NRPN addressing covers {NRPN_BLOCK} tracks")
+        self.track_count = track_count
+        self.mode = mode
+        self.high_res = high_res or mode == 'nrpn'
+
+    def position(self, field, value):
+        """Quantize a value to what goes on the wire (used to skip no-op sends)"""
+        if field in BOOL_FIELDS:
+            return int(bool(value))
+        if self.mode == 'nrpn':
+            return int(round(value * NRPN_MAX))
+        if field == 'fader' and self.high_res:
+            return PITCHWHEEL_MIN + int(round(value * (PITCHWHEEL_MAX - PITCHWHEEL_MIN)))
+        return int(value * 127)
+
+    def encode(self, field, track, value):
+        """One mido Message, or a tuple of them for an NRPN write"""
+        if self.mode == 'nrpn':
+            data = (NRPN_MAX if value else 0) if field in BOOL_FIELDS else self.position(field, value)
+            param = NRPN_FIELDS.index(field) * NRPN_BLOCK + track
+            return (
+                _control_change(0, 99, param >> 7),
+                _control_change(0, 98, param & 0x7F),
+                _control_change(0, 6, data >> 7),
+                _control_change(0, 38, data & 0x7F),
+            )
+        channel, slot = divmod(track, BANK_SIZE)
+        if field == 'fader' and self.high_res:
+            return mido.Message('pitchwheel', channel=slot, pitch=self.position(field, value))
+        wire = (127 if value else 0) if field in BOOL_FIELDS else self.position(field, value)
+        return _control_change(channel, CC_OFFSETS[field] + slot, wire)
+
+    def decoders(self):
+        """(type, channel, control) -> (state path, decode(msg)) for every single-message address"""
+        table = {}
+        if self.mode == 'nrpn':
+            return table
+        for track in range(self.track_count):
+            channel, slot = divmod(track, BANK_SIZE)
+            for field, offset in CC_OFFSETS.items():
+                decode = _cc_switch if field in BOOL_FIELDS else _cc_fraction
+                table[('control_change', channel, offset + slot)] = (('tracks', track, field), decode)
+            if self.high_res:
+                table[('pitchwheel', slot)] = (('tracks', track, 'fader'), _pitch_fraction)
+        return table
+
+    def decode_nrpn(self, param, data):
+        """(state path, value) for a completed NRPN write, or None if it is not one of ours"""
+        block, track = divmod(param, NRPN_BLOCK)
+        if block >= len(NRPN_FIELDS) or track >= self.track_count:
+            return None
+        field = NRPN_FIELDS[block]
+        value = data >= NRPN_MAX // 2 if field in BOOL_FIELDS else data / NRPN_MAX
+        return ('tracks', track, field), value
+
+
+# Messages are built once per (channel, control, value) and shared; nothing mutates them
+# after send, and mido's validation is most of the cost of a bulk mute at 4096 tracks
+@lru_cache(maxsize=16384)
+def _control_change(channel, control, value):
+    return mido.Message('control_change', channel=channel, control=control, value=value)
+
+
+def _cc_fraction(msg):
+    return msg.value / 127
+
+
+def _cc_switch(msg):
+    return msg.value >= 64
+
+
+def _pitch_fraction(msg):
+    return (msg.pitch - PITCHWHEEL_MIN) / (PITCHWHEEL_MAX - PITCHWHEEL_MIN)
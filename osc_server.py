@@ -0,0 +1,275 @@
+# osc_server.py - OSC-over-UDP front end: control surfaces and show control drive the mixer directly
+#
+# Addresses (tracks are 1-based; fader values are 0.0-1.0, as most surfaces send them):
+#   /track/3/fader 0.75        /track/3/mute 1        /track/3/solo 0
+#   /transport/play            /transport/stop        /transport/record
+#   /command "mute tracks 1 through 8 and play"
+import logging
+import math
+import selectors
+import socket
+import struct
+import threading
+
+from addresses import format_address, parse_address
+from commands import TRANSPORT_WORDS, Action, CommandError, parse_commands
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = '0.0.0.0:9000'
+BUNDLE_TAG = b'#bundle\0'
+# Bundle timetag 1 means "now"; timetags are not scheduled, every packet is applied on arrival
+IMMEDIATELY = 1
+# Datagrams read per wakeup before applying them, so a flood cannot delay MIDI for long
+MAX_DRAIN = 512
+RECEIVE_BUFFER = 1 << 20
+
+INT32 = struct.Struct('>i')
+FLOAT32 = struct.Struct('>f')
+INT64 = struct.Struct('>q')
+FLOAT64 = struct.Struct('>d')
+TIMETAG = struct.Struct('>Q')
+
+
+class OscError(ValueError):
+    """A packet was malformed or addressed something the mixer does not have"""
+
+
+def _read_string(data, pos):
+    end = data.index(b'\0', pos)
+    return data[pos:end].decode('utf-8', 'replace'), (end + 4) & ~3
+
+
+def _pad(data):
+    return data + b'\0' * (4 - len(data) % 4)
+
+
+def parse_message(data):
+    """(address, [args]) for one OSC message"""
+    try:
+        address, pos = _read_string(data, 0)
+        if pos >= len(data):
+            return address, []
+        tags, pos = _read_string(data, pos)
+        if not tags.startswith(','):
+            raise OscError(f"Missing type tags in message to {address}")
+        args = []
+        for tag in tags[1:]:
+            if tag == 'i':
+                args.append(INT32.unpack_from(data, pos)[0])
+                pos += 4
+            elif tag == 'f':
+                args.append(FLOAT32.unpack_from(data, pos)[0])
+                pos += 4
+            elif tag in 'hd':
+                args.append((INT64 if tag == 'h' else FLOAT64).unpack_from(data, pos)[0])
+                pos += 8
+            elif tag in 'sS':
+                value, pos = _read_string(data, pos)
+                args.append(value)
+            elif tag == 'b':
+                size = INT32.unpack_from(data, pos)[0]
+                args.append(data[pos + 4:pos + 4 + size])
+                pos += 4 + ((size + 3) & ~3)
+            elif tag in 'TF':
+                args.append(tag == 'T')
+            elif tag in 'NI':
+                args.append(None)
+            else:
+                raise OscError(f"Unsupported OSC type tag {tag!r}")
+    except (ValueError, struct.error) as e:
+        if isinstance(e, OscError):
+            raise
+        raise OscError(f"Truncated OSC message: {e}") from None
+    return address, args
+
+
+def parse_packet(data):
+    """[(address, [args]), ...] in order; a bundle's elements (nested bundles too) are flattened"""
+    if not data.startswith(BUNDLE_TAG):
+        return [parse_message(data)]
+    messages = []
+    pos = len(BUNDLE_TAG) + TIMETAG.size
+    while pos < len(data):
+        if pos + 4 > len(data):
+            raise OscError("Truncated OSC bundle")
+        size = INT32.unpack_from(data, pos)[0]
+        pos += 4
+        if size <= 0 or pos + size > len(data):
+            raise OscError("Truncated OSC bundle")
+        messages.extend(parse_packet(data[pos:pos + size]))
+        pos += size
+    return messages
+
+
+def encode_message(address, *args):
+    """One OSC message; ints, floats, strings and bools are supported"""
+    tags = ','
+    payload = b''
+    for arg in args:
+        if isinstance(arg, bool):
+            tags += 'T' if arg else 'F'
+        elif isinstance(arg, int):
+            tags += 'i'
+            payload += INT32.pack(arg)
+        elif isinstance(arg, float):
+            tags += 'f'
+            payload += FLOAT32.pack(arg)
+        elif isinstance(arg, str):
+            tags += 's'
+            payload += _pad(arg.encode())
+        else:
+            raise TypeError(f"Cannot encode {type(arg).__name__} as an OSC argument")
+    return _pad(address.encode()) + _pad(tags.encode()) + payload
+
+
+def encode_bundle(messages, timetag=IMMEDIATELY):
+    """A bundle of already encoded messages"""
+    return BUNDLE_TAG + TIMETAG.pack(timetag) + b''.join(INT32.pack(len(m)) + m for m in messages)
+
+
+def actions_from_message(address, args, track_count=16):
+    """Actions for one OSC message ([] for one to ignore, like a button release); raises OscError"""
+    parts = address.strip('/').split('/')
+    if address == '/command':
+        if not args or not isinstance(args[0], str):
+            raise OscError("/command needs a string argument")
+        try:
+            return parse_commands(args[0], track_count)
+        except CommandError as e:
+            raise OscError(str(e)) from None
+
+    if len(parts) == 2 and parts[0] == 'transport' and parts[1] in TRANSPORT_WORDS:
+        # Buttons send 1 on press and 0 on release; only the press counts
+        if args and not args[0]:
+            return []
+        return [Action(parts[1], None, None)]
+
+    if len(parts) == 3 and parts[0] == 'track' and parts[1].isdigit():
+        track = int(parts[1]) - 1
+        if not 0 <= track < track_count:
+            raise OscError(f"Invalid track number in {address} (1-{track_count})")
+        if not args or not isinstance(args[0], (int, float)):
+            raise OscError(f"{address} needs a number or true/false")
+        value = args[0]
+        # NaN slips through min/max clamping (and is truthy), so it would reach the mixer as is
+        if not math.isfinite(value):
+            raise OscError(f"{address} needs a finite number, got {value}")
+        if parts[2] == 'fader':
+            return [Action('fader', track, min(max(float(value), 0.0), 1.0))]
+        if parts[2] == 'mute':
+            return [Action('mute' if value else 'unmute', track, None)]
+        if parts[2] == 'solo':
+            return [Action('solo', track, bool(value))]
+
+    raise OscError(f"Unknown OSC address {address}")
+
+
+class OscServer:
+    """Apply OSC from any number of surfaces to an emulator, from one non-blocking UDP socket
+
+    Every datagram waiting is read in one go before anything is applied.
+    Plain messages from that read go out as one batch. A fader moved several
+    times in the batch only keeps its last value. Each bundle is its own
+    batch, applied all or nothing: one bad message rejects the whole bundle.
+    Batches go through dispatch_actions, so state, MIDI and saves match what
+    the UI and voice commands do.
+    """
+
+    def __init__(self, emulator):
+        self.emulator = emulator
+        self.sock = None
+        self.selector = None
+        self.thread = None
+        self.running = threading.Event()
+        self.stats = {'packets': 0, 'messages': 0, 'bundles': 0, 'batches': 0,
+                      'coalesced': 0, 'errors': 0, 'dropped': 0}
+
+    def serve(self, address=DEFAULT_ADDRESS):
+        """Listen on 'host:port' from a daemon thread; returns the bound (host, port)"""
+        target = parse_address(address)
+        if not isinstance(target, tuple):
+            raise ValueError(f"OSC address must be host:port, got {address!r}")
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Room for bursts from several surfaces while a batch is being applied
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        self.sock.bind(target)
+        self.sock.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.sock, selectors.EVENT_READ)
+        self.running.set()
+        self.thread = threading.Thread(target=self.run, name='osc-server', daemon=True)
+        self.thread.start()
+        bound = self.sock.getsockname()
+        logger.info(f"OSC on udp://{format_address(bound)}")
+        return bound
+
+    def run(self):
+        while self.running.is_set():
+            if self.selector.select(timeout=0.25):
+                self.drain()
+
+    def drain(self):
+        batch = []
+        fader_slots = {}
+        for _ in range(MAX_DRAIN):
+            try:
+                data = self.sock.recv(65535)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                # Still apply what was read before the error
+                logger.debug(f"OSC receive failed: {e}")
+                break
+            self.stats['packets'] += 1
+            try:
+                messages = parse_packet(data)
+                self.stats['messages'] += len(messages)
+                actions = [a for address, args in messages
+                           for a in actions_from_message(address, args, self.emulator.mixer.track_count)]
+            except OscError as e:
+                self.stats['errors'] += 1
+                logger.debug(f"OSC packet rejected: {e}")
+                continue
+
+            if data.startswith(BUNDLE_TAG):
+                self.stats['bundles'] += 1
+                self.apply(batch)
+                batch, fader_slots = [], {}
+                self.apply(actions)
+                continue
+            for action in actions:
+                if action.kind == 'fader' and action.track in fader_slots:
+                    batch[fader_slots[action.track]] = action
+                    self.stats['coalesced'] += 1
+                    continue
+                if action.kind == 'fader':
+                    fader_slots[action.track] = len(batch)
+                elif action.kind in ('fade', 'reset'):
+                    # A later fader move must not jump ahead of a fade or reset it follows
+                    fader_slots.clear()
+                batch.append(action)
+        self.apply(batch)
+
+    def apply(self, actions):
+        if not actions:
+            return
+        if not self.emulator.midi_initialized:
+            self.stats['dropped'] += len(actions)
+            return
+        self.stats['batches'] += 1
+        with self.emulator.control_lock:
+            result = self.emulator.dispatch_actions(actions)
+        if result.startswith("DAW control error"):
+            self.stats['errors'] += 1
+
+    def shutdown(self):
+        if self.thread:
+            self.running.clear()
+            self.thread.join(timeout=2)
+            self.thread = None
+        if self.sock:
+            self.selector.close()
+            self.sock.close()
+            self.sock = None
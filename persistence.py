@@ -0,0 +1,189 @@
+# persistence.py - Write-behind session persistence with atomic writes and an optional journal
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# After a failed write, wait this long (doubling up to RETRY_MAX_DELAY) and try again
+RETRY_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+
+
+def atomic_write_json(path, data):
+    """Write JSON to a temp file in the same directory and rename it over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path), suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def apply_change(state, path, value):
+    """Set state[path[0]][path[1]]... = value"""
+    target = state
+    for key in path[:-1]:
+        target = target[key]
+    target[path[-1]] = value
+
+
+class StateStore:
+    """Coalesce save requests and persist them from a background writer thread
+
+    save() only marks the state dirty; the writer waits `delay` seconds so a
+    burst of changes (e.g. a fader drag) turns into one write. With a journal,
+    each cycle appends just the changed fields and full snapshots are taken
+    every `snapshot_interval` seconds; load() replays the journal on startup.
+    A failed write keeps its changes and is retried with backoff, so nothing
+    waits on the next save() to be written. observe(seconds), if given, is
+    called with the duration of each write.
+    """
+
+    def __init__(self, path, snapshot, delay=0.25, journal_path=None, snapshot_interval=2.0, observe=None):
+        self.path = path
+        self.snapshot = snapshot
+        self.delay = delay
+        self.journal_path = journal_path
+        self.snapshot_interval = snapshot_interval
+        self.observe = observe
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.pending_changes = []
+        self.needs_snapshot = False
+        self.last_snapshot = time.monotonic()
+        self.stats = {'save_requests': 0, 'snapshot_writes': 0, 'journal_writes': 0, 'errors': 0}
+        self.running = True
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='state-writer', daemon=True)
+        self.thread.start()
+
+    def load(self, default):
+        """Return the saved state (with journal replayed), or default() if there is none
+
+        A snapshot this needs (new state, or a replayed journal) is not written
+        until resume() is called, once snapshot() can see the loaded state.
+        """
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        else:
+            state = default()
+            self.needs_snapshot = True
+        if self.journal_path and os.path.exists(self.journal_path):
+            replayed = 0
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                        apply_change(state, change['path'], change['value'])
+                        replayed += 1
+                    except (ValueError, KeyError, IndexError, TypeError):
+                        # A torn final line from a crash is expected; skip it
+                        continue
+            if replayed:
+                logger.info(f"Replayed {replayed} journal entries")
+                self.needs_snapshot = True
+        return state
+
+    def resume(self):
+        """Wake the writer for anything load() left pending"""
+        if self.needs_snapshot or self.pending_changes:
+            self.wakeup.set()
+
+    def save(self, path=None, value=None):
+        """Schedule a write; pass the changed field's path and value to journal it"""
+        with self.lock:
+            self.stats['save_requests'] += 1
+            if path is not None and self.journal_path:
+                self.pending_changes.append({'path': list(path), 'value': value})
+            else:
+                self.needs_snapshot = True
+        self.wakeup.set()
+
+    def save_many(self, changes):
+        """Schedule one write for a batch of (path, value) changes; a None path forces a snapshot"""
+        with self.lock:
+            self.stats['save_requests'] += 1
+            for path, value in changes:
+                if path is not None and self.journal_path:
+                    self.pending_changes.append({'path': list(path), 'value': value})
+                else:
+                    self.needs_snapshot = True
+        self.wakeup.set()
+
+    def _run(self):
+        backoff = 0.0
+        while self.running:
+            self.wakeup.wait()
+            if not self.running:
+                break
+            time.sleep(self.delay)
+            self.wakeup.clear()
+            if self._write():
+                backoff = 0.0
+                continue
+            # The changes were put back; write them again without waiting for another save()
+            backoff = min(max(backoff * 2, RETRY_DELAY), RETRY_MAX_DELAY)
+            if self.closed.wait(backoff):
+                break
+            self.wakeup.set()
+
+    def _write(self, force_snapshot=False):
+        """Write what is pending; False if it failed (the changes are kept for the next try)"""
+        with self.write_lock:
+            return self._write_locked(force_snapshot)
+
+    def _write_locked(self, force_snapshot):
+        with self.lock:
+            changes, self.pending_changes = self.pending_changes, []
+            snapshot_due = (force_snapshot or self.needs_snapshot or
+                            time.monotonic() - self.last_snapshot >= self.snapshot_interval)
+            self.needs_snapshot = False
+        if not changes and not snapshot_due:
+            return True
+        start = time.perf_counter()
+        try:
+            if changes and not snapshot_due:
+                with open(self.journal_path, 'a') as f:
+                    f.write(''.join(json.dumps(c) + '\n' for c in changes))
+                self.stats['journal_writes'] += 1
+            else:
+                atomic_write_json(self.path, json.dumps(self.snapshot(), indent=2))
+                self.stats['snapshot_writes'] += 1
+                self.last_snapshot = time.monotonic()
+                if self.journal_path and os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+            if self.observe:
+                self.observe(time.perf_counter() - start)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Failed to save state: {e}")
+            with self.lock:
+                self.pending_changes = changes + self.pending_changes
+                self.needs_snapshot = True
+            return False
+        return True
+
+    def flush(self):
+        """Write everything now with a full snapshot (call on shutdown)"""
+        self._write(force_snapshot=True)
+
+    def close(self):
+        self.running = False
+        self.closed.set()
+        self.wakeup.set()
+        self.thread.join(timeout=self.delay + 1.0)
+        self.flush()
@@ -0,0 +1,136 @@
+# ramps.py - Fixed-rate fader ramp scheduler
+import collections
+import logging
+import threading
+import time
+
+from mixer import MidiAddressMap
+
+logger = logging.getLogger(__name__)
+
+
+class Ramp:
+    """Linear move of one fader from start to target over duration seconds"""
+
+    __slots__ = ('track', 'start_value', 'target', 'start_time', 'duration', 'last_position')
+
+    def __init__(self, track, start_value, target, start_time, duration):
+        self.track = track
+        self.start_value = start_value
+        self.target = target
+        self.start_time = start_time
+        self.duration = duration
+        self.last_position = None
+
+    def value_at(self, now):
+        progress = (now - self.start_time) / self.duration if self.duration > 0 else 1.0
+        if progress >= 1.0:
+            return self.target
+        return self.start_value + (self.target - self.start_value) * progress
+
+
+class RampScheduler:
+    """One timing thread that steps every active ramp at rate_hz
+
+    send(msg) receives the interpolated fader messages (normally
+    MidiOutputEngine.send), encoded by address_map (a mixer.MidiAddressMap). on_step(track, value) is called each tick so the
+    caller can mirror the position in its state, and on_done(track, value)
+    once a ramp reaches its target. The thread sleeps while no ramp is active.
+    """
+
+    def __init__(self, send, rate_hz=200.0, address_map=None, on_step=None, on_done=None, jitter_window=4096):
+        self.send = send
+        self.period = 1.0 / rate_hz
+        self.address_map = address_map or MidiAddressMap()
+        self.on_step = on_step
+        self.on_done = on_done
+        self.ramps = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.jitter = collections.deque(maxlen=jitter_window)
+        self.stats = {'ticks': 0, 'messages': 0, 'ramps_started': 0, 'ramps_completed': 0}
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='fader-ramps', daemon=True)
+        self.thread.start()
+
+    def start_ramp(self, track, start_value, target, duration):
+        """Begin (or replace) a ramp on track"""
+        ramp = Ramp(track, start_value, target, time.perf_counter(), duration)
+        with self.lock:
+            self.ramps[track] = ramp
+            self.stats['ramps_started'] += 1
+        self.wakeup.set()
+
+    def cancel(self, track):
+        """Stop a running ramp, e.g. because the fader was moved directly"""
+        with self.lock:
+            return self.ramps.pop(track, None) is not None
+
+    def cancel_all(self):
+        """Stop every running ramp; returns how many were cancelled"""
+        with self.lock:
+            cancelled = len(self.ramps)
+            self.ramps.clear()
+            return cancelled
+
+    def active(self):
+        with self.lock:
+            return len(self.ramps)
+
+    def _tick(self, now):
+        with self.lock:
+            ramps = list(self.ramps.values())
+        finished = []
+        for ramp in ramps:
+            value = ramp.value_at(now)
+            # Only send when the quantized output actually moves
+            position = self.address_map.position('fader', value)
+            if position != ramp.last_position:
+                ramp.last_position = position
+                self.send(self.address_map.encode('fader', ramp.track, value))
+                self.stats['messages'] += 1
+            if self.on_step:
+                self.on_step(ramp.track, value)
+            if value == ramp.target:
+                finished.append(ramp)
+        if finished:
+            with self.lock:
+                for ramp in finished:
+                    if self.ramps.get(ramp.track) is ramp:
+                        del self.ramps[ramp.track]
+            for ramp in finished:
+                self.stats['ramps_completed'] += 1
+                if self.on_done:
+                    self.on_done(ramp.track, ramp.target)
+
+    def _run(self):
+        while self.running:
+            self.wakeup.wait()
+            if not self.running:
+                break
+            # Schedule ticks on an absolute grid so sleep overshoot does not accumulate
+            next_tick = time.perf_counter()
+            while self.running:
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                now = time.perf_counter()
+                self.jitter.append(now - next_tick)
+                self.stats['ticks'] += 1
+                try:
+                    self._tick(now)
+                except Exception as e:
+                    logger.error(f"Fader ramp tick failed: {e}")
+                next_tick += self.period
+                if next_tick < now:
+                    # Fell behind by more than a period: skip ahead rather than burst
+                    next_tick = now + self.period
+                with self.lock:
+                    if not self.ramps:
+                        self.wakeup.clear()
+                        break
+
+    def shutdown(self):
+        self.running = False
+        self.wakeup.set()
+        self.thread.join(timeout=1.0)
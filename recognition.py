@@ -0,0 +1,138 @@
+# recognition.py - Parallel speech recognition with a latency budget and circuit breaker
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Stops calling a failing backend and lets a single probe through after a cooldown"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Return True if the backend may be called now"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class RecognitionEngine:
+    """Race recognizer backends on a thread pool and pick the best answer within a budget
+
+    Backends are (name, recognize_fn, breaker) tuples in order of preference.
+    recognize_fn takes sr.AudioData and returns text, raising
+    sr.UnknownValueError / sr.RequestError like the speech_recognition API.
+    """
+
+    def __init__(self, backends, budget=2.5, max_workers=4):
+        self.backends = backends
+        self.budget = budget
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='recognizer')
+
+    def _watch(self, breaker, deadline):
+        """Feed a backend's outcome into its breaker; late answers were already counted as failures"""
+        import speech_recognition as sr
+        def done(future):
+            if breaker is None or future.cancelled() or time.monotonic() > deadline:
+                return
+            error = future.exception()
+            if error is None or isinstance(error, sr.UnknownValueError):
+                # UnknownValueError means the service answered, it just heard nothing usable
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+        return done
+
+    def recognize(self, audio):
+        """Return (text, backend_name), or (None, None) if no backend understood the audio"""
+        import speech_recognition as sr
+        deadline = time.monotonic() + self.budget
+        futures = {}
+        for rank, (name, fn, breaker) in enumerate(self.backends):
+            if breaker is not None and not breaker.allow():
+                logger.info(f"Skipping {name}: circuit open")
+                continue
+            future = self.executor.submit(fn, audio)
+            future.add_done_callback(self._watch(breaker, deadline))
+            futures[future] = (rank, name, breaker)
+
+        results = {}
+        pending = set(futures)
+        while pending:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                if results:
+                    break
+                # Budget spent with no answer yet: take the first one that arrives
+                timeout = None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                rank, name, _ = futures[future]
+                try:
+                    results[rank] = (future.result(), name)
+                except (sr.UnknownValueError, sr.RequestError) as e:
+                    logger.info(f"{name} recognition failed: {type(e).__name__}")
+                except Exception as e:
+                    logger.error(f"{name} recognition error: {e}")
+            # Stop early once no pending backend outranks the best answer so far
+            if results and all(futures[f][0] > min(results) for f in pending):
+                break
+
+        late = time.monotonic() > deadline
+        for future in pending:
+            _, name, breaker = futures[future]
+            if not future.cancel() and late and breaker is not None:
+                logger.info(f"{name} missed the {self.budget}s budget")
+                breaker.record_failure()
+        if not results:
+            return None, None
+        text, name = results[min(results)]
+        return text, name
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def default_backends(recognizer, failure_threshold=3, reset_timeout=30.0, sphinx=None, breaker=None):
+    """Google (remote, behind a circuit breaker) preferred over Sphinx (local)
+
+    Pass a warm SphinxDecoderPool as sphinx to avoid recognize_sphinx reloading
+    the model on every call; it only hears DAW commands, so leave it out for
+    free-form speech. Engines that share breaker see each other's Google outages.
+    """
+    return [
+        ('google', recognizer.recognize_google, breaker or CircuitBreaker(failure_threshold, reset_timeout)),
+        ('sphinx', sphinx.recognize if sphinx is not None else recognizer.recognize_sphinx, None),
+    ]
@@ -0,0 +1,88 @@
+# sphinx_decoder.py - Warm PocketSphinx decoders constrained to the DAW command grammar
+import logging
+import queue
+import time
+
+from commands import (ALL_WORD, CONJUNCTIONS, DURATION_WORD, FADER_WORDS, RANGE_VERBS, RANGE_WORDS, RESET_WORD, TEENS, TENS,
+                      TRACK_VERBS, TRANSPORT_WORDS, UNITS, words_to_digits)
+
+logger = logging.getLogger(__name__)
+
+# Command words missing from the default CMU dictionary
+EXTRA_WORDS = {'unmute': 'AH N M Y UW T', 'faders': 'F EY D ER Z'}
+
+
+def build_grammar():
+    """JSGF grammar for everything the command compiler understands (numbers 0-100 spelled out)"""
+    return '\n'.join([
+        '#JSGF V1.0;',
+        'grammar daw;',
+        f"public <commands> = <command> (({' | '.join(CONJUNCTIONS)}) <command>)*;",
+        '<command> = <transport> | <track> | <range> | <fader> | <reset>;',
+        f"<transport> = {' | '.join(TRANSPORT_WORDS)};",
+        f"<track> = ({' | '.join(TRACK_VERBS)}) track <number>;",
+        f"<range> = ({' | '.join(RANGE_VERBS)}) (tracks <number> ({' | '.join(RANGE_WORDS)}) <number> | {ALL_WORD} [tracks]);",
+        f"<fader> = [set] ({' | '.join(FADER_WORDS)}) [track] <number> [to] <number> [percent] [<duration>];",
+        f"<duration> = {DURATION_WORD} <number> (second | seconds);",
+        f"<reset> = {RESET_WORD} [{ALL_WORD}] faders;",
+        '<number> = <unit> | <teen> | <tens> [<digit>] | one hundred;',
+        '<unit> = zero | <digit>;',
+        f"<digit> = {' | '.join(UNITS[1:])};",
+        f"<teen> = {' | '.join(TEENS)};",
+        f"<tens> = {' | '.join(TENS)};",
+        '',
+    ])
+
+
+DAW_GRAMMAR = build_grammar()
+
+
+class SphinxDecoderPool:
+    """A fixed set of PocketSphinx decoders loaded once and reused across utterances
+
+    Decoders are not thread-safe, so each decode borrows one from the pool.
+    Pass jsgf for grammar decoding or keyphrase for keyword spotting.
+    """
+
+    def __init__(self, size=1, jsgf=DAW_GRAMMAR, keyphrase=None, kws_threshold=1e-20, sample_rate=16000):
+        from pocketsphinx import Decoder
+
+        self.sample_rate = sample_rate
+        self.pool = queue.Queue()
+        options = {'lm': None, 'samprate': sample_rate, 'loglevel': 'FATAL'}
+        if keyphrase:
+            options['kws_threshold'] = kws_threshold
+        start = time.perf_counter()
+        for _ in range(size):
+            decoder = Decoder(**options)
+            for word, phones in EXTRA_WORDS.items():
+                decoder.add_word(word, phones, True)
+            if keyphrase:
+                decoder.add_keyphrase('keyword', keyphrase)
+                decoder.activate_search('keyword')
+            else:
+                decoder.add_jsgf_string('grammar', jsgf)
+                decoder.activate_search('grammar')
+            self.pool.put(decoder)
+        self.load_seconds = time.perf_counter() - start
+        logger.info(f"Loaded {size} PocketSphinx decoder(s) in {self.load_seconds:.2f}s")
+
+    def decode(self, pcm):
+        """Decode 16-bit mono PCM at sample_rate; returns the hypothesis string ('' if none)"""
+        decoder = self.pool.get()
+        try:
+            decoder.start_utt()
+            decoder.process_raw(pcm, full_utt=True)
+            decoder.end_utt()
+            hyp = decoder.hyp()
+            return hyp.hypstr if hyp is not None else ''
+        finally:
+            self.pool.put(decoder)
+
+    def recognize(self, audio):
+        """RecognitionEngine backend: sr.AudioData in, command text with digits out"""
+        text = self.decode(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        if not text:
+            import speech_recognition as sr
+            raise sr.UnknownValueError()
+        return words_to_digits(text)
@@ -0,0 +1,349 @@
+# stem_separation.py - Chunked CPU stem separation: STFT masks per chunk, process pool, memory-mapped stems
+#
+# The upload is decoded once into a float32 memmap. Chunks of it, with enough
+# context either side for the STFT and median filters, are fanned out to worker
+# processes. Each worker writes only its chunk's own samples into the stem
+# memmaps, so no full copy of the track is held in RAM anywhere.
+#
+# The masks come from signal processing, not a trained model:
+#   harmonic / percussive  median filtering of the magnitude across time / frequency (Fitzgerald HPSS)
+#   vocals                 harmonic energy that is panned to the centre and lies in the voice band
+#   bass                   harmonic, non-vocal energy below BASS_HZ
+# Masks for a stem set add up to one, so the stems always sum back to the mix.
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import wave
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+STEM_SETS = {
+    '2stems': ('vocals', 'accompaniment'),
+    '4stems': ('vocals', 'drums', 'bass', 'other'),
+}
+# n_fft, hop and median kernel sizes (time frames, frequency bins) for each quality setting
+QUALITY = {
+    'Fast': {'n_fft': 1024, 'hop': 256, 'kernel_t': 9, 'kernel_f': 9},
+    'Balanced': {'n_fft': 2048, 'hop': 512, 'kernel_t': 17, 'kernel_f': 17},
+    'High Quality': {'n_fft': 4096, 'hop': 1024, 'kernel_t': 17, 'kernel_f': 31},
+}
+VOICE_BAND_HZ = (120.0, 8000.0)
+BASS_HZ = 250.0
+# Rows per median filter pass, so the sliding windows stay a few MB
+MEDIAN_BLOCK = 64
+WAV_BLOCK = 1 << 16
+EPS = 1e-10
+
+
+class StemError(Exception):
+    """The input could not be decoded or separated"""
+
+
+def median_filter(a, size, axis):
+    """Running median of a 2-D array along axis, edges reflected, computed a block of rows at a time"""
+    pad = size // 2
+    widths = [(pad, pad) if ax == axis else (0, 0) for ax in range(2)]
+    padded = np.pad(a, widths, mode='reflect')
+    out = np.empty_like(a)
+    other = 1 - axis
+    for start in range(0, a.shape[other], MEDIAN_BLOCK):
+        rows = slice(start, start + MEDIAN_BLOCK)
+        block = padded[rows] if other == 0 else padded[:, rows]
+        median = np.median(sliding_window_view(block, size, axis=axis), axis=-1)
+        if other == 0:
+            out[rows] = median
+        else:
+            out[:, rows] = median
+    return out
+
+
+def stft(x, n_fft, hop, window):
+    """(frames, bins) complex spectrum of a 1-D signal, one frame every hop samples from 0"""
+    frames = sliding_window_view(x, n_fft)[::hop]
+    return np.fft.rfft(frames * window, axis=1)
+
+
+def istft(spec, n_fft, hop, window, length):
+    """Weighted overlap-add inverse of stft"""
+    frames = np.fft.irfft(spec, n=n_fft, axis=1).astype(np.float32) * window
+    out = np.zeros(length, dtype=np.float32)
+    norm = np.zeros(length, dtype=np.float32)
+    ratio = n_fft // hop
+    # Frames ratio apart do not overlap, so each group is one contiguous add
+    for r in range(ratio):
+        group = frames[r::ratio]
+        start = r * hop
+        end = start + group.size
+        out[start:end] += group.ravel()
+        norm[start:end] += np.tile(window ** 2, len(group))
+    return out / np.maximum(norm, EPS)
+
+
+def stem_masks(spectra, rate, n_fft, stems, kernel_t, kernel_f):
+    """{stem: (frames, bins) mask} for the channel spectra of one chunk; the masks add up to one"""
+    mid = np.abs(sum(spectra) / len(spectra))
+    harmonic = median_filter(mid, kernel_t, axis=0) ** 2
+    percussive = median_filter(mid, kernel_f, axis=1) ** 2
+    h_mask = harmonic / (harmonic + percussive + EPS)
+
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / rate).astype(np.float32)
+    voice_band = ((freqs >= VOICE_BAND_HZ[0]) & (freqs <= VOICE_BAND_HZ[1])).astype(np.float32)
+    if len(spectra) == 2:
+        # Panning index: 1 where left and right carry the same spectrum, falling towards the sides
+        left, right = spectra
+        centre = 2 * np.abs(left * np.conj(right)) / (np.abs(left) ** 2 + np.abs(right) ** 2 + EPS)
+    else:
+        centre = 1.0
+    vocals = h_mask * centre ** 2 * voice_band
+    if stems == STEM_SETS['2stems']:
+        return {'vocals': vocals, 'accompaniment': 1 - vocals}
+    rest = 1 - vocals
+    low = (freqs <= BASS_HZ).astype(np.float32)
+    return {
+        'vocals': vocals,
+        'drums': (1 - h_mask) * rest,
+        'bass': h_mask * rest * low,
+        'other': h_mask * rest * (1 - low),
+    }
+
+
+def separate_chunk(job):
+    """Worker: separate samples [start, end) of the input memmap into the stem memmaps"""
+    began = time.perf_counter()
+    frames, channels = job['shape']
+    n_fft, hop, pad = job['n_fft'], job['hop'], job['pad']
+    start, end = job['start'], job['end']
+    source = np.memmap(job['input'], dtype=np.float32, mode='r', shape=(frames, channels))
+
+    # Context either side (zeros past the ends of the track) keeps chunk joins seamless
+    lo, hi = start - pad, end + pad
+    segment = np.zeros((hi - lo, channels), dtype=np.float32)
+    segment[max(lo, 0) - lo:min(hi, frames) - lo] = source[max(lo, 0):min(hi, frames)]
+    del source
+
+    window = np.hanning(n_fft + 1)[:n_fft].astype(np.float32)
+    spectra = [stft(segment[:, c], n_fft, hop, window) for c in range(channels)]
+    masks = stem_masks(spectra, job['rate'], n_fft, job['stems'], job['kernel_t'], job['kernel_f'])
+    for stem, mask in masks.items():
+        out = np.memmap(job['outputs'][stem], dtype=np.float32, mode='r+', shape=(frames, channels))
+        for c in range(channels):
+            signal = istft(spectra[c] * mask, n_fft, hop, window, len(segment))
+            out[start:min(end, frames), c] = signal[pad:pad + min(end, frames) - start]
+        out.flush()
+        del out
+    return job['index'], time.perf_counter() - began
+
+
+def decode_to_memmap(source, path):
+    """Decode a WAV (any file-like or path) into a (frames, channels) float32 memmap; returns (rate, frames, channels)
+
+    Other formats go through the soundfile package when it is installed.
+    """
+    try:
+        reader = wave.open(source, 'rb')
+    except (wave.Error, EOFError):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return _decode_soundfile(source, path)
+    with reader:
+        rate, channels, width = reader.getframerate(), reader.getnchannels(), reader.getsampwidth()
+        frames = reader.getnframes()
+        if not frames:
+            raise StemError("The audio file is empty")
+        # Plain sequential writes: a w+ memmap would keep every page of the track resident in this process
+        pos = 0
+        with open(path, 'wb') as out:
+            while pos < frames:
+                data = reader.readframes(WAV_BLOCK)
+                if not data:
+                    break
+                block = _pcm_to_float(data, width)
+                out.write(block.tobytes())
+                pos += len(block) // channels
+    return rate, pos, channels
+
+
+def _pcm_to_float(data, width):
+    if width == 1:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    if width == 2:
+        return np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768
+    if width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        values = raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16)
+        return (np.where(values >= 1 << 23, values - (1 << 24), values)).astype(np.float32) / (1 << 23)
+    if width == 4:
+        return np.frombuffer(data, dtype='<i4').astype(np.float32) / 2147483648
+    raise StemError(f"Unsupported WAV sample width: {width} bytes")
+
+
+def _decode_soundfile(source, path):
+    try:
+        import soundfile
+    except ImportError:
+        raise StemError("Only WAV can be read without the soundfile package (pip install soundfile)") from None
+    try:
+        with soundfile.SoundFile(source) as f:
+            rate, channels, frames = f.samplerate, f.channels, f.frames
+            if not frames:
+                raise StemError("The audio file is empty")
+            pos = 0
+            with open(path, 'wb') as out:
+                for block in f.blocks(blocksize=WAV_BLOCK, dtype='float32', always_2d=True):
+                    out.write(block.tobytes())
+                    pos += len(block)
+    except RuntimeError as e:
+        raise StemError(f"Could not decode audio: {e}") from None
+    return rate, pos, channels
+
+
+class StemResult:
+    """Separated stems as read-only memmaps in a work directory; cleanup() removes them"""
+
+    def __init__(self, workdir, stems, rate, frames, channels, timings):
+        self.workdir = workdir
+        self.rate = rate
+        self.frames = frames
+        self.channels = channels
+        self.timings = timings
+        self.stems = {
+            stem: np.memmap(os.path.join(workdir, f'{stem}.f32'), dtype=np.float32, mode='r',
+                            shape=(frames, channels))
+            for stem in stems
+        }
+
+    @property
+    def duration(self):
+        return self.frames / self.rate
+
+    def write_wav(self, stem, target, normalize=False, fade_in_ms=0, fade_out_ms=0):
+        """Write one stem as 16-bit WAV to a path or file, a block at a time"""
+        data = self.stems[stem]
+        gain = 1.0
+        if normalize:
+            peak = max((float(np.abs(data[i:i + WAV_BLOCK]).max()) for i in range(0, self.frames, WAV_BLOCK)),
+                       default=0.0)
+            gain = 0.9 / peak if peak > EPS else 1.0
+        fade_in = min(int(self.rate * fade_in_ms / 1000), self.frames)
+        fade_out = min(int(self.rate * fade_out_ms / 1000), self.frames)
+        with wave.open(target, 'wb') as writer:
+            writer.setnchannels(self.channels)
+            writer.setsampwidth(2)
+            writer.setframerate(self.rate)
+            for i in range(0, self.frames, WAV_BLOCK):
+                block = data[i:i + WAV_BLOCK] * gain
+                positions = np.arange(i, i + len(block))
+                if fade_in:
+                    block *= np.clip(positions / fade_in, 0, 1)[:, None]
+                if fade_out:
+                    block *= np.clip((self.frames - positions) / fade_out, 0, 1)[:, None]
+                writer.writeframes((np.clip(block, -1, 1) * 32767).astype('<i2').tobytes())
+
+    def _export_path(self, name, suffix, options):
+        return os.path.join(self.workdir, f"{name}-{'-'.join(f'{k}{v}' for k, v in sorted(options.items()))}{suffix}")
+
+    def wav_path(self, stem, **options):
+        """Path of a WAV export of stem in the work directory (written once per option set)"""
+        path = self._export_path(stem, '.wav', options)
+        if not os.path.exists(path):
+            # Written under a temporary name, so a concurrent caller never sees half a file
+            partial = f'{path}.{threading.get_ident()}.part'
+            self.write_wav(stem, partial, **options)
+            os.replace(partial, path)
+        return path
+
+    def zip_path(self, **options):
+        """Path of an uncompressed ZIP of every stem's WAV export (written once per option set)"""
+        path = self._export_path('stems', '.zip', options)
+        if not os.path.exists(path):
+            partial = f'{path}.{threading.get_ident()}.part'
+            with zipfile.ZipFile(partial, 'w', zipfile.ZIP_STORED) as archive:
+                for stem in self.stems:
+                    archive.write(self.wav_path(stem, **options), f'{stem}.wav')
+            os.replace(partial, path)
+        return path
+
+    def cleanup(self):
+        self.stems = {}
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class StemSeparator:
+    """Separate an audio file into stems in overlapping chunks across a process pool
+
+    stems is '2stems' (vocals, accompaniment) or '4stems' (vocals, drums, bass,
+    other). With workers <= 1 chunks run in this process. Peak memory per
+    process is one chunk's spectra, whatever the track length.
+    """
+
+    def __init__(self, stems='4stems', quality='Balanced', workers=None, chunk_seconds=None, workdir=None):
+        if stems not in STEM_SETS:
+            raise StemError(f"Unknown stem set {stems!r} ({', '.join(STEM_SETS)})")
+        self.stems = STEM_SETS[stems]
+        self.params = QUALITY[quality]
+        if workers is None:
+            workers = int(os.getenv('STEM_WORKERS') or max(1, (os.cpu_count() or 2) - 1))
+        self.workers = workers
+        self.chunk_seconds = chunk_seconds or float(os.getenv('STEM_CHUNK_SECONDS', 10))
+        self.workdir = workdir or os.getenv('STEM_WORKDIR') or None
+
+    def jobs(self, paths, rate, frames, channels):
+        n_fft, hop = self.params['n_fft'], self.params['hop']
+        # Chunks start on the hop grid and carry enough context for the frames and the time median
+        chunk = max(hop, int(self.chunk_seconds * rate) // hop * hop)
+        pad = (self.params['kernel_t'] // 2 + n_fft // hop + 1) * hop
+        return [
+            dict(self.params, index=i, start=start, end=start + chunk, pad=pad, rate=rate,
+                 shape=(frames, channels), stems=self.stems, input=paths['input'], outputs=paths['outputs'])
+            for i, start in enumerate(range(0, frames, chunk))
+        ]
+
+    def separate(self, source, progress=None):
+        """Separate source (path or file-like); progress(done, total) is called as chunks finish"""
+        workdir = tempfile.mkdtemp(prefix='stems_', dir=self.workdir)
+        try:
+            began = time.perf_counter()
+            paths = {'input': os.path.join(workdir, 'input.f32'),
+                     'outputs': {stem: os.path.join(workdir, f'{stem}.f32') for stem in self.stems}}
+            rate, frames, channels = decode_to_memmap(source, paths['input'])
+            for path in paths['outputs'].values():
+                # Sparse, zero-filled files the workers map and fill in
+                with open(path, 'wb') as out:
+                    out.truncate(frames * channels * 4)
+            decoded = time.perf_counter()
+
+            jobs = self.jobs(paths, rate, frames, channels)
+            if progress:
+                progress(0, len(jobs))
+            if self.workers <= 1:
+                for done, job in enumerate(jobs, 1):
+                    separate_chunk(job)
+                    if progress:
+                        progress(done, len(jobs))
+            else:
+                # spawn, not fork: the Streamlit server that calls this is multithreaded
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)),
+                                         mp_context=multiprocessing.get_context('spawn')) as pool:
+                    futures = [pool.submit(separate_chunk, job) for job in jobs]
+                    for done, future in enumerate(as_completed(futures), 1):
+                        future.result()
+                        if progress:
+                            progress(done, len(jobs))
+            os.remove(paths['input'])
+        except Exception:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+        finished = time.perf_counter()
+        timings = {'decode_s': decoded - began, 'separate_s': finished - decoded, 'chunks': len(jobs)}
+        logger.info(f"Separated {frames / rate:.1f}s into {len(self.stems)} stems in "
+                    f"{finished - began:.2f}s ({len(jobs)} chunks, {self.workers} workers)")
+        return StemResult(workdir, self.stems, rate, frames, channels, timings)
@@ -1,9 +1,18 @@
 import streamlit as st
 import numpy as np
-import pandas as pd
 import json
 from datetime import datetime
 import io
+import os
+
+import mido
+
+from commands import CommandError, parse_commands
+from midi_backend import BackendError, MidiBackendClient, MidiEventLog, format_events
+from midi_input import RECORD_CONTROL
+from mixer import BANK_SIZE, DEFAULT_FADER, MidiAddressMap, MixerState
+from stem_separation import StemError, StemSeparator
+from theory_index import default_assistant
 
 # Configure page
 st.set_page_config(
@@ -13,12 +22,43 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize session state
-if 'tracks' not in st.session_state:
-    st.session_state.tracks = [
-        {'name': f'Track {i+1}', 'fader': 0.5, 'muted': False, 'solo': False, 'pan': 0.5}
-        for i in range(16)
-    ]
+# Streamlit >= 1.37 has st.fragment; older releases only have the experimental name
+fragment = getattr(st, 'fragment', None) or st.experimental_fragment
+# Streamlit >= 1.52 takes a callable for download data and only runs it when the button is clicked
+DEFERRED_DOWNLOADS = tuple(int(p) for p in st.__version__.split('.')[:2]) >= (1, 52)
+
+def export_button(label, key, build, file_name, mime, **kwargs):
+    """Download button for an export file that is only written and read when the user asks for it
+
+    build() returns the file's path. Older Streamlit releases get a prepare
+    button first, since they read download data on every rerun.
+    """
+    if DEFERRED_DOWNLOADS:
+        def data():
+            with open(build(), 'rb') as f:
+                return f.read()
+        st.download_button(label, data, file_name=file_name, mime=mime, key=key, on_click="ignore", **kwargs)
+        return
+    prepared = st.session_state.setdefault('stem_exports', {})
+    if key not in prepared and st.button(f"⚙️ Prepare: {label}", key=f"prepare_{key}", **kwargs):
+        prepared[key] = build()
+    if key in prepared:
+        with open(prepared[key], 'rb') as f:
+            st.download_button(label, f, file_name=file_name, mime=mime, key=key, **kwargs)
+
+@st.cache_resource
+def shared_address_map(track_count, mode):
+    """One address map per layout, shared by every session (it is read-only after construction)"""
+    return MidiAddressMap(track_count, mode=mode)
+
+# Initialize session state; tracks are array-backed so large sessions stay cheap to rerun
+if 'mixer' not in st.session_state:
+    st.session_state.address_map = shared_address_map(
+        int(os.getenv('MIXER_TRACKS', 16)),
+        os.getenv('MIDI_ADDRESSING', 'channel').lower()
+    )
+    st.session_state.mixer = MixerState(st.session_state.address_map.track_count)
+    st.session_state.tracks = st.session_state.mixer.tracks
 
 if 'transport' not in st.session_state:
     st.session_state.transport = {'playing': False, 'recording': False, 'loop': False}
@@ -26,8 +66,22 @@ if 'transport' not in st.session_state:
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
+# MIDI_BACKEND=host:port (or a socket path) sends to a real port through midi_backend.py;
+# without it, or while it is unreachable, messages only go to this session's log
+MIDI_BACKEND = os.getenv('MIDI_BACKEND', '')
+
+@st.cache_resource
+def midi_backend_client(address):
+    """One connection to the shared MIDI backend for every session"""
+    return MidiBackendClient(address)
+
 if 'midi_log' not in st.session_state:
-    st.session_state.midi_log = []
+    st.session_state.midi_log = MidiEventLog(int(os.getenv('MIDI_LOG_SIZE', 256)))
+    st.session_state.midi_log_since = {'backend': 0, 'local': 0}
+    st.session_state.backend_error = None
+
+if 'command_status' not in st.session_state:
+    st.session_state.command_status = None
 
 # Custom CSS
 st.markdown("""
@@ -60,17 +114,141 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Helper Functions
-def log_midi(message):
-    """Log MIDI messages"""
-    timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-    st.session_state.midi_log.append(f"[{timestamp}] {message}")
-    if len(st.session_state.midi_log) > 50:
-        st.session_state.midi_log.pop(0)
+def send_midi(messages):
+    """Send messages (or NRPN tuples) to the backend, or record them in the session log without one"""
+    if MIDI_BACKEND:
+        try:
+            midi_backend_client(MIDI_BACKEND).send(messages)
+            st.session_state.backend_error = None
+            return
+        except BackendError as e:
+            st.session_state.backend_error = str(e)
+    st.session_state.midi_log.extend(messages)
+
+def midi_log_source():
+    """('backend', client) while the backend answers, else ('local', this session's log)"""
+    if MIDI_BACKEND and not st.session_state.backend_error:
+        return 'backend', midi_backend_client(MIDI_BACKEND)
+    return 'local', st.session_state.midi_log
+
+def clear_midi_log(source, next_seq):
+    """Hide what has been logged so far (the ring buffer itself is shared)"""
+    st.session_state.midi_log_since[source] = next_seq
+
+def apply_command(action):
+    """Apply a parsed voice command to the mixer, send its MIDI and return a status message"""
+    mixer = st.session_state.mixer
+    encode = st.session_state.address_map.encode
+    tracks = st.session_state.tracks
+    transport = st.session_state.transport
+
+    if action.kind == 'solo':
+        # Clear the other solos; only changed tracks produce MIDI
+        send_midi([encode('solo', i, i == action.track) for i in mixer.solo_exclusive(action.track).tolist()])
+        return f"✅ Soloed Track {action.track+1}"
+
+    if action.kind in ('mute', 'unmute'):
+        muted = action.kind == 'mute'
+        if action.last is None:
+            tracks[action.track]['muted'] = muted
+            send_midi([encode('muted', action.track, muted)])
+            return f"✅ {'Muted' if muted else 'Unmuted'} Track {action.track+1}"
+        changed = mixer.set_range('muted', action.track, action.last, muted)
+        send_midi([encode('muted', i, muted) for i in changed.tolist()])
+        return f"✅ {'Muted' if muted else 'Unmuted'} Tracks {action.track+1}-{action.last+1}"
+
+    if action.kind == 'fader':
+        tracks[action.track]['fader'] = action.value
+        send_midi([encode('fader', action.track, action.value)])
+        return f"✅ Set Track {action.track+1} fader to {int(round(action.value*100))}%"
+
+    if action.kind == 'fade':
+        # The web demo has no ramp scheduler, so the fade lands on its target straight away; say so
+        tracks[action.track]['fader'] = action.value
+        send_midi([encode('fader', action.track, action.value)])
+        return (f"✅ Set Track {action.track+1} fader to {int(round(action.value*100))}% "
+                f"(fades are applied instantly here, not over {action.duration:g}s)")
+
+    if action.kind == 'reset':
+        changed = mixer.reset_faders(DEFAULT_FADER)
+        send_midi([encode('fader', i, DEFAULT_FADER) for i in changed.tolist()])
+        return f"✅ Reset {len(changed)} faders to {int(round(DEFAULT_FADER*100))}%"
+
+    if action.kind == 'play':
+        transport['playing'] = True
+        send_midi([mido.Message('start')])
+        return "✅ Playing"
+
+    if action.kind == 'stop':
+        transport['playing'] = False
+        transport['recording'] = False
+        send_midi([mido.Message('stop')])
+        return "✅ Stopped"
+
+    if action.kind == 'record':
+        transport['recording'] = True
+        send_midi([mido.Message('control_change', control=RECORD_CONTROL, value=127)])
+        return "✅ Recording"
+
+def forget_sliders():
+    """Drop slider widget state so the sliders pick up mixer changes made by commands or a load"""
+    for key in [k for k in st.session_state if k.startswith(('fader_', 'pan_'))]:
+        del st.session_state[key]
+
+# Widget callbacks run before the rerun they trigger, so the page is drawn once with the new state
+def on_slider(field, track_idx):
+    """Copy a fader/pan slider into the mixer"""
+    value = st.session_state[f"{field}_{track_idx}"]
+    st.session_state.tracks[track_idx][field] = value
+    send_midi([st.session_state.address_map.encode(field, track_idx, value)])
+
+def on_toggle(field, track_idx):
+    """Flip a track's mute or solo"""
+    track = st.session_state.tracks[track_idx]
+    track[field] = not track[field]
+    send_midi([st.session_state.address_map.encode(field, track_idx, track[field])])
+
+def on_transport(button):
+    """Play/pause, stop and record buttons"""
+    transport = st.session_state.transport
+    if button == 'play':
+        transport['playing'] = not transport['playing']
+        send_midi([mido.Message('start' if transport['playing'] else 'stop')])
+    elif button == 'stop':
+        transport['playing'] = False
+        transport['recording'] = False
+        send_midi([mido.Message('stop')])
+    else:
+        transport['recording'] = not transport['recording']
+        send_midi([mido.Message('control_change', control=RECORD_CONTROL, value=127 if transport['recording'] else 0)])
+
+def on_voice_command():
+    """Process voice commands; 'and'/'then' chain several, all checked before any is applied"""
+    voice_input = st.session_state.voice_input
+    if not voice_input:
+        return
+    try:
+        actions = parse_commands(voice_input, st.session_state.mixer.track_count)
+    except CommandError as e:
+        st.session_state.command_status = ('error', str(e))
+        return
+    if not actions:
+        st.session_state.command_status = (
+            'warning', "Command not recognized. Try: 'solo track 3', 'mute track 5', 'set fader 1 to 75'")
+        return
+    st.session_state.command_status = ('success', " · ".join(apply_command(action) for action in actions))
+    forget_sliders()
+
+def on_session_upload():
+    """Load an imported session once, when the file changes (not on every rerun)"""
+    uploaded_file = st.session_state.session_upload
+    if uploaded_file:
+        load_session(uploaded_file.read().decode())
 
 def save_session():
     """Save session to JSON"""
     session_data = {
-        'tracks': st.session_state.tracks,
+        'tracks': st.session_state.mixer.to_records(),
         'transport': st.session_state.transport,
         'timestamp': datetime.now().isoformat()
     }
@@ -80,12 +258,108 @@ def load_session(json_data):
     """Load session from JSON"""
     try:
         data = json.loads(json_data)
-        st.session_state.tracks = data.get('tracks', st.session_state.tracks)
+        if 'tracks' in data:
+            track_count = st.session_state.address_map.track_count
+            st.session_state.mixer = MixerState.from_records(data['tracks'][:track_count], track_count)
+            st.session_state.tracks = st.session_state.mixer.tracks
+            forget_sliders()
         st.session_state.transport = data.get('transport', st.session_state.transport)
         st.success("Session loaded successfully!")
     except Exception as e:
         st.error(f"Error loading session: {e}")
 
+# Fragments: interacting with one reruns only that function, not the whole script
+@fragment
+def transport_panel():
+    """Transport buttons and status"""
+    transport = st.session_state.transport
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.button("▶️" if not transport['playing'] else "⏸️", key="play_btn",
+                  on_click=on_transport, args=('play',))
+    with col2:
+        st.button("⏹️", key="stop_btn", on_click=on_transport, args=('stop',))
+    with col3:
+        st.button("⏺️" if not transport['recording'] else "⏹️", key="rec_btn",
+                  on_click=on_transport, args=('record',))
+
+    # Transport status
+    if transport['playing']:
+        st.success("▶️ Playing")
+    if transport['recording']:
+        st.error("⏺️ Recording")
+
+@fragment
+def track_strip(track_idx):
+    """One channel strip: fader, pan, mute and solo"""
+    track = st.session_state.tracks[track_idx]
+    st.markdown(f"### 🎚️ {track['name']}")
+
+    # Fader
+    st.slider(
+        "Volume",
+        0.0, 1.0,
+        track['fader'],
+        0.01,
+        key=f"fader_{track_idx}",
+        label_visibility="collapsed",
+        on_change=on_slider,
+        args=('fader', track_idx)
+    )
+    st.caption(f"🔊 {int(track['fader']*100)}%")
+
+    # Pan
+    st.slider(
+        "Pan",
+        0.0, 1.0,
+        track['pan'],
+        0.01,
+        key=f"pan_{track_idx}",
+        label_visibility="collapsed",
+        on_change=on_slider,
+        args=('pan', track_idx)
+    )
+    pan_text = "L" if track['pan'] < 0.45 else "R" if track['pan'] > 0.55 else "C"
+    st.caption(f"↔️ {pan_text}")
+
+    # Mute/Solo buttons
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button(
+            "M" if not track['muted'] else "🔇",
+            key=f"mute_{track_idx}",
+            type="primary" if track['muted'] else "secondary",
+            use_container_width=True,
+            on_click=on_toggle,
+            args=('muted', track_idx)
+        )
+    with col2:
+        st.button(
+            "S" if not track['solo'] else "🎯",
+            key=f"solo_{track_idx}",
+            type="primary" if track['solo'] else "secondary",
+            use_container_width=True,
+            on_click=on_toggle,
+            args=('solo', track_idx)
+        )
+
+# With MIDI_LOG_REFRESH seconds set, the log polls on its own so strip changes show up without a full rerun
+@fragment(run_every=float(os.getenv('MIDI_LOG_REFRESH', 0)) or None)
+def midi_log_panel():
+    """Last 20 MIDI events, formatted only here"""
+    with st.expander("📝 MIDI Activity Log", expanded=False):
+        source, log = midi_log_source()
+        try:
+            next_seq, events = log.recent(20, st.session_state.midi_log_since[source])
+        except BackendError as e:
+            st.session_state.backend_error = str(e)
+            next_seq, events = 0, []
+        if events:
+            st.code("\n".join(format_events(events)), language="text")
+            st.button("🗑️ Clear Log", on_click=clear_midi_log, args=(source, next_seq))
+        else:
+            st.info("No MIDI activity yet")
+
 # Main App Layout
 st.title("🎛️ FaderPort 16 AI Controller")
 st.markdown("**Professional DAW Control with AI Voice Commands & Stem Separation**")
@@ -104,34 +378,7 @@ with st.sidebar:
 
     # Transport Controls
     st.subheader("🎮 Transport")
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        if st.button("▶️" if not st.session_state.transport['playing'] else "⏸️", key="play_btn"):
-            st.session_state.transport['playing'] = not st.session_state.transport['playing']
-            status = "Playing" if st.session_state.transport['playing'] else "Paused"
-            log_midi(f"Transport: {status}")
-            st.rerun()
-
-    with col2:
-        if st.button("⏹️", key="stop_btn"):
-            st.session_state.transport['playing'] = False
-            st.session_state.transport['recording'] = False
-            log_midi("Transport: Stopped")
-            st.rerun()
-
-    with col3:
-        if st.button("⏺️" if not st.session_state.transport['recording'] else "⏹️", key="rec_btn"):
-            st.session_state.transport['recording'] = not st.session_state.transport['recording']
-            status = "Recording" if st.session_state.transport['recording'] else "Stopped"
-            log_midi(f"Transport: {status}")
-            st.rerun()
-
-    # Transport status
-    if st.session_state.transport['playing']:
-        st.success("▶️ Playing")
-    if st.session_state.transport['recording']:
-        st.error("⏺️ Recording")
+    transport_panel()
 
     st.divider()
 
@@ -147,9 +394,7 @@ with st.sidebar:
             mime="application/json"
         )
 
-    uploaded_file = st.file_uploader("📤 Import Session", type=['json'])
-    if uploaded_file:
-        load_session(uploaded_file.read().decode())
+    st.file_uploader("📤 Import Session", type=['json'], key="session_upload", on_change=on_session_upload)
 
     st.divider()
 
@@ -157,99 +402,35 @@ with st.sidebar:
     st.subheader("🔧 System Status")
     st.info("✅ Streamlit Cloud Ready")
     st.success("✅ Demo Mode Active")
-    st.warning("⚠️ MIDI: Simulated")
+    if MIDI_BACKEND:
+        try:
+            status = midi_backend_client(MIDI_BACKEND).status()
+            st.session_state.backend_error = None
+            st.success(f"✅ MIDI: {status['port']} via {MIDI_BACKEND}")
+        except BackendError as e:
+            st.session_state.backend_error = str(e)
+            st.warning(f"⚠️ MIDI: backend unreachable, simulated ({e})")
+    else:
+        st.warning("⚠️ MIDI: Simulated")
 
 # Main Content Area
 if mode == "DAW Control":
-    st.header("🎚️ 16-Track Mixer")
+    st.header(f"🎚️ {st.session_state.mixer.track_count}-Track Mixer")
 
     # Voice Command Input
     with st.expander("🎤 Voice Commands", expanded=True):
         col1, col2 = st.columns([3, 1])
         with col1:
-            voice_input = st.text_input(
+            st.text_input(
                 "Enter voice command or use speech input",
                 placeholder="e.g., 'solo track 3', 'mute track 5', 'set fader 1 to 75'",
                 key="voice_input"
             )
         with col2:
-            if st.button("🎤 Process", key="process_voice"):
-                if voice_input:
-                    # Process voice commands
-                    cmd = voice_input.lower()
-
-                    if "solo track" in cmd:
-                        try:
-                            track_num = int(''.join(filter(str.isdigit, cmd))) - 1
-                            if 0 <= track_num < 16:
-                                # Clear all solos
-                                for track in st.session_state.tracks:
-                                    track['solo'] = False
-                                st.session_state.tracks[track_num]['solo'] = True
-                                log_midi(f"CC{track_num+32}: 127 (Solo Track {track_num+1})")
-                                st.success(f"✅ Soloed Track {track_num+1}")
-                                st.rerun()
-                        except:
-                            st.error("Invalid track number")
-
-                    elif "mute track" in cmd:
-                        try:
-                            track_num = int(''.join(filter(str.isdigit, cmd))) - 1
-                            if 0 <= track_num < 16:
-                                st.session_state.tracks[track_num]['muted'] = True
-                                log_midi(f"CC{track_num+16}: 127 (Mute Track {track_num+1})")
-                                st.success(f"✅ Muted Track {track_num+1}")
-                                st.rerun()
-                        except:
-                            st.error("Invalid track number")
-
-                    elif "unmute track" in cmd:
-                        try:
-                            track_num = int(''.join(filter(str.isdigit, cmd))) - 1
-                            if 0 <= track_num < 16:
-                                st.session_state.tracks[track_num]['muted'] = False
-                                log_midi(f"CC{track_num+16}: 0 (Unmute Track {track_num+1})")
-                                st.success(f"✅ Unmuted Track {track_num+1}")
-                                st.rerun()
-                        except:
-                            st.error("Invalid track number")
-
-                    elif "set fader" in cmd or "fader" in cmd:
-                        try:
-                            nums = [int(s) for s in cmd.split() if s.isdigit()]
-                            if len(nums) >= 2:
-                                track_num = nums[0] - 1
-                                value = nums[1] / 100
-                                if 0 <= track_num < 16 and 0 <= value <= 1:
-                                    st.session_state.tracks[track_num]['fader'] = value
-                                    midi_val = int(value * 127)
-                                    log_midi(f"CC{track_num}: {midi_val} (Fader {track_num+1})")
-                                    st.success(f"✅ Set Track {track_num+1} fader to {int(value*100)}%")
-                                    st.rerun()
-                        except:
-                            st.error("Invalid fader command")
-
-                    elif "play" in cmd:
-                        st.session_state.transport['playing'] = True
-                        log_midi("Transport: Play")
-                        st.success("✅ Playing")
-                        st.rerun()
-
-                    elif "stop" in cmd:
-                        st.session_state.transport['playing'] = False
-                        st.session_state.transport['recording'] = False
-                        log_midi("Transport: Stop")
-                        st.success("✅ Stopped")
-                        st.rerun()
-
-                    elif "record" in cmd:
-                        st.session_state.transport['recording'] = True
-                        log_midi("Transport: Record")
-                        st.success("✅ Recording")
-                        st.rerun()
-
-                    else:
-                        st.warning("Command not recognized. Try: 'solo track 3', 'mute track 5', 'set fader 1 to 75'")
+            st.button("🎤 Process", key="process_voice", on_click=on_voice_command)
+        if st.session_state.command_status:
+            kind, message = st.session_state.command_status
+            getattr(st, kind)(message)
 
         # Command help
         with st.expander("💡 Command Examples"):
@@ -263,81 +444,38 @@ if mode == "DAW Control":
             - "solo track 3" - Solo track 3
             - "mute track 5" - Mute track 5
             - "unmute track 2" - Unmute track 2
+            - "mute tracks 1 through 8" - Mute a range of tracks
+            - "unmute all" - Unmute every track
 
             **Fader Control:**
             - "set fader 1 to 75" - Set track 1 to 75%
             - "fader 3 to 50" - Set track 3 to 50%
+            - "reset all faders" - Every fader back to 50%
+
+            **Chaining:**
+            - "mute tracks 1 through 8 and solo 3 and set fader 5 to 60"
             """)
 
     st.divider()
 
-    # Track Controls (4x4 grid)
+    # Track Controls: one bank of 16 in a 4x4 grid
+    bank = 0
+    if st.session_state.mixer.bank_count > 1:
+        bank = st.selectbox(
+            "Bank",
+            range(st.session_state.mixer.bank_count),
+            format_func=lambda b: f"Bank {b+1}: Tracks {b*BANK_SIZE+1}-{min((b+1)*BANK_SIZE, st.session_state.mixer.track_count)}",
+            key="bank"
+        )
+    bank_tracks = st.session_state.mixer.bank_tracks(bank)
     for row in range(4):
         cols = st.columns(4)
         for col_idx, col in enumerate(cols):
-            track_idx = row * 4 + col_idx
-            track = st.session_state.tracks[track_idx]
-
+            track_idx = bank_tracks.start + row * 4 + col_idx
+            if track_idx not in bank_tracks:
+                continue
             with col:
-                st.markdown(f"### 🎚️ {track['name']}")
-
-                # Fader
-                new_fader = st.slider(
-                    "Volume",
-                    0.0, 1.0,
-                    track['fader'],
-                    0.01,
-                    key=f"fader_{track_idx}",
-                    label_visibility="collapsed"
-                )
-
-                if new_fader != track['fader']:
-                    track['fader'] = new_fader
-                    midi_val = int(new_fader * 127)
-                    log_midi(f"CC{track_idx}: {midi_val}")
-
-                st.caption(f"🔊 {int(track['fader']*100)}%")
-
-                # Pan
-                new_pan = st.slider(
-                    "Pan",
-                    0.0, 1.0,
-                    track['pan'],
-                    0.01,
-                    key=f"pan_{track_idx}",
-                    label_visibility="collapsed"
-                )
-
-                if new_pan != track['pan']:
-                    track['pan'] = new_pan
-                    log_midi(f"Pan{track_idx}: {int(new_pan*127)}")
-
-                pan_text = "L" if new_pan < 0.45 else "R" if new_pan > 0.55 else "C"
-                st.caption(f"↔️ {pan_text}")
-
-                # Mute/Solo buttons
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button(
-                        "M" if not track['muted'] else "🔇",
-                        key=f"mute_{track_idx}",
-                        type="primary" if track['muted'] else "secondary",
-                        use_container_width=True
-                    ):
-                        track['muted'] = not track['muted']
-                        log_midi(f"CC{track_idx+16}: {127 if track['muted'] else 0}")
-                        st.rerun()
-
-                with col2:
-                    if st.button(
-                        "S" if not track['solo'] else "🎯",
-                        key=f"solo_{track_idx}",
-                        type="primary" if track['solo'] else "secondary",
-                        use_container_width=True
-                    ):
-                        track['solo'] = not track['solo']
-                        log_midi(f"CC{track_idx+32}: {127 if track['solo'] else 0}")
-                        st.rerun()
+                track_strip(track_idx)
 
 elif mode == "Music Theory Chat":
     st.header("🎼 Music Theory Assistant")
@@ -359,11 +497,10 @@ elif mode == "Music Theory Chat":
                 'timestamp': datetime.now()
             })
 
-            # Simple music theory responses
-            response = get_music_theory_response(user_input.lower())
+            # Curated answers via the shared TF-IDF index (built once per process)
+            response, _ = default_assistant().answer(user_input)
 
             st.session_state.chat_history[-1]['bot'] = response
-            st.rerun()
 
     # Display chat history
     st.divider()
@@ -383,7 +520,7 @@ elif mode == "Stem Separation":
     uploaded_audio = st.file_uploader(
         "Upload audio file",
         type=['wav', 'mp3', 'ogg', 'flac'],
-        help="Upload an audio file to separate into stems"
+        help="Upload an audio file to separate into stems (formats other than WAV need the soundfile package)"
     )
 
     col1, col2 = st.columns([2, 1])
@@ -391,8 +528,8 @@ elif mode == "Stem Separation":
     with col1:
         model_type = st.selectbox(
             "Separation Model",
-            ["2stems (Vocals/Accompaniment)", "4stems (Vocals/Drums/Bass/Other)", "5stems (with Piano)"],
-            help="Choose separation quality"
+            ["4stems (Vocals/Drums/Bass/Other)", "2stems (Vocals/Accompaniment)"],
+            help="Choose which stems to produce"
         )
 
     with col2:
@@ -405,65 +542,63 @@ elif mode == "Stem Separation":
     if uploaded_audio:
         st.success(f"✅ File uploaded: {uploaded_audio.name}")
 
-        with st.expander("⚙️ Advanced Settings", expanded=False):
+        with st.expander("⚙️ Export Settings", expanded=False):
             col1, col2 = st.columns(2)
             with col1:
-                sample_rate = st.select_slider("Sample Rate", options=[22050, 44100, 48000], value=44100)
                 normalize = st.checkbox("Normalize output", value=True)
             with col2:
                 fade_in = st.slider("Fade in (ms)", 0, 1000, 50)
                 fade_out = st.slider("Fade out (ms)", 0, 1000, 50)
 
         if st.button("🚀 Separate Stems", type="primary", use_container_width=True):
-            with st.spinner("🎵 Separating stems... This may take a few minutes..."):
-                # Simulate stem separation process
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-
-                steps = [
-                    ("Loading audio file...", 20),
-                    ("Analyzing frequency spectrum...", 40),
-                    ("Extracting vocals...", 60),
-                    ("Extracting instruments...", 80),
-                    ("Finalizing stems...", 100)
-                ]
-
-                for step, progress in steps:
-                    status_text.text(step)
-                    progress_bar.progress(progress)
-                    import time
-                    time.sleep(0.5)
-
-                st.success("✅ Stem separation complete!")
-
-                # Display results
-                st.markdown("### 🎧 Separated Stems")
-
-                stems = ["Vocals", "Drums", "Bass", "Other"]
-                cols = st.columns(4)
-
-                for idx, (stem_name, col) in enumerate(zip(stems, cols)):
-                    with col:
-                        st.markdown(f"#### {stem_name}")
-                        st.markdown("🎵 Audio Player")
-                        st.caption("(Demo mode - no actual audio)")
-
-                        # Volume control for each stem
-                        vol = st.slider(
-                            "Volume",
-                            0, 100, 100,
-                            key=f"stem_vol_{idx}",
-                            label_visibility="collapsed"
-                        )
-
-                        if st.button(f"💾 Export {stem_name}", key=f"export_{idx}"):
-                            st.success(f"✅ {stem_name} exported!")
+            previous = st.session_state.pop('stem_result', None)
+            if previous:
+                previous.cleanup()
+            st.session_state.pop('stem_exports', None)
+            st.session_state.pop('stem_preview', None)
+            progress_bar = st.progress(0.0, text="Decoding audio...")
+
+            def show_progress(done, total):
+                progress_bar.progress(done / total, text=f"Separating... {done}/{total} chunks done")
+
+            try:
+                separator = StemSeparator(model_type.split()[0], quality)
+                st.session_state.stem_result = separator.separate(uploaded_audio, progress=show_progress)
+                st.session_state.stem_source = uploaded_audio.name
+            except StemError as e:
+                st.error(f"Stem separation failed: {e}")
+
+        result = st.session_state.get('stem_result')
+        if result and st.session_state.get('stem_source') == uploaded_audio.name:
+            took = result.timings['decode_s'] + result.timings['separate_s']
+            st.success(f"✅ Separated {result.duration:.1f}s of audio in {took:.1f}s "
+                       f"({result.timings['chunks']} chunks)")
+
+            # Display results
+            st.markdown("### 🎧 Separated Stems")
+
+            # Exports are written once per option set, and only when a stem is previewed or downloaded
+            export = {'normalize': normalize, 'fade_in_ms': fade_in, 'fade_out_ms': fade_out}
+            options_key = '-'.join(str(v) for v in export.values())
+            base_name = os.path.splitext(uploaded_audio.name)[0]
+            cols = st.columns(len(result.stems))
+
+            for stem, col in zip(result.stems, cols):
+                with col:
+                    st.markdown(f"#### {stem.capitalize()}")
+                    if st.button("▶️ Preview", key=f"preview_{stem}"):
+                        st.session_state.stem_preview = stem
+                    if st.session_state.get('stem_preview') == stem:
+                        st.audio(result.wav_path(stem, **export))
+                    export_button(f"💾 Export {stem.capitalize()}", f"export_{stem}_{options_key}",
+                                  lambda stem=stem: result.wav_path(stem, **export),
+                                  file_name=f"{base_name}-{stem}.wav", mime="audio/wav")
 
-                st.divider()
+            st.divider()
 
-                # Batch export
-                if st.button("📦 Export All Stems (ZIP)", use_container_width=True):
-                    st.success("✅ All stems exported as ZIP file!")
+            # Batch export
+            export_button("📦 Export All Stems (ZIP)", f"export_zip_{options_key}", lambda: result.zip_path(**export),
+                          file_name=f"{base_name}-stems.zip", mime="application/zip", use_container_width=True)
 
 elif mode == "Phonic Mind":
     st.header("🧠 Phonic Mind - AI Audio Analysis")
@@ -594,16 +729,7 @@ elif mode == "Phonic Mind":
 
 # MIDI Log Display (bottom of page)
 st.divider()
-with st.expander("📝 MIDI Activity Log", expanded=False):
-    if st.session_state.midi_log:
-        log_text = "\n".join(st.session_state.midi_log[-20:])
-        st.code(log_text, language="text")
-
-        if st.button("🗑️ Clear Log"):
-            st.session_state.midi_log = []
-            st.rerun()
-    else:
-        st.info("No MIDI activity yet")
+midi_log_panel()
 
 # Footer
 st.divider()
@@ -614,25 +740,3 @@ with col2:
     st.caption("Built with Streamlit")
 with col3:
     st.caption(f"Session: {datetime.now().strftime('%Y-%m-%d')}")
-
-# Helper function for music theory
-def get_music_theory_response(question):
-    """Simple music theory responses"""
-
-    responses = {
-        'chord progression': "A great chord progression for jazz is: IIm7 - V7 - Imaj7 (e.g., Dm7 - G7 - Cmaj7). This is called the II-V-I progression and is the foundation of jazz harmony.",
-        'circle of fifths': "The Circle of Fifths shows the relationship between the 12 tones. Moving clockwise adds sharps, counter-clockwise adds flats. It helps with key signatures and chord progressions.",
-        'scale': "Common scales include: Major (Ionian), Natural Minor (Aeolian), Harmonic Minor, Melodic Minor, and the 7 modes (Ionian, Dorian, Phrygian, Lydian, Mixolydian, Aeolian, Locrian).",
-        'modes': "The 7 modes are: Ionian (Major), Dorian, Phrygian, Lydian, Mixolydian, Aeolian (Minor), and Locrian. Each has a unique character and sound.",
-        'modulate': "To modulate from C Major to A Minor (relative keys), you can use common chords like Am, which exists in both keys. Or use a pivot chord like Em (iii in C, v in Am).",
-        'g7': "Over a G7 chord, you can use: G Mixolydian, G Blues scale, G Altered scale (for tension), or simply G Major Pentatonic for a safe approach.",
-        'tempo': "Common tempos: Largo (40-60 bpm), Adagio (66-76), Andante (76-108), Moderato (108-120), Allegro (120-168), Presto (168-200).",
-        'time signature': "4/4 (common time) has 4 beats per measure. 3/4 is waltz time. 6/8 is compound meter with 2 main beats subdivided into 3. 5/4 and 7/8 are asymmetric meters.",
-        'interval': "Intervals: Unison (0), Minor 2nd (1), Major 2nd (2), Minor 3rd (3), Major 3rd (4), Perfect 4th (5), Tritone (6), Perfect 5th (7), Minor 6th (8), Major 6th (9), Minor 7th (10), Major 7th (11), Octave (12)."
-    }
-
-    for key, response in responses.items():
-        if key in question:
-            return response
-
-    return "That's a great question! Music theory is vast. Try asking about: chord progressions, scales, modes, the circle of fifths, intervals, tempo, time signatures, or modulation."
@@ -0,0 +1,108 @@
+# tests/test_commands.py - Table-driven corpus for the voice command compiler
+#
+# benchmarks/bench_commands.py imports CORPUS and COMPOUND, so the benchmark
+# and the tests check the same utterances.
+import pytest
+
+from commands import Action, CommandError, parse_command, parse_commands
+
+ERROR = 'error'
+
+# (utterance, expected Action / None for "not a command" / ERROR)
+CORPUS = [
+    ("play", Action('play', None, None)),
+    ("please play it", Action('play', None, None)),
+    ("stop", Action('stop', None, None)),
+    ("stop the music", Action('stop', None, None)),
+    ("record", Action('record', None, None)),
+    ("display settings", None),
+    # Words that only contain a transport word are not commands
+    ("replay the chorus", None),
+    ("playback volume", None),
+    ("stopwatch", None),
+    ("the player stopped", None),
+    ("non stop", Action('stop', None, None)),
+    ("hello there", None),
+    ("solo track 3", Action('solo', 2, None)),
+    ("solo track three", Action('solo', 2, None)),
+    ("solo track 16", Action('solo', 15, None)),
+    ("solo track 17", ERROR),
+    ("solo track", ERROR),
+    ("mute track 5", Action('mute', 4, None)),
+    ("mute track twelve", Action('mute', 11, None)),
+    ("unmute track 3", Action('unmute', 2, None)),
+    ("unmute track two", Action('unmute', 1, None)),
+    # Recognizers sometimes split the word; it is still unmute, never mute
+    ("un mute track 3", Action('unmute', 2, None)),
+    ("mute track 0", ERROR),
+    ("set fader 1 to 75", Action('fader', 0, 0.75)),
+    ("fader 3 to 50", Action('fader', 2, 0.5)),
+    ("set fader one to seventy five", Action('fader', 0, 0.75)),
+    ("set fader 4 to seventy five percent", Action('fader', 3, 0.75)),
+    ("fader 2 to 75%", Action('fader', 1, 0.75)),
+    ("set fader sixteen to one hundred", Action('fader', 15, 1.0)),
+    ("set fader 2 to a hundred", Action('fader', 1, 1.0)),
+    ("set fader 2 to zero", Action('fader', 1, 0.0)),
+    ("set fader 2 to twenty", Action('fader', 1, 0.2)),
+    ("set fader 2 to 101", ERROR),
+    ("set fader 17 to 50", ERROR),
+    ("set fader 1", ERROR),
+    ("fade track 3 to 20 over 4 seconds", Action('fade', 2, 0.2, 4.0)),
+    ("fade track three to twenty over four seconds", Action('fade', 2, 0.2, 4.0)),
+    ("set fader 1 to 75 over 2 seconds", Action('fade', 0, 0.75, 2.0)),
+    ("fade track 2 to 50", Action('fade', 1, 0.5, 2.0)),
+    ("fade track 2 to 50 over", ERROR),
+    # Decimals stay one number; a zero-length fade is refused rather than turned into a jump
+    ("fade track 3 to 20 over 0.3 seconds", Action('fade', 2, 0.2, 0.3)),
+    ("fade track 3 to 20 over 4.5 seconds", Action('fade', 2, 0.2, 4.5)),
+    ("fade track 3 to 20 over .5 seconds", Action('fade', 2, 0.2, 0.5)),
+    ("set fader 1 to 75.5", Action('fader', 0, 0.755)),
+    ("fade track 3 to 20 over 0 seconds", ERROR),
+    ("fade track 3 to 20 over 0.0 seconds", ERROR),
+    ("mute track 3.5", ERROR),
+    ("mute tracks 1 through 8", Action('mute', 0, None, last=7)),
+    ("unmute tracks three to twelve", Action('unmute', 2, None, last=11)),
+    ("unmute all tracks", Action('unmute', 0, None, last=15)),
+    ("mute tracks 4 through 2", ERROR),
+    ("reset all faders", Action('reset', 0, None, last=15)),
+]
+
+# Chained utterances for parse_commands: (utterance, expected [Action, ...] / ERROR)
+COMPOUND = [
+    ("mute tracks 1 through 8 and solo 3 and set fader 5 to 60",
+     [Action('mute', 0, None, last=7), Action('solo', 2, None), Action('fader', 4, 0.6)]),
+    ("mute track 1 and 3", [Action('mute', 0, None), Action('mute', 2, None)]),
+    ("set fader 1 to 50 and 2 to 60 then play",
+     [Action('fader', 0, 0.5), Action('fader', 1, 0.6), Action('play', None, None)]),
+    ("stop and then record", [Action('stop', None, None), Action('record', None, None)]),
+    ("play and solo track 17", ERROR),
+    ("what a nice day", []),
+]
+
+
+def parsed(parse, text):
+    try:
+        return parse(text)
+    except CommandError:
+        return ERROR
+
+
+@pytest.mark.parametrize('text, expected', CORPUS)
+def test_parse_command(text, expected):
+    assert parsed(parse_command, text) == expected
+
+
+@pytest.mark.parametrize('text, expected', COMPOUND)
+def test_parse_commands(text, expected):
+    assert parsed(parse_commands, text) == expected
+
+
+@pytest.mark.parametrize('text', ["unmute track 3", "un mute track 3", "unmute tracks 1 through 4", "unmute all"])
+def test_unmute_is_never_mute(text):
+    assert all(action.kind == 'unmute' for action in parse_commands(text))
+
+
+@pytest.mark.parametrize('text', ["replay the chorus", "stopwatch", "playback volume", "the player stopped",
+                                  "display settings", "nonstop"])
+def test_words_containing_transport_words_are_ignored(text):
+    assert parse_commands(text) == []
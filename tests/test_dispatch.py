@@ -0,0 +1,55 @@
+# tests/test_dispatch.py - Batch dispatch against a DAW-only emulator with stand-in MIDI ports
+import time
+
+import pytest
+
+from benchmarks.bench_batch import build_emulator
+from commands import Action
+
+
+@pytest.fixture
+def emulator(tmp_path, monkeypatch):
+    # The state file and journal are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    emulator = build_emulator()
+    yield emulator
+    emulator.cleanup()
+
+
+def fader(emulator, track):
+    with emulator.control_lock:
+        return emulator.mixer.get('fader', track)
+
+
+def wait_for_ramps(emulator, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while emulator.ramps.active() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_set_after_fade_in_one_batch_wins(emulator):
+    emulator.dispatch_actions([Action('fade', 1, 0.3, 0.2), Action('fader', 1, 0.9)])
+    wait_for_ramps(emulator)
+    assert fader(emulator, 1) == pytest.approx(0.9)
+
+
+def test_reset_after_fade_in_one_batch_wins(emulator):
+    emulator.dispatch_actions([Action('fade', 1, 0.3, 0.2), Action('reset', None, None)])
+    wait_for_ramps(emulator)
+    assert fader(emulator, 1) != pytest.approx(0.3)
+    assert emulator.ramps.active() == 0
+
+
+def test_fade_after_set_in_one_batch_ramps(emulator):
+    emulator.dispatch_actions([Action('fader', 1, 0.9), Action('fade', 1, 0.3, 0.2)])
+    wait_for_ramps(emulator)
+    assert fader(emulator, 1) == pytest.approx(0.3)
+
+
+def test_failed_batch_keeps_running_fades(emulator):
+    emulator.dispatch_actions([Action('fade', 1, 0.3, 1.0)])
+    result = emulator.dispatch_actions([Action('fader', 1, 0.9), Action('bogus', 0, None)])
+    assert result.startswith("DAW control error")
+    assert emulator.ramps.active() == 1
+    wait_for_ramps(emulator)
+    assert fader(emulator, 1) == pytest.approx(0.3)
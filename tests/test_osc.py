@@ -0,0 +1,35 @@
+# tests/test_osc.py - OSC address and argument handling
+import pytest
+
+from commands import Action
+from osc_server import OscError, actions_from_message
+
+
+@pytest.mark.parametrize('address, args, expected', [
+    ('/track/3/fader', [0.75], [Action('fader', 2, 0.75)]),
+    ('/track/3/fader', [1.5], [Action('fader', 2, 1.0)]),
+    ('/track/3/fader', [-1], [Action('fader', 2, 0.0)]),
+    ('/track/1/mute', [1], [Action('mute', 0, None)]),
+    ('/track/1/mute', [False], [Action('unmute', 0, None)]),
+    ('/track/16/solo', [0], [Action('solo', 15, False)]),
+    ('/transport/play', [], [Action('play', None, None)]),
+    ('/transport/play', [0], []),
+])
+def test_actions_from_message(address, args, expected):
+    assert actions_from_message(address, args) == expected
+
+
+@pytest.mark.parametrize('address, args', [
+    ('/track/3/fader', [float('nan')]),
+    ('/track/3/fader', [float('inf')]),
+    ('/track/3/fader', [float('-inf')]),
+    ('/track/3/mute', [float('nan')]),
+    ('/track/3/fader', ['loud']),
+    ('/track/3/fader', []),
+    ('/track/17/fader', [0.5]),
+    ('/track/3/pan', [0.5]),
+    ('/command', []),
+])
+def test_bad_messages_are_rejected(address, args):
+    with pytest.raises(OscError):
+        actions_from_message(address, args)
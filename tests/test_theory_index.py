@@ -0,0 +1,85 @@
+# tests/test_theory_index.py - Paraphrased and off-topic questions for the music theory answer index
+#
+# benchmarks/bench_theory.py imports QUESTIONS, so the benchmark and the tests
+# score the same set.
+import pytest
+
+from theory_index import TheoryIndex
+
+# (question, expected topic); None means no confident match should be returned
+QUESTIONS = [
+    ("What's a good chord progression for jazz?", 'ii-v-i'),
+    ("explain the two five one", 'ii-v-i'),
+    ("which chords do most pop songs use", 'pop progression'),
+    ("how does a 12 bar blues go", 'blues progression'),
+    ("can you explain the circle of fifths", 'circle of fifths'),
+    ("which scales are the most common", 'scales'),
+    ("what's the formula for a major scale", 'major scale'),
+    ("what is the harmonic minor scale", 'minor scales'),
+    ("name the modes", 'modes'),
+    ("how does the dorian mode sound", 'dorian'),
+    ("what scale do I play over G7", 'mixolydian'),
+    ("what is the lydian mode", 'lydian'),
+    ("which scale sounds spanish", 'phrygian'),
+    ("notes of the minor pentatonic", 'pentatonic'),
+    ("what notes are in the blues scale", 'blues scale'),
+    ("how can I modulate to another key", 'modulation'),
+    ("what is the relative minor of G", 'relative minor'),
+    ("what order do sharps go in a key signature", 'key signatures'),
+    ("what does allegro mean", 'tempo'),
+    ("what are common tempo markings", 'tempo'),
+    ("how do you count 6/8 time", 'time signature'),
+    ("how many semitones are in a perfect fifth", 'intervals'),
+    ("how do I build a minor triad", 'triads'),
+    ("what's the difference between a maj7 and a dominant 7", 'seventh chords'),
+    ("what is a first inversion chord", 'inversions'),
+    ("what is a plagal cadence", 'cadences'),
+    ("how does a tritone substitution work", 'tritone substitution'),
+    ("explain secondary dominants", 'secondary dominants'),
+    ("what is modal interchange", 'borrowed chords'),
+    ("tips for smooth voice leading", 'voice leading'),
+    ("what is a sus4 chord", 'suspended chords'),
+    ("how do I get a swing feel", 'swing'),
+    ("how do I play three against two", 'polyrhythm'),
+    ("who wrote bohemian rhapsody", None),
+    ("how do I write a catchy melody", None),
+    ("what microphone should I buy for vocals", None),
+    ("set fader 3 to 50", None),
+    ("how loud should my master be for streaming", None),
+    ("recommend a reverb plugin", None),
+    # Off-topic, but each shares a word or two with a topic
+    ("who wrote the blues brothers soundtrack", None),
+    ("what is the time", None),
+    ("best chord progression for a sad song", None),
+]
+
+
+ON_TOPIC = [(question, topic) for question, topic in QUESTIONS if topic is not None]
+OFF_TOPIC = [question for question, topic in QUESTIONS if topic is None]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return TheoryIndex()
+
+
+@pytest.mark.parametrize('question', OFF_TOPIC)
+def test_off_topic_falls_through(index, question):
+    assert index.lookup(question) is None
+
+
+@pytest.mark.parametrize('question, topic', ON_TOPIC)
+def test_never_answers_another_topic(index, question, topic):
+    match = index.search(question)
+    assert not index.confident(match) or match.topic == topic
+
+
+def test_most_paraphrases_are_answered(index):
+    hits = sum(index.confident(index.search(question)) for question, _ in ON_TOPIC)
+    assert hits / len(ON_TOPIC) >= 0.8
+
+
+def test_one_shared_word_is_not_enough(index):
+    match = index.search("who wrote the blues brothers soundtrack")
+    assert match.topic == 'blues scale' and match.score >= index.threshold
+    assert not index.confident(match)
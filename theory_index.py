@@ -0,0 +1,304 @@
+# theory_index.py - TF-IDF answer index for common music theory questions, with an LRU answer cache
+import collections
+import math
+import re
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+# (topic, example phrasings, answer). Phrasings are what gets indexed, so add the
+# ways people actually ask rather than rewording the answer.
+CORPUS = [
+    ('ii-v-i',
+     ["good chord progression for jazz", "what is a ii v i", "two five one progression",
+      "jazz chord progression"],
+     "A great chord progression for jazz is: IIm7 - V7 - Imaj7 (e.g., Dm7 - G7 - Cmaj7). This is called the "
+     "II-V-I progression and is the foundation of jazz harmony."),
+    ('pop progression',
+     ["common pop chord progression", "four chord song progression", "i v vi iv progression"],
+     "The most common pop progression is I - V - vi - IV (C - G - Am - F in C major). Starting it on vi "
+     "(vi - IV - I - V) gives a darker feel with the same chords."),
+    ('blues progression',
+     ["twelve bar blues", "12 bar blues progression", "blues chord progression"],
+     "The 12-bar blues: I7 (4 bars), IV7 (2), I7 (2), V7 (1), IV7 (1), I7 (1), V7 turnaround (1). In A: "
+     "A7 A7 A7 A7 | D7 D7 A7 A7 | E7 D7 A7 E7."),
+    ('circle of fifths',
+     ["circle of fifths", "what is the circle of fifths", "how do I use the circle of fourths"],
+     "The Circle of Fifths shows the relationship between the 12 tones. Moving clockwise adds sharps, "
+     "counter-clockwise adds flats. It helps with key signatures and chord progressions."),
+    ('scales',
+     ["common scales", "what scales should I learn", "list of scales"],
+     "Common scales include: Major (Ionian), Natural Minor (Aeolian), Harmonic Minor, Melodic Minor, and the 7 "
+     "modes (Ionian, Dorian, Phrygian, Lydian, Mixolydian, Aeolian, Locrian)."),
+    ('major scale',
+     ["how is a major scale built", "major scale formula", "whole and half steps of the major scale"],
+     "A major scale follows whole and half steps W-W-H-W-W-W-H. From C: C D E F G A B C."),
+    ('minor scales',
+     ["natural harmonic and melodic minor", "difference between minor scales", "harmonic minor scale",
+      "melodic minor scale"],
+     "Natural minor is W-H-W-W-H-W-W (A B C D E F G). Harmonic minor raises the 7th (G#) for a leading tone. "
+     "Melodic minor raises the 6th and 7th (F#, G#) ascending; in jazz it keeps them both ways."),
+    ('modes',
+     ["what are the modes", "seven modes", "church modes", "modes of the major scale"],
+     "The 7 modes are: Ionian (Major), Dorian, Phrygian, Lydian, Mixolydian, Aeolian (Minor), and Locrian. "
+     "Each has a unique character and sound."),
+    ('dorian',
+     ["dorian mode", "what does dorian sound like", "when to use dorian"],
+     "Dorian is a minor mode with a raised 6th (D E F G A B C D). It sounds minor but brighter than Aeolian; "
+     "use it over minor 7th chords, e.g. D Dorian over Dm7 in a ii-V-I."),
+    ('mixolydian',
+     ["mixolydian mode", "scale over a dominant seventh chord", "what scale over g7", "g7 chord scale"],
+     "Over a G7 chord, you can use: G Mixolydian, G Blues scale, G Altered scale (for tension), or simply G "
+     "Major Pentatonic for a safe approach. Mixolydian is major with a flat 7th (G A B C D E F)."),
+    ('lydian',
+     ["lydian mode", "raised fourth mode", "dreamy sounding mode"],
+     "Lydian is major with a raised 4th (F G A B C D E F). The #4 gives the bright, floating sound heard in film "
+     "scores; it fits maj7#11 chords."),
+    ('phrygian',
+     ["phrygian mode", "spanish sounding scale", "flamenco scale"],
+     "Phrygian is minor with a flat 2nd (E F G A B C D E). The half step above the root gives its Spanish or "
+     "metal flavour; Phrygian dominant raises the 3rd for flamenco."),
+    ('pentatonic',
+     ["pentatonic scale", "major pentatonic", "minor pentatonic"],
+     "Pentatonic scales have five notes and no half steps, so they rarely clash. Major pentatonic: 1 2 3 5 6 "
+     "(C D E G A). Minor pentatonic: 1 b3 4 5 b7 (A C D E G)."),
+    ('blues scale',
+     ["blues scale", "notes of the blues scale", "blue note"],
+     "The blues scale is minor pentatonic plus the b5 'blue note': 1 b3 4 b5 5 b7 (A C D Eb E G)."),
+    ('modulation',
+     ["how do I modulate", "modulate from c major to a minor", "change key smoothly", "pivot chord"],
+     "To modulate from C Major to A Minor (relative keys), you can use common chords like Am, which exists in "
+     "both keys. Or use a pivot chord like Em (iii in C, v in Am)."),
+    ('relative minor',
+     ["relative minor", "relative major", "find the relative minor of a key"],
+     "Every major key shares its notes with a relative minor a minor 3rd below (C major / A minor, G major / "
+     "E minor). Count down three half steps from the major tonic."),
+    ('key signatures',
+     ["key signatures", "how many sharps in a key", "order of sharps and flats"],
+     "Sharps are added in the order F C G D A E B; flats in the reverse, B E A D G C F. Each step round the "
+     "circle of fifths adds one: G has 1 sharp, D has 2, F has 1 flat, Bb has 2."),
+    ('tempo',
+     ["tempo markings", "what bpm is allegro", "italian tempo terms", "common tempos",
+      "largo adagio andante moderato allegro presto"],
+     "Common tempos: Largo (40-60 bpm), Adagio (66-76), Andante (76-108), Moderato (108-120), Allegro "
+     "(120-168), Presto (168-200)."),
+    ('time signature',
+     ["time signatures", "what is 6 8 time", "difference between 3 4 and 6 8", "odd time signatures"],
+     "4/4 (common time) has 4 beats per measure. 3/4 is waltz time. 6/8 is compound meter with 2 main beats "
+     "subdivided into 3. 5/4 and 7/8 are asymmetric meters."),
+    ('intervals',
+     ["intervals", "how many semitones in a fifth", "interval names"],
+     "Intervals: Unison (0), Minor 2nd (1), Major 2nd (2), Minor 3rd (3), Major 3rd (4), Perfect 4th (5), "
+     "Tritone (6), Perfect 5th (7), Minor 6th (8), Major 6th (9), Minor 7th (10), Major 7th (11), Octave (12)."),
+    ('triads',
+     ["triads", "major and minor triads", "diminished and augmented chords", "how are chords built"],
+     "Triads stack two 3rds: major (1 3 5), minor (1 b3 5), diminished (1 b3 b5), augmented (1 3 #5). C major "
+     "is C E G; C minor is C Eb G."),
+    ('seventh chords',
+     ["seventh chords", "maj7 vs dominant 7", "types of 7th chords", "minor seventh chord"],
+     "Seventh chords add a 7th to a triad: maj7 (1 3 5 7), dominant 7 (1 3 5 b7), minor 7 (1 b3 5 b7), "
+     "half-diminished m7b5 (1 b3 b5 b7), diminished 7 (1 b3 b5 bb7)."),
+    ('inversions',
+     ["chord inversions", "first inversion", "slash chords"],
+     "An inversion puts a chord tone other than the root in the bass: 1st inversion has the 3rd (C/E), 2nd "
+     "inversion the 5th (C/G). Inversions smooth out bass lines and voice leading."),
+    ('cadences',
+     ["cadences", "perfect cadence", "plagal cadence", "deceptive cadence", "how to end a phrase"],
+     "Cadences end phrases: perfect/authentic V-I (final), plagal IV-I ('amen'), half cadence ends on V "
+     "(open), deceptive V-vi (surprise)."),
+    ('tritone substitution',
+     ["tritone substitution", "tritone sub", "replace the five chord"],
+     "A tritone sub swaps a dominant chord for the dominant a tritone away: Db7 for G7 going to C. Both share "
+     "the same 3rd and 7th (B/Cb and F), and the bass moves down by half step."),
+    ('secondary dominants',
+     ["secondary dominants", "five of five", "borrowed dominant chord"],
+     "A secondary dominant is the V7 of a chord other than the tonic: in C, D7 (V7/V) leads to G, A7 (V7/ii) to "
+     "Dm. They add chromatic pull towards the target chord."),
+    ('borrowed chords',
+     ["borrowed chords", "modal interchange", "minor four chord in a major key"],
+     "Borrowed chords come from the parallel key: in C major, Fm (iv), Ab (bVI) and Bb (bVII) from C minor add "
+     "a bittersweet colour."),
+    ('voice leading',
+     ["voice leading", "smooth chord changes", "avoid parallel fifths"],
+     "Good voice leading moves each voice by the smallest step, keeps common tones, and avoids parallel 5ths "
+     "and octaves between the same two voices."),
+    ('suspended chords',
+     ["sus chords", "sus2 and sus4", "suspended chord"],
+     "Suspended chords replace the 3rd: sus2 (1 2 5) or sus4 (1 4 5). With no 3rd they are neither major nor "
+     "minor, and sus4 traditionally resolves to the 3rd."),
+    ('swing',
+     ["swing feel", "how to swing eighth notes", "swing rhythm"],
+     "Swing plays pairs of eighth notes long-short, roughly a triplet quarter plus triplet eighth. Most DAWs "
+     "call it swing or groove at 55-67%."),
+    ('polyrhythm',
+     ["polyrhythm", "three against two", "polymeter"],
+     "A polyrhythm plays two pulses at once across the same span: 3:2 fits three evenly spaced notes against "
+     "two. Polymeter keeps the pulse but repeats patterns of different lengths."),
+]
+
+DEFAULT_REPLY = ("That's a great question! Music theory is vast. Try asking about: chord progressions, scales, "
+                 "modes, the circle of fifths, intervals, tempo, time signatures, or modulation.")
+
+TOKEN_RE = re.compile(r"[a-z0-9#]+")
+STOPWORDS = frozenset(
+    "a an and are as at be can do does for from good how i in is it me my of on or should the to use "
+    "what when which with you your".split())
+
+
+def terms(text):
+    """Unigrams and bigrams of the content words, lightly stemmed ('scales' -> 'scale')"""
+    words = [w[:-1] if len(w) > 3 and w.endswith('s') and not w.endswith('ss') else w
+             for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+def normalize_question(text):
+    return ' '.join(TOKEN_RE.findall(text.lower()))
+
+
+# score: cosine of the best topic; margin: how far it is ahead of the runner-up;
+# matched: how many distinct query terms it shares with the question
+Match = collections.namedtuple('Match', ['topic', 'answer', 'score', 'margin', 'matched'])
+
+
+class TheoryIndex:
+    """TF-IDF cosine search over the curated corpus
+
+    Each topic is one document (its phrasings joined). Rows are L2-normalized,
+    so a lookup is a few array reads and a dot product per query term. A
+    score alone is not enough to answer: one shared word ('blues' in "who
+    wrote the blues brothers soundtrack") can score high, so a confident match
+    also needs min_terms shared terms and a lead of min_margin over the
+    next-best topic.
+    """
+
+    def __init__(self, corpus=CORPUS, threshold=0.35, min_terms=2, min_margin=0.15):
+        self.topics = [topic for topic, _, _ in corpus]
+        self.answers = [answer for _, _, answer in corpus]
+        self.threshold = threshold
+        self.min_terms = min_terms
+        self.min_margin = min_margin
+        documents = [collections.Counter(terms(' '.join(phrasings) + ' ' + topic))
+                     for topic, phrasings, _ in corpus]
+        vocabulary = sorted(set().union(*documents))
+        self.term_ids = {term: i for i, term in enumerate(vocabulary)}
+        df = np.zeros(len(vocabulary))
+        for doc in documents:
+            for term in doc:
+                df[self.term_ids[term]] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + df)) + 1.0
+        self.matrix = np.zeros((len(documents), len(vocabulary)))
+        for row, doc in enumerate(documents):
+            for term, count in doc.items():
+                self.matrix[row, self.term_ids[term]] = (1 + math.log(count)) * self.idf[self.term_ids[term]]
+        self.matrix /= np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        # Column-major copy: a query only touches the columns of its own terms
+        self.columns = np.asfortranarray(self.matrix)
+
+    def search(self, question):
+        """Match for the best topic, or None when there is no shared term"""
+        counts = collections.Counter(t for t in terms(question) if t in self.term_ids)
+        if not counts:
+            return None
+        ids = [self.term_ids[t] for t in counts]
+        weights = np.array([(1 + math.log(c)) for c in counts.values()]) * self.idf[ids]
+        columns = self.columns[:, ids]
+        scores = columns @ (weights / np.linalg.norm(weights))
+        best = int(np.argmax(scores))
+        runner_up = np.partition(scores, -2)[-2] if len(scores) > 1 else 0.0
+        return Match(self.topics[best], self.answers[best], float(scores[best]), float(scores[best] - runner_up),
+                     int(np.count_nonzero(columns[best])))
+
+    def confident(self, match):
+        """Whether match is good enough to answer without the model"""
+        return (match is not None and match.score >= self.threshold and match.matched >= self.min_terms
+                and match.margin >= self.min_margin)
+
+    def lookup(self, question):
+        """The answer when the best match is confident, else None"""
+        match = self.search(question)
+        return match.answer if self.confident(match) else None
+
+
+class AnswerCache:
+    """Bounded LRU of recent generated answers, keyed by the normalized question"""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, question):
+        key = normalize_question(question)
+        with self.lock:
+            answer = self.entries.get(key)
+            if answer is not None:
+                self.entries.move_to_end(key)
+            return answer
+
+    def put(self, question, answer):
+        key = normalize_question(question)
+        with self.lock:
+            self.entries[key] = answer
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TheoryAssistant:
+    """Answer from the index or the cache when possible; only fall through to generate()
+
+    lookup() covers the cheap paths and returns (text, source) with source
+    'index' or 'cache', or (None, None). remember() caches a generated answer.
+    answer() chains the two around a generate(question) function, and returns
+    DEFAULT_REPLY with source 'default' when there is none. Per-source counts
+    and latencies are kept in stats/latencies.
+    """
+
+    def __init__(self, index=None, cache_size=256, threshold=0.35, min_terms=2, min_margin=0.15,
+                 latency_window=1000):
+        self.index = index or TheoryIndex(threshold=threshold, min_terms=min_terms, min_margin=min_margin)
+        self.cache = AnswerCache(cache_size)
+        self.stats = {'index': 0, 'cache': 0, 'model': 0, 'default': 0}
+        self.latencies = {source: collections.deque(maxlen=latency_window) for source in self.stats}
+
+    def record(self, source, seconds):
+        self.stats[source] += 1
+        self.latencies[source].append(seconds)
+
+    def lookup(self, question):
+        start = time.perf_counter()
+        text, source = self.index.lookup(question), 'index'
+        if text is None:
+            text, source = self.cache.get(question), 'cache'
+        if text is None:
+            return None, None
+        self.record(source, time.perf_counter() - start)
+        return text, source
+
+    def remember(self, question, answer, seconds=0.0):
+        self.cache.put(question, answer)
+        self.record('model', seconds)
+
+    def answer(self, question, generate=None):
+        text, source = self.lookup(question)
+        if text is not None:
+            return text, source
+        start = time.perf_counter()
+        if generate is None:
+            self.record('default', 0.0)
+            return DEFAULT_REPLY, 'default'
+        text = generate(question)
+        self.remember(question, text, time.perf_counter() - start)
+        return text, 'model'
+
+
+@lru_cache(maxsize=None)
+def default_assistant():
+    """Process-wide assistant, built once (the index takes a few milliseconds)"""
+    return TheoryAssistant()